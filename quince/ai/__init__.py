@@ -0,0 +1,35 @@
+"""
+Stronger computer players, which look ahead at how the ronda may unfold
+instead of choosing their moves at random.
+
+rollout - RolloutNPC, which scores every move by playing out the rest
+of the ronda many times from random deals of the cards it cannot see.
+
+ismcts - ISMCTSNPC, which searches a tree of moves shared across many
+random deals of the cards it cannot see.
+
+endgame - An exact search of the last deal of a ronda, which both of
+them switch to once the deck is empty.
+
+cache - DecisionCache, which remembers the moves chosen in each
+situation, and CachedRolloutNPC and CachedISMCTSNPC, which use it.
+
+DIFFICULTIES maps the difficulty levels offered to players
+to the class of computer player used for each of them.
+"""
+
+__all__ = ["RolloutNPC", "ISMCTSNPC", "DecisionCache", "CachedRolloutNPC",
+           "CachedISMCTSNPC", "DIFFICULTIES"]
+
+from collections import OrderedDict
+from quince.components import NPC
+from quince.ai.rollout import RolloutNPC
+from quince.ai.ismcts import ISMCTSNPC
+from quince.ai.cache import CachedISMCTSNPC, CachedRolloutNPC, DecisionCache
+
+
+DIFFICULTIES = OrderedDict([
+    ("Easy", NPC),
+    ("Normal", RolloutNPC),
+    ("Hard", ISMCTSNPC),
+])
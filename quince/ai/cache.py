@@ -0,0 +1,238 @@
+"""
+A cache of the moves chosen by computer players.
+
+Simulations keep putting players in the same situations, and a player
+that thinks hard about its moves can save itself the trouble of doing
+it again by remembering what it chose. Situations are identified by
+what matters for choosing a move: the player's hand, the mesa, the
+score-relevant totals of every pila (see Pila.summary), the number of
+cards in every hand and in the deck, and who last picked up cards.
+Seats are counted from the player's own, and suits are put in canonical
+order first (see quince.components.symmetry), so situations that only
+differ by the order of the plain suits share their entry.
+
+Note that two situations with the same pila totals can still differ in
+which cards have been seen, so a cached move is the one chosen the first
+time a situation was met, not necessarily the best one for every
+situation that shares its key.
+
+Entries are kept in memory up to a fixed number, evicting the least
+recently used ones first. They can be saved to a file, which later
+caches can map into memory and search in place without loading it.
+"""
+import hashlib
+import mmap
+import os
+import struct
+from bisect import bisect_left
+from collections import OrderedDict, namedtuple
+from quince.ai.ismcts import ISMCTSNPC
+from quince.ai.rollout import RolloutNPC
+from quince.components.card import Card
+from quince.components.cardset import decode_move, encode_move, mask_of
+from quince.components.symmetry import (canonical, inverse, permute_mask,
+                                        permute_move)
+
+
+# Approximate memory taken by each entry kept in memory, in bytes
+ENTRY_BYTES = 176
+
+# Records in cache files: a key and a move, as unsigned 64 bit ints in
+# the machine's byte order, so that files can be searched in place
+_RECORD = struct.Struct("=QQ")
+
+CacheStats = namedtuple("CacheStats", ["hits", "misses", "evictions",
+                                       "entries", "saved_entries"])
+
+
+def situation_key(ronda, player):
+    """Identifies the situation a player is in, up to the order of
+    the plain suits.
+
+    Args:
+        ronda -- Ronda object
+        player -- Reference to the Player whose turn it is
+
+    Returns:
+        Tuple (64 bit key, permutation that puts the situation's suits
+        in canonical order)
+    """
+    players = ronda.players
+    seat = players.index(player)
+    seats = players[seat:] + players[:seat]
+    cards = ronda.player_cards
+
+    hand = mask_of(cards[player]["hand"])
+    mesa = ronda.mesa_mask
+    bests = [cards[other]["pila"].setenta_mask() for other in seats]
+    permutation = canonical([hand, mesa] + bests)
+
+    fields = [permute_mask(hand, permutation),
+              permute_mask(mesa, permutation),
+              ronda.deck.remaining(),
+              seats.index(ronda.last_picked_up)]
+    for (other, best) in zip(seats, bests):
+        pila = cards[other]["pila"]
+        fields += [len(cards[other]["hand"]), pila.total_cards(),
+                   pila.total_oros(), int(pila.has_siete_de_velo()),
+                   pila.escobas, permute_mask(best, permutation)]
+
+    text = ",".join(str(field) for field in fields)
+    digest = hashlib.blake2b(text.encode("ascii"), digest_size=8).digest()
+    return (int.from_bytes(digest, "big"), permutation)
+
+
+class DecisionCache(object):
+    """Moves chosen in each situation, as packed by cardset.encode_move
+    (with the situation's suits in canonical order), by situation key.
+    """
+    def __init__(self, max_entries=100000, max_bytes=None, path=None):
+        """
+        Args:
+            max_entries (int) -- Most entries kept in memory
+            max_bytes (int) -- Most memory taken by the entries, if it
+                               allows fewer entries than max_entries
+            path (str) -- File saved by another cache, to fall back on
+                          for situations not found in memory
+        """
+        if max_bytes is not None:
+            max_entries = min(max_entries, max_bytes // ENTRY_BYTES)
+        self.max_entries = max_entries
+
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._file = None
+        self._map = None
+        self._saved = memoryview(b"").cast("Q")
+        if path is not None and os.path.getsize(path):
+            self._file = open(path, "rb")
+            self._map = mmap.mmap(self._file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+            self._saved = memoryview(self._map).cast("Q")
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, key):
+        """Finds the move stored for a situation.
+
+        Returns:
+            int, or None if the situation is not in the cache
+        """
+        move = self._entries.get(key)
+        if move is None:
+            move = self._lookup_saved(key)
+            if move is None:
+                self.misses += 1
+                return None
+            self._entries[key] = move
+            self._evict()
+        else:
+            self._entries.move_to_end(key)
+
+        self.hits += 1
+        return move
+
+    def store(self, key, move):
+        """Stores the move chosen in a situation."""
+        self._entries[key] = move
+        self._entries.move_to_end(key)
+        self._evict()
+
+    def stats(self):
+        """Returns a CacheStats tuple."""
+        return CacheStats(self.hits, self.misses, self.evictions,
+                          len(self._entries), len(self._saved) // 2)
+
+    def save(self, path):
+        """Writes every entry, including those of the file the cache
+        falls back on, to a file sorted by key.
+        """
+        entries = dict(zip(self._saved[0::2], self._saved[1::2]))
+        entries.update(self._entries)
+
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as output:
+            for key in sorted(entries):
+                output.write(_RECORD.pack(key, entries[key]))
+        os.replace(temporary, path)
+
+    def close(self):
+        """Unmaps the file the cache falls back on, if any."""
+        if self._map is not None:
+            self._saved.release()
+            self._saved = memoryview(b"").cast("Q")
+            self._map.close()
+            self._file.close()
+            self._map = None
+            self._file = None
+
+    def _lookup_saved(self, key):
+        """Binary search for a key in the saved entries."""
+        keys = self._saved[0::2]
+        position = bisect_left(keys, key)
+        if position < len(keys) and keys[position] == key:
+            return self._saved[2 * position + 1]
+        return None
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+class CachingNPC(object):
+    """Mixin for computer player classes, which looks their moves up in
+    a DecisionCache before working them out. It must come before the
+    player class among the bases.
+    """
+
+    def __init__(self, *args, cache=None, **kwargs):
+        """
+        Args:
+            cache -- DecisionCache to use. A new one by default.
+            Any other argument is passed on to the player class.
+        """
+        super(CachingNPC, self).__init__(*args, **kwargs)
+        self.cache = DecisionCache() if cache is None else cache
+
+    def get_move(self, hand, mesa, ronda=None):
+        """Select a move for the NPC to make, from the cache if
+        the situation has been met before.
+
+        Args:
+            hand -- List of card objects
+            mesa -- List of card objects
+            ronda -- The Ronda being played. Without it, the move
+                     is not cached.
+
+        Returns:
+            Tuple containing the card to be played from the player's hand
+            and a list of the cards to be picked up from the mesa.
+        """
+        if ronda is None:
+            return super(CachingNPC, self).get_move(hand, mesa)
+
+        (key, permutation) = situation_key(ronda, self)
+        move = self.cache.lookup(key)
+        if move is None:
+            (card, captured) = super(CachingNPC, self).get_move(hand, mesa,
+                                                                ronda)
+            self.cache.store(key, permute_move(encode_move(card, captured),
+                                               permutation))
+            return (card, list(captured))
+
+        (card, captured) = decode_move(
+            permute_move(move, inverse(permutation)), Card)
+        return (card, list(captured))
+
+
+class CachedRolloutNPC(CachingNPC, RolloutNPC):
+    """A RolloutNPC that remembers its moves."""
+
+
+class CachedISMCTSNPC(CachingNPC, ISMCTSNPC):
+    """An ISMCTSNPC that remembers its moves."""
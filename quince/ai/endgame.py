@@ -0,0 +1,681 @@
+"""
+Exact search for the final deal of a ronda.
+
+Once the deck is empty, a player who has been counting cards knows
+which cards are still in the other players' hands, and what is left of
+the ronda is a small game of perfect information. This module searches
+it exhaustively with alpha-beta pruning, a transposition table keyed by
+Zobrist keys (see quince.components.zobrist), and move ordering that
+tries escobas and captures of the 7 de velo first.
+
+Positions are scored by the margin of the searching player over their
+strongest opponent, using the same rules as Ronda.calculate_scores.
+With more than two players, every opponent is assumed to play against
+the searching player (a "paranoid" search).
+
+With two players the opponent's hand is exactly the cards that have not
+been seen. With more, it is not known how those cards are split between
+the opponents, so several splits are sampled and solved, as many as fit
+in the nodes and time allowed, and the values of each move are averaged.
+
+Early in the final deal of a ronda with three or four players, solving
+even one split can take hundreds of thousands of nodes, so computer
+players only switch to the search once is_solvable says it will finish.
+Should a search still run out of nodes or time, it gives up and
+best_move returns None, so that the caller can fall back to an estimate
+of its own. Splits share their transposition table.
+"""
+import random as random
+import time
+from quince.components.card import Card
+from quince.components.cardset import (CARDS_PER_SUIT, DECK_SIZE, EMPTY,
+                                       FULL, SUITS,
+                                       SUIT_MASKS, cards_in, count,
+                                       index_suit, index_value, indices,
+                                       mask_of)
+from quince.components.pila import SIETE_DE_VELO
+from quince.components import zobrist
+from quince.cpu import TARGET
+
+
+# Splits of the unseen cards solved when they are not known exactly
+SAMPLES = 6
+
+# Entries kept in each of the module's caches before they are emptied
+CACHE_SIZE = 200000
+
+# Nodes searched for a move, over every split, before giving up on
+# solving it exactly. Searches run at a few hundred thousand nodes per
+# second, so this keeps a move well under 100 ms.
+NODE_LIMIT = 10000
+
+# Most cards left in the players' hands for the rest of the ronda to be
+# solved within NODE_LIMIT. With more, and three or four players, even a
+# single split can take hundreds of thousands of nodes.
+SOLVABLE_CARDS = 8
+
+# Nodes searched between checks of the clock
+_CLOCK_INTERVAL = 1024
+
+# Setenta points of the card stored at each bit position
+_SETENTA = tuple(card.points_setenta
+                 for card in cards_in(FULL, Card))
+
+_ORO_MASK = SUIT_MASKS["oro"]
+
+# Transposition table flags
+_EXACT = 0
+_LOWER = 1
+_UPPER = 2
+
+
+def is_endgame(ronda):
+    """True once the last cards of the deck have been dealt."""
+    return ronda.deck.is_empty() and not ronda.is_finished
+
+
+def is_solvable(ronda):
+    """True once the last cards of the deck have been dealt, and few
+    enough are left in the players' hands for best_move to solve the
+    rest of the ronda.
+    """
+    return is_endgame(ronda) and sum(
+        len(cards["hand"]) for cards in ronda.player_cards.values()) \
+        <= SOLVABLE_CARDS
+
+
+def _tally(mask):
+    """The score-relevant totals of a set of cards, as a tuple
+    (cards, oros, siete de velo, best setenta points of each suit).
+    Suits without cards have 0 setenta points.
+    """
+    tally = _TALLIES.get(mask)
+    if tally is None:
+        if len(_TALLIES) > CACHE_SIZE:
+            _TALLIES.clear()
+
+        best = [0] * len(SUITS)
+        for i in indices(mask):
+            suit = i // CARDS_PER_SUIT
+            best[suit] = max(best[suit], _SETENTA[i])
+
+        tally = (count(mask), count(mask & _ORO_MASK),
+                 bool(mask & SIETE_DE_VELO)) + tuple(best)
+        _TALLIES[mask] = tally
+    return tally
+
+
+# Tallies of the sets of cards seen so far
+_TALLIES = {}
+
+
+def _subsets(mesa):
+    """Groups the subsets of the mesa by the sum of their values,
+    for the sums a capture could need.
+
+    The groups for a mesa are built from those of the mesa without its
+    highest card, so that the mesas met during a search, which mostly
+    differ by a card or two, share most of the work.
+
+    Args:
+        mesa (int) -- Mask of the cards on the mesa
+
+    Returns:
+        Dictionary from sums below TARGET to tuples of masks
+    """
+    found = _SUBSETS.get(mesa)
+    if found is None:
+        if len(_SUBSETS) > CACHE_SIZE:
+            _SUBSETS.clear()
+            _SUBSETS[EMPTY] = {0: (EMPTY,)}
+
+        top = mesa.bit_length() - 1
+        card = 1 << top
+        value = index_value(top)
+        rest = _subsets(mesa ^ card)
+
+        found = dict(rest)
+        for (total, masks) in rest.items():
+            if total + value < TARGET:
+                found[total + value] = found.get(total + value, ()) \
+                    + tuple(picked | card for picked in masks)
+        _SUBSETS[mesa] = found
+    return found
+
+
+# Subsets found by _subsets, by mesa
+_SUBSETS = {EMPTY: {0: (EMPTY,)}}
+
+
+def _sums(mesa, target):
+    """Lists the subsets of the mesa whose values add up to target,
+    which must be positive.
+
+    Args:
+        mesa (int) -- Mask of the cards on the mesa
+        target (int)
+
+    Returns:
+        Tuple of masks
+    """
+    return _subsets(mesa).get(target, ())
+
+
+def _add(summary, tally, escobas):
+    """Adds the tally of some cards, and a number of escobas,
+    to a pila summary.
+    """
+    # this runs for every capture searched, so max() is spelled out
+    (_, _, _, oro, basto, espada, copa, _) = summary
+    return (summary[0] + tally[0],
+            summary[1] + tally[1],
+            summary[2] or tally[2],
+            oro if oro > tally[3] else tally[3],
+            basto if basto > tally[4] else tally[4],
+            espada if espada > tally[5] else tally[5],
+            copa if copa > tally[6] else tally[6],
+            summary[7] + escobas)
+
+
+def summarize(pila):
+    """The parts of a pila that matter for scoring, as a tuple
+    (cards, oros, siete de velo, best setenta points of each suit, escobas).
+    """
+    return _tally(pila.mask) + (pila.escobas,)
+
+
+def points(summaries):
+    """Points earned by each seat, following Ronda.calculate_scores.
+
+    Args:
+        summaries -- List of pila summaries, as built by summarize
+
+    Returns:
+        List of points, by seat
+    """
+    # this runs at every leaf of the search, so it takes a single pass
+    # over the summaries instead of one for each category
+    most_cards = most_oros = best_setenta = -1
+    setentas = []
+    for (cards, oros, _, oro, basto, espada, copa, _) in summaries:
+        if cards > most_cards:
+            most_cards = cards
+        if oros > most_oros:
+            most_oros = oros
+
+        # a setenta needs at least one card of each suit
+        setenta = oro + basto + espada + copa \
+            if oro and basto and espada and copa else 0
+        setentas.append(setenta)
+        if setenta > best_setenta:
+            best_setenta = setenta
+
+    # ties for most cards, most oros and best setenta all earn the point
+    return [summary[7] + summary[2] + (summary[0] == most_cards)
+            + (summary[1] == most_oros)
+            + (setenta == best_setenta and setenta > 0)
+            for (summary, setenta) in zip(summaries, setentas)]
+
+
+class SearchLimitReached(Exception):
+    """Error raised when a search runs out of nodes or time."""
+    def __init__(self, msg=None):
+        if msg is None:
+            msg = "The search ran out of nodes or time."
+        super(SearchLimitReached, self).__init__(msg)
+
+
+class Endgame(object):
+    """The state of a ronda whose deck is empty, with every hand known,
+    stored so that moves can be played and undone cheaply.
+
+    Moves are tuples (index of the card played, mask of the cards picked
+    up). Everything else needed to play them is looked up once for each
+    hand and mesa, and cached.
+    """
+    def __init__(self, hands, mesa, pilas, current, last_pickup, root):
+        """
+        Args:
+            hands -- List with the mask of each seat's hand
+            mesa (int) -- Mask of the cards on the mesa
+            pilas -- List with the Pila of each seat
+            current (int) -- Seat whose turn it is
+            last_pickup (int) -- Seat that last picked up cards
+            root (int) -- Seat of the player searching
+        """
+        self.hands = list(hands)
+        self.mesa = mesa
+        self.pilas = [summarize(pila) for pila in pilas]
+        self.current = current
+        self.last_pickup = last_pickup
+        self.root = root
+        self.remaining = sum(count(hand) for hand in hands)
+
+        # the same key a Ronda in this position has (see Ronda.key)
+        self.key = zobrist.position_key(hands, mesa, pilas, current,
+                                        last_pickup, 0)
+
+        self.table = {}
+        self.nodes = 0
+        self.node_limit = None
+        self.deadline = None
+        # node count at which the limits are checked next
+        self._next_check = float("inf")
+        self._moves = {}
+        self._margins = {}
+        self._undo = []
+
+    def share_tables(self, other):
+        """Shares the transposition table of another endgame of the same
+        ronda, searched by the same seat, so that positions reached in
+        both (once the cards that tell them apart have been played) are
+        only searched once. Moves are not shared, as they are cached by
+        hand and the same hand may be another seat's in the other one.
+        """
+        self.table = other.table
+        self._margins = other._margins
+
+    def is_over(self):
+        """True once every card has been played."""
+        return not self.remaining
+
+    def moves(self):
+        """Lists the moves of the current seat, best candidates first:
+        escobas, then captures of the 7 de velo, then other captures
+        (larger ones first), and finally dropping each card.
+
+        Returns:
+            List of tuples (index of the card played, mask picked up)
+        """
+        return [entry[0] for entry in self._entries()]
+
+    def _entries(self):
+        """The moves of the current seat, each in a tuple
+        (move, tally of the cards taken, change to the Zobrist key).
+        """
+        seat = self.current
+        hand = self.hands[seat]
+        # hands never share cards, so the hand also tells whose it is
+        lookup = hand << DECK_SIZE | self.mesa
+        entries = self._moves.get(lookup)
+        if entries is not None:
+            return entries
+
+        captures = [(index, picked) for index in indices(hand)
+                    for picked in _sums(self.mesa,
+                                        TARGET - index_value(index))]
+
+        def priority(move):
+            (index, picked) = move
+            taken = picked | 1 << index
+            return (picked != self.mesa,
+                    not taken & SIETE_DE_VELO,
+                    -count(taken))
+
+        captures.sort(key=priority)
+
+        entries = []
+        for (index, picked) in captures:
+            taken = picked | 1 << index
+            change = zobrist.HAND[seat][index] \
+                ^ zobrist.mask_key(zobrist.MESA, picked) \
+                ^ zobrist.mask_key(zobrist.PILA[seat], taken)
+            entries.append(((index, picked), _tally(taken), change))
+
+        for index in indices(hand):
+            change = zobrist.HAND[seat][index] ^ zobrist.MESA[index]
+            entries.append(((index, EMPTY), None, change))
+
+        self._moves[lookup] = entries
+        return entries
+
+    def play(self, move):
+        """Plays a move for the current seat."""
+        for entry in self._entries():
+            if entry[0] == move:
+                self._play(entry)
+                return
+        raise ValueError(f"Illegal move: {move}")
+
+    def _play(self, entry):
+        """Plays one of the entries returned by _entries."""
+        ((index, picked), tally, change) = entry
+        seat = self.current
+
+        self._undo.append((self.mesa, self.pilas[seat], self.last_pickup,
+                           self.key))
+
+        self.hands[seat] ^= 1 << index
+        self.remaining -= 1
+        key = self.key ^ change ^ zobrist.TURN[seat]
+
+        if not picked:
+            self.mesa |= 1 << index
+        else:
+            self.mesa ^= picked
+            escoba = self.mesa == EMPTY
+            summary = self.pilas[seat]
+            if escoba:
+                key ^= zobrist.ESCOBAS[seat][summary[7]] \
+                    ^ zobrist.ESCOBAS[seat][summary[7] + 1]
+            self.pilas[seat] = _add(summary, tally, escoba)
+
+            key ^= zobrist.LAST_PICKUP[self.last_pickup] \
+                ^ zobrist.LAST_PICKUP[seat]
+            self.last_pickup = seat
+
+        self.current = (seat + 1) % len(self.hands)
+        self.key = key ^ zobrist.TURN[self.current]
+
+    def undo(self, move):
+        """Reverts the last move played, which must be the one passed."""
+        (mesa, pila, last_pickup, key) = self._undo.pop()
+        seat = (self.current - 1) % len(self.hands)
+
+        self.hands[seat] |= 1 << move[0]
+        self.remaining += 1
+        self.mesa = mesa
+        self.pilas[seat] = pila
+        self.last_pickup = last_pickup
+        self.key = key
+        self.current = seat
+
+    def value(self):
+        """Margin of the root seat over its strongest opponent,
+        once every card has been played.
+        """
+        summaries = self.pilas
+        if self.mesa:
+            # the cards left on the mesa go to the last to pick up
+            summaries = list(summaries)
+            seat = self.last_pickup
+            summaries[seat] = _add(summaries[seat], _tally(self.mesa), 0)
+
+        return self._margin(summaries)
+
+    def _margin(self, summaries):
+        """Margin of the root seat over its strongest opponent.
+        Many lines of play end with the same pilas, so margins are cached.
+        """
+        lookup = tuple(summaries)
+        margin = self._margins.get(lookup)
+        if margin is None:
+            earned = points(summaries)
+            own = earned[self.root]
+            earned[self.root] = -1
+            margin = own - max(earned)
+            self._margins[lookup] = margin
+        return margin
+
+    def _last_card(self):
+        """Value of the position when at most one card is left to play.
+
+        Whichever capture the last card makes, its player ends up with
+        every card left on the mesa, and only an escoba sets those
+        captures apart. So there are at most two outcomes to compare:
+        capturing, or dropping the card and leaving the mesa to the last
+        player who picked up.
+        """
+        if not self.remaining:
+            return self.value()
+
+        seat = self.current
+        index = self.hands[seat].bit_length() - 1
+        everything = _tally(self.mesa | 1 << index)
+
+        summaries = list(self.pilas)
+        summaries[self.last_pickup] = _add(summaries[self.last_pickup],
+                                           everything, 0)
+        best = self._margin(summaries)
+
+        captures = _sums(self.mesa, TARGET - index_value(index))
+        escoba = self.mesa in captures
+        if captures and (seat != self.last_pickup or escoba):
+            summaries = list(self.pilas)
+            summaries[seat] = _add(summaries[seat], everything, escoba)
+            captured = self._margin(summaries)
+            if (seat == self.root) == (captured > best):
+                best = captured
+
+        return best
+
+    def set_limits(self, node_limit=None, deadline=None):
+        """Limits the searches that follow.
+
+        Args:
+            node_limit (int) -- Total nodes searched, counting those
+                                searched already, or None for no limit
+            deadline (float) -- time.monotonic() after which searching
+                                stops, or None for no limit
+        """
+        self.node_limit = node_limit
+        self.deadline = deadline
+        self._next_check = self.nodes
+        self._check_limits()
+
+    def _check_limits(self):
+        """Raises SearchLimitReached once a limit has been reached,
+        and works out when to check again.
+        """
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            raise SearchLimitReached()
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise SearchLimitReached()
+
+        self._next_check = float("inf")
+        if self.deadline is not None:
+            self._next_check = self.nodes + _CLOCK_INTERVAL
+        if self.node_limit is not None:
+            self._next_check = min(self._next_check, self.node_limit)
+
+    def search(self, alpha=-float("inf"), beta=float("inf")):
+        """Alpha-beta search of the rest of the ronda.
+
+        Raises SearchLimitReached if the limits given to set_limits are
+        reached, leaving the endgame in no state to be used again.
+
+        Returns:
+            The value of the position for the root seat, exact if it lies
+            between alpha and beta, or a bound on it otherwise.
+        """
+        self.nodes += 1
+        if self.nodes >= self._next_check:
+            self._check_limits()
+        if self.remaining <= 1:
+            return self._last_card()
+
+        entry = self.table.get(self.key)
+        best_move = None
+        if entry is not None:
+            (value, flag, best_move) = entry
+            if flag == _EXACT:
+                return value
+            if flag == _LOWER and value >= beta:
+                return value
+            if flag == _UPPER and value <= alpha:
+                return value
+
+        entries = self._entries()
+        if best_move is not None and entries[0][0] != best_move:
+            entries = [entry for entry in entries if entry[0] == best_move] \
+                + [entry for entry in entries if entry[0] != best_move]
+
+        # _play() and undo(), inlined, as this loop is where the search
+        # spends most of its time
+        seat = self.current
+        following = (seat + 1) % len(self.hands)
+        (key, mesa, pila, last_pickup) = (self.key, self.mesa,
+                                          self.pilas[seat], self.last_pickup)
+        turn = zobrist.TURN[seat] ^ zobrist.TURN[following]
+        escoba_change = zobrist.ESCOBAS[seat][pila[7]] \
+            ^ zobrist.ESCOBAS[seat][pila[7] + 1]
+        pickup_change = zobrist.LAST_PICKUP[last_pickup] \
+            ^ zobrist.LAST_PICKUP[seat]
+
+        maximizing = seat == self.root
+        (low, high) = (alpha, beta)
+        best = -float("inf") if maximizing else float("inf")
+
+        self.current = following
+        self.remaining -= 1
+        for ((index, picked), tally, change) in entries:
+            self.hands[seat] ^= 1 << index
+            if picked:
+                self.mesa = mesa ^ picked
+                escoba = self.mesa == EMPTY
+                self.pilas[seat] = _add(pila, tally, escoba)
+                self.last_pickup = seat
+                self.key = key ^ change ^ turn ^ pickup_change
+                if escoba:
+                    self.key ^= escoba_change
+            else:
+                self.mesa = mesa | 1 << index
+                self.pilas[seat] = pila
+                self.last_pickup = last_pickup
+                self.key = key ^ change ^ turn
+
+            value = self.search(low, high)
+
+            self.hands[seat] |= 1 << index
+            if maximizing and value > best:
+                (best, best_move) = (value, (index, picked))
+                if value > low:
+                    low = value
+            elif not maximizing and value < best:
+                (best, best_move) = (value, (index, picked))
+                if value < high:
+                    high = value
+
+            if low >= high:
+                break
+
+        (self.current, self.mesa, self.pilas[seat], self.last_pickup,
+         self.key) = (seat, mesa, pila, last_pickup, key)
+        self.remaining += 1
+
+        if best <= alpha:
+            flag = _UPPER
+        elif best >= beta:
+            flag = _LOWER
+        else:
+            flag = _EXACT
+        self.table[self.key] = (best, flag, best_move)
+
+        return best
+
+    def root_values(self):
+        """Exact value of every move available to the current seat,
+        which must be the root seat.
+
+        Returns:
+            Dictionary with moves as keys
+        """
+        values = {}
+        for entry in self._entries():
+            self._play(entry)
+            values[entry[0]] = self.search()
+            self.undo(entry[0])
+        return values
+
+
+def endgames(ronda, player, rng=random, samples=SAMPLES):
+    """Builds the endgames that a card-counting player could be facing.
+
+    Args:
+        ronda -- Ronda whose deck is empty
+        player -- Reference to the Player whose turn it is
+        rng -- Used to split the unseen cards, if needed
+        samples (int) -- Number of splits to build when the unseen cards
+                         could be split between opponents in several ways
+
+    Returns:
+        List of Endgame objects
+    """
+    players = ronda.players
+    cards = ronda.player_cards
+    root = players.index(player)
+
+    known = mask_of(cards[player]["hand"]) | ronda.mesa_mask
+    for other in players:
+        known |= cards[other]["pila"].mask
+    unseen = FULL & ~known
+
+    sizes = [len(cards[other]["hand"]) for other in players]
+    holders = [seat for seat in range(len(players))
+               if seat != root and sizes[seat]]
+    if len(holders) <= 1:
+        samples = 1
+
+    built = []
+    for _ in range(samples):
+        shuffled = cards_in(unseen, Card)
+        rng.shuffle(shuffled)
+
+        hands = []
+        dealt = 0
+        for (seat, other) in enumerate(players):
+            if seat == root:
+                hands.append(mask_of(cards[player]["hand"]))
+            else:
+                hands.append(mask_of(shuffled[dealt:dealt + sizes[seat]]))
+                dealt += sizes[seat]
+
+        built.append(Endgame(hands, ronda.mesa_mask,
+                             [cards[other]["pila"] for other in players],
+                             root, players.index(ronda.last_picked_up),
+                             root))
+    return built
+
+
+def best_move(ronda, player, rng=random, samples=SAMPLES, time_budget=None,
+              node_limit=NODE_LIMIT):
+    """Finds the move with the best average value over the endgames
+    the player could be facing.
+
+    Splits are solved one after the other until either limit is reached.
+    A split whose search is cut short is left out of the average.
+
+    Args:
+        ronda -- Ronda whose deck is empty
+        player -- Reference to the Player whose turn it is
+        rng -- Used to split the unseen cards, if needed
+        samples (int) -- Number of splits to solve, if needed
+        time_budget (float) -- Seconds allowed for searching,
+                               or None for no limit
+        node_limit (int) -- Nodes allowed for searching, over every
+                            split, or None for no limit
+
+    Returns:
+        Tuple containing the card to be played from the player's hand
+        and a list of the cards to be picked up from the mesa, or None
+        if not even one split could be solved within the limits.
+    """
+    deadline = None
+    if time_budget is not None:
+        deadline = time.monotonic() + time_budget
+
+    totals = {}
+    searched = 0
+    shared = None
+    for endgame in endgames(ronda, player, rng, samples):
+        if shared is None:
+            shared = endgame
+        else:
+            endgame.share_tables(shared)
+        left = None if node_limit is None else node_limit - searched
+        try:
+            endgame.set_limits(left, deadline)
+            values = endgame.root_values()
+        except SearchLimitReached:
+            break
+
+        searched += endgame.nodes
+        for (move, value) in values.items():
+            totals[move] = totals.get(move, 0) + value
+
+    if not totals:
+        return None
+
+    (index, picked) = max(totals, key=totals.__getitem__)
+    card = Card(index_value(index), index_suit(index))
+    return (card, cards_in(picked, Card))
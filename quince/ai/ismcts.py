@@ -0,0 +1,250 @@
+"""
+Information set Monte Carlo tree search (ISMCTS) for computer players.
+
+The search grows a single tree of moves for the player whose turn it is.
+Every iteration deals the cards that player cannot see at random, walks
+down the tree choosing among the moves that are legal in that deal with
+UCB (counting how often each move was available rather than how often
+its parent was visited), adds one new move to the tree, plays the rest
+of the ronda at random and credits each move on the way with the points
+margin of the player who made it. Once the deck is empty, moves are
+chosen with the exact search in quince.ai.endgame instead, as soon as
+the rest of the ronda is small enough for it to solve (see
+endgame.is_solvable).
+
+The tree is stored in parallel arrays with one entry per node, so that
+hundreds of thousands of iterations only take a few megabytes.
+"""
+import math
+import random as random
+import time
+from array import array
+from quince.ai.endgame import best_move, is_solvable
+from quince.ai.rollout import (candidate_moves, determinize,
+                               interchangeable_cards, margin, observe,
+                               playout)
+from quince.components.card import Card
+from quince.components.cardset import decode_move, encode_move
+from quince.components.player import NPC, STOCK_IMAGE_PATH
+
+
+# Weight of the exploration term in the UCB formula.
+# Rewards are point margins, which rarely move by more than a few points.
+EXPLORATION = 2.0
+
+ROOT = 0
+NO_NODE = -1
+
+
+class Tree(object):
+    """A search tree stored as arrays indexed by node number.
+
+    Each node records the move that leads to it (see cardset.encode_move),
+    the seat of the player who made that move, and its statistics.
+    Children form a linked list through first_child and next_sibling.
+    """
+    def __init__(self):
+        self.parent = array("i")
+        self.first_child = array("i")
+        self.next_sibling = array("i")
+        self.move = array("q")
+        self.seat = array("b")
+        self.visits = array("i")
+        self.available = array("i")
+        self.reward = array("d")
+
+        self.add(NO_NODE, 0, -1)
+
+    def __len__(self):
+        return len(self.parent)
+
+    def add(self, parent, move, seat):
+        """Adds a node as the first child of parent.
+
+        Returns:
+            int, the number of the new node
+        """
+        node = len(self.parent)
+        self.parent.append(parent)
+        self.first_child.append(NO_NODE)
+        self.move.append(move)
+        self.seat.append(seat)
+        self.visits.append(0)
+        self.available.append(0)
+        self.reward.append(0.0)
+
+        if parent == NO_NODE:
+            self.next_sibling.append(NO_NODE)
+        else:
+            self.next_sibling.append(self.first_child[parent])
+            self.first_child[parent] = node
+
+        return node
+
+    def children(self, node):
+        """Yields the children of a node, newest first."""
+        child = self.first_child[node]
+        while child != NO_NODE:
+            yield child
+            child = self.next_sibling[child]
+
+    def most_visited(self, node):
+        """Returns the child of a node that was visited the most."""
+        return max(self.children(node), key=self.visits.__getitem__)
+
+
+def search(situation, rng, iterations=None, time_budget=None,
+           exploration=EXPLORATION):
+    """Runs ISMCTS from the point of view of the player whose turn it is.
+
+    Searching stops after either budget runs out, whichever comes first.
+    At least one iteration is always run.
+
+    Args:
+        situation -- Situation tuple (see rollout.observe)
+        rng -- random.Random
+        iterations (int) -- Maximum number of iterations
+        time_budget (float) -- Maximum number of seconds
+        exploration (float) -- Weight of the exploration term in UCB
+
+    Returns:
+        Tree object
+    """
+    if iterations is None and time_budget is None:
+        raise ValueError("Either iterations or time_budget must be given")
+
+    tree = Tree()
+    deadline = None
+    if time_budget is not None:
+        deadline = time.monotonic() + time_budget
+
+    # the cards that are interchangeable at the root stay so further down
+    interchangeable = interchangeable_cards(situation.pilas)
+
+    iteration = 0
+    while iterations is None or iteration < iterations:
+        # checking the clock is cheap, but not free
+        if deadline is not None and iteration % 16 == 1 \
+                and time.monotonic() >= deadline:
+            break
+
+        _iterate(tree, determinize(situation, rng), rng, exploration,
+                 interchangeable)
+        iteration += 1
+
+    return tree
+
+
+def _iterate(tree, ronda, rng, exploration, interchangeable):
+    """Runs a single iteration of the search on a determinized ronda,
+    trying a single move of each class of interchangeable moves.
+    """
+    node = ROOT
+    path = []
+
+    while not ronda.is_finished:
+        hand = ronda.player_cards[ronda.current_player]["hand"]
+        legal = {encode_move(card, captured): (card, captured)
+                 for (card, captured) in candidate_moves(
+                     hand, ronda.current_mesa, interchangeable)}
+
+        untried = dict(legal)
+        compatible = []
+        for child in tree.children(node):
+            if untried.pop(tree.move[child], None) is not None:
+                compatible.append(child)
+                tree.available[child] += 1
+
+        if untried:
+            move = rng.choice(list(untried))
+            node = tree.add(node, move, ronda.current_player)
+            tree.available[node] += 1
+            path.append(node)
+            ronda.play_turn(*legal[move])
+            break
+
+        node = max(compatible, key=lambda child: _ucb(tree, child,
+                                                      exploration))
+        path.append(node)
+        ronda.play_turn(*legal[tree.move[node]])
+
+    playout(ronda, rng)
+    points = ronda.points()
+
+    for node in path:
+        tree.visits[node] += 1
+        tree.reward[node] += margin(points, tree.seat[node])
+
+
+def _ucb(tree, node, exploration):
+    """Upper confidence bound of a node that has been visited."""
+    visits = tree.visits[node]
+    return (tree.reward[node] / visits
+            + exploration * math.sqrt(math.log(tree.available[node])
+                                      / visits))
+
+
+class ISMCTSNPC(NPC):
+    """A computer player that chooses its moves with information set
+    Monte Carlo tree search.
+    """
+
+    def __init__(self, name, image_path=STOCK_IMAGE_PATH, rng=None,
+                 iterations=None, time_budget=0.8, exploration=EXPLORATION):
+        """Instantiates a computer player.
+
+        Args:
+            name (str) -- Player's name
+            image_path (string) -- Path to the image for the player's avatar
+            rng -- Seed or random.Random used to choose moves
+            iterations (int) -- Maximum number of iterations per move
+            time_budget (float) -- Seconds allowed for choosing a move.
+                                   None for no limit, in which case the
+                                   moves chosen only depend on the seed
+                                   and iterations must be given.
+            exploration (float) -- Weight of the exploration term in UCB
+        """
+        super(ISMCTSNPC, self).__init__(name, image_path, rng)
+        self.iterations = iterations
+        self.time_budget = time_budget
+        self.exploration = exploration
+
+    def get_move(self, hand, mesa, ronda=None):
+        """Select a move for the NPC to make.
+
+        Args:
+            hand -- List of card objects
+            mesa -- List of card objects
+            ronda -- The Ronda being played. Without it, the NPC
+                     falls back to playing at random.
+
+        Returns:
+            Tuple containing the card to be played from the player's hand
+            and a list of the cards to be picked up from the mesa.
+        """
+        if ronda is None:
+            return super(ISMCTSNPC, self).get_move(hand, mesa)
+
+        situation = observe(ronda, self)
+        moves = candidate_moves(hand, mesa,
+                                interchangeable_cards(situation.pilas))
+        if len(moves) == 1:
+            (card, captured) = moves[0]
+            return (card, list(captured))
+        if is_solvable(ronda):
+            move = best_move(ronda, self, self.rng,
+                             time_budget=self.time_budget)
+            if move is not None:
+                return move
+
+        # Search with a generator of our own, so that the number of
+        # iterations that fit in the time budget does not change the
+        # state of self.rng. The move chosen still depends on it, unless
+        # there is no time budget.
+        rng = random.Random(self.rng.getrandbits(64))
+        tree = search(situation, rng, self.iterations,
+                      self.time_budget, self.exploration)
+
+        (card, captured) = decode_move(tree.move[tree.most_visited(ROOT)],
+                                       Card)
+        return (card, list(captured))
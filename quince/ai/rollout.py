@@ -0,0 +1,344 @@
+"""
+Monte Carlo rollouts for computer players.
+
+A RolloutNPC scores each of its moves by dealing the cards it cannot see
+(the other players' hands and the deck) at random, playing the move,
+and then playing random moves for everybody until the ronda is over.
+Repeated over many deals, the average points it earns compared to its
+strongest opponent tell how good each move is. Once the deck is empty,
+moves are chosen with the exact search in quince.ai.endgame instead, as
+soon as the rest of the ronda is small enough for it to solve (see
+endgame.is_solvable).
+
+Rollouts can be spread across a pool of worker processes. Workers only
+receive a Situation, a compact description of the ronda in which players
+are replaced by their seat numbers, so nothing else needs to be pickled.
+"""
+import random as random
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from quince.ai.endgame import best_move, is_solvable
+from quince.components import Card, Deck, NPC, Ronda
+from quince.components.cardset import (EMPTY, FULL, SUITS, cards_in,
+                                       mask_of)
+from quince.components.player import STOCK_IMAGE_PATH
+from quince.cpu import (enumerate_possibilities, group_moves,
+                        random_possibility)
+
+
+# Everything the player whose turn it is knows about a ronda.
+# Players are identified by their seat (their position in the ronda).
+Situation = namedtuple("Situation", ["seat", "dealer", "last_pickup",
+                                     "hand", "mesa", "pilas", "hand_sizes"])
+
+
+def observe(ronda, player):
+    """Describes the ronda from the point of view of a player.
+
+    Args:
+        ronda -- Ronda object
+        player -- Reference to the Player whose turn it is
+
+    Returns:
+        Situation tuple
+    """
+    players = ronda.players
+    cards = ronda.player_cards
+
+    return Situation(seat=players.index(player),
+                     dealer=players.index(ronda.dealer),
+                     last_pickup=players.index(ronda.last_picked_up),
+                     hand=tuple(cards[player]["hand"]),
+                     mesa=ronda.mesa_mask,
+                     pilas=tuple(cards[other]["pila"] for other in players),
+                     hand_sizes=tuple(len(cards[other]["hand"])
+                                      for other in players))
+
+
+def _worth_at_most(suit):
+    """Maps the setenta points of each card of a suit (and 0, for no card)
+    to the cards of the suit worth at most as many points.
+    """
+    cards = [Card(value, suit) for value in range(1, 11)]
+    table = {0: EMPTY}
+    for card in cards:
+        table[card.points_setenta] = mask_of(
+            other for other in cards
+            if other.points_setenta <= card.points_setenta)
+    return table
+
+
+_WORTH_AT_MOST = {suit: _worth_at_most(suit) for suit in SUITS[1:]}
+
+
+def interchangeable_cards(pilas):
+    """Finds the cards whose suit can no longer matter.
+
+    The suit of a card other than an oro only counts towards the setenta,
+    where it is compared with the best card of its suit in the pila that
+    picks it up. Once every pila holds a card of that suit worth at least
+    as many points, the card cannot improve anybody's setenta, and it is
+    interchangeable with any other such card of the same value. Pilas only
+    ever get better, so this holds for the rest of the ronda.
+
+    Args:
+        pilas -- The Pila of every player
+
+    Returns:
+        Bitmask of the interchangeable cards
+    """
+    worst = {suit: max(_WORTH_AT_MOST[suit]) for suit in SUITS[1:]}
+    for pila in pilas:
+        best = {card.suit: card.points_setenta
+                for card in cards_in(pila.setenta_mask(), Card)}
+        for suit in worst:
+            worst[suit] = min(worst[suit], best.get(suit, 0))
+
+    mask = EMPTY
+    for (suit, points) in worst.items():
+        mask |= _WORTH_AT_MOST[suit][points]
+    return mask
+
+
+def determinize(situation, rng):
+    """Deals the cards that the player cannot see at random,
+    making up one of the rondas that the situation could belong to.
+
+    Args:
+        situation -- Situation tuple
+        rng -- random.Random
+
+    Returns:
+        Mutable Ronda whose players are seat numbers
+    """
+    known = mask_of(situation.hand) | situation.mesa
+    for pila in situation.pilas:
+        known |= pila.mask
+
+    unseen = cards_in(FULL & ~known, Card)
+    rng.shuffle(unseen)
+
+    seats = list(range(len(situation.pilas)))
+    player_cards = {}
+    dealt = 0
+    for seat in seats:
+        if seat == situation.seat:
+            hand = situation.hand
+        else:
+            size = situation.hand_sizes[seat]
+            hand = tuple(unseen[dealt:dealt + size])
+            dealt += size
+
+        player_cards[seat] = {"hand": hand, "pila": situation.pilas[seat]}
+
+    return Ronda(current_player=situation.seat,
+                 dealer=situation.dealer,
+                 deck=Deck.from_order(Card, unseen[dealt:]),
+                 last_pickup=situation.last_pickup,
+                 mesa=situation.mesa,
+                 players=seats,
+                 player_cards=player_cards,
+                 mutable=True)
+
+
+def candidate_moves(hand, mesa, interchangeable=None):
+    """Lists every move a player can make: each of the captures available,
+    and dropping each of the cards in their hand.
+
+    Args:
+        hand -- List of Card objects
+        mesa -- List of Card objects
+        interchangeable (int) -- Bitmask returned by interchangeable_cards.
+                                 If given, only one move is listed for each
+                                 class of moves that differ by which of these
+                                 cards they use.
+
+    Returns:
+        List of tuples (card from the hand, tuple of cards from the mesa)
+    """
+    moves = enumerate_possibilities(mesa, hand)
+    moves.extend((card,) for card in hand)
+    if interchangeable:
+        moves = [move for (move, _) in group_moves(moves, interchangeable)]
+    return [(move[0], move[1:]) for move in moves]
+
+
+def playout(ronda, rng):
+    """Finishes a mutable ronda, with every player picking one of their
+    captures at random, or dropping a random card when they have none.
+    """
+    while not ronda.is_finished:
+        hand = ronda.player_cards[ronda.current_player]["hand"]
+        move = random_possibility(ronda.current_mesa, hand, rng)
+        if move is None:
+            ronda.play_turn(rng.choice(hand))
+        else:
+            ronda.play_turn(move[0], move[1:])
+
+
+def margin(points, seat):
+    """Points earned by a seat, minus those of its best opponent."""
+    best_other = max(earned for (other, earned) in points.items()
+                     if other != seat)
+    return points[seat] - best_other
+
+
+def evaluate(situation, moves, rollouts, seed):
+    """Plays out every move from the same random deals.
+
+    This is the unit of work sent to each worker process. Using the same
+    deals for every move means that differences between their totals come
+    from the moves themselves rather than from luckier deals.
+
+    Args:
+        situation -- Situation tuple
+        moves -- List returned by candidate_moves
+        rollouts (int) -- Number of deals to play out
+        seed (int) -- Seed for the deals and the random moves
+
+    Returns:
+        List with the total margin earned by each move
+    """
+    rng = random.Random(seed)
+    totals = [0] * len(moves)
+
+    for _ in range(rollouts):
+        root = determinize(situation, rng)
+        for (i, (card, captured)) in enumerate(moves):
+            ronda = root.mutable_copy()
+            ronda.play_turn(card, captured)
+            playout(ronda, rng)
+            totals[i] += margin(ronda.points(), situation.seat)
+
+    return totals
+
+
+class RolloutNPC(NPC):
+    """A computer player that chooses the move with the best expected
+    margin over its strongest opponent, estimated with random rollouts.
+    """
+
+    def __init__(self, name, image_path=STOCK_IMAGE_PATH, rng=None,
+                 rollouts=400, time_budget=0.8, workers=1, batch=20):
+        """Instantiates a computer player.
+
+        Args:
+            name (str) -- Player's name
+            image_path (string) -- Path to the image for the player's avatar
+            rng -- Seed or random.Random used to choose moves
+            rollouts (int) -- Maximum number of deals played out per move
+            time_budget (float) -- Seconds allowed for choosing a move,
+                                   or None to always play out every deal.
+                                   At least one batch is always played out.
+            workers (int) -- Number of worker processes.
+                             With a single worker, rollouts are played in
+                             this process.
+            batch (int) -- Number of deals played out in each unit of work
+        """
+        super(RolloutNPC, self).__init__(name, image_path, rng)
+        self.rollouts = rollouts
+        self.time_budget = time_budget
+        self.workers = workers
+        self.batch = batch
+        self._executor = None
+
+    def get_move(self, hand, mesa, ronda=None):
+        """Select a move for the NPC to make.
+
+        Args:
+            hand -- List of card objects
+            mesa -- List of card objects
+            ronda -- The Ronda being played. Without it, the NPC
+                     falls back to playing at random.
+
+        Returns:
+            Tuple containing the card to be played from the player's hand
+            and a list of the cards to be picked up from the mesa.
+        """
+        if ronda is None:
+            return super(RolloutNPC, self).get_move(hand, mesa)
+
+        situation = observe(ronda, self)
+        moves = candidate_moves(hand, mesa,
+                                interchangeable_cards(situation.pilas))
+        if len(moves) == 1:
+            (card, captured) = moves[0]
+            return (card, list(captured))
+        if is_solvable(ronda):
+            move = best_move(ronda, self, self.rng,
+                             time_budget=self.time_budget)
+            if move is not None:
+                return move
+
+        totals = self._evaluate(situation, moves)
+        (card, captured) = moves[max(range(len(moves)),
+                                     key=totals.__getitem__)]
+        return (card, list(captured))
+
+    def close(self):
+        """Shuts down the worker processes, if any were started."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _evaluate(self, situation, moves):
+        """Totals the margin earned by each move over as many batches
+        as fit in the time budget.
+        """
+        deadline = None
+        if self.time_budget is not None:
+            deadline = time.monotonic() + self.time_budget
+        batches = [min(self.batch, self.rollouts - start)
+                   for start in range(0, self.rollouts, self.batch)]
+        totals = [0] * len(moves)
+
+        def add(result):
+            for (i, total) in enumerate(result):
+                totals[i] += total
+
+        if self.workers <= 1:
+            for (done, size) in enumerate(batches):
+                if done and deadline is not None \
+                        and time.monotonic() >= deadline:
+                    break
+                add(evaluate(situation, moves, size,
+                             self.rng.getrandbits(64)))
+            return totals
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+        # Only keep a couple of batches per worker in flight, so that
+        # little work is wasted once the time budget runs out
+        pending = set()
+        batches = iter(batches)
+        received = 0
+        while True:
+            for size in batches:
+                pending.add(self._executor.submit(
+                    evaluate, situation, moves, size,
+                    self.rng.getrandbits(64)))
+                if len(pending) >= self.workers * 2:
+                    break
+
+            if not pending:
+                break
+
+            timeout = None
+            if deadline is not None and received:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+
+            # wait for at least one batch, however long it takes
+            (done, pending) = wait(pending, timeout=timeout,
+                                   return_when=FIRST_COMPLETED)
+            for future in done:
+                add(future.result())
+                received += 1
+
+        for future in pending:
+            future.cancel()
+
+        return totals
@@ -0,0 +1,521 @@
+"""
+Many rondas played at once, with NumPy.
+
+Playing a ronda with Ronda objects costs a few microseconds of Python for
+every card moved, which caps how many rondas a single core can get through
+when evaluating a policy. A BatchRonda instead holds the state of N rondas
+in arrays (cards as 64 bit masks, with the same bit layout as
+quince.components.cardset) and plays a turn of all of them with a handful
+of array operations.
+
+Every ronda in a batch has the same number of players, and every ronda
+lasts exactly 36 turns with a new hand dealt every 3 turns per player, so
+all of them move in lockstep: they only differ by their cards and by who
+deals. Given the same deck orders and the same moves, the rondas play out
+and score exactly as they would with Ronda.
+
+Moves are given as two arrays: the index of the card played by each ronda
+(see cardset.card_index) and the mask of the cards it picks up, which is 0
+when the card is dropped on the mesa.
+
+Works with NumPy 1.17 (the last releases for Python 3.6) and later.
+"""
+from itertools import product
+from math import factorial
+import numpy as np
+from quince.components.card import SETENTA_SCORING
+from quince.components.cardset import (CARDS_PER_SUIT, DECK_SIZE,
+                                       SUIT_MASKS, card_index)
+from quince.components.deck import Deck
+from quince.cpu import TARGET
+
+
+HAND_SIZE = 3
+MESA_SIZE = 4
+SUIT_COUNT = DECK_SIZE // CARDS_PER_SUIT
+TURNS = DECK_SIZE - MESA_SIZE
+
+
+def _comb(n, k):
+    """Number of ways of picking k of n things, like math.comb
+    (which needs Python 3.8).
+    """
+    if not 0 <= k <= n:
+        return 0
+    return factorial(n) // (factorial(k) * factorial(n - k))
+
+
+# Number of bits set in every 16 bit number
+_POPCOUNT_16 = np.array([bin(number).count("1")
+                         for number in range(1 << 16)], dtype=np.uint8)
+_LOW_16 = np.uint64((1 << 16) - 1)
+
+
+def _popcount(masks):
+    """Number of bits set in each of an array of non-negative ints,
+    16 bits at a time.
+    """
+    masks = np.asarray(masks).astype(np.uint64)
+    total = _POPCOUNT_16[masks & _LOW_16]
+    for shift in range(16, 64, 16):
+        total = total + _POPCOUNT_16[masks >> np.uint64(shift) & _LOW_16]
+    return total
+
+
+# numpy.bitwise_count counts them in a single instruction, from NumPy 2
+_bitwise_count = getattr(np, "bitwise_count", _popcount)
+
+# Value of the card at each index, with a trailing 0 for empty hand slots
+_VALUES = np.array([index % CARDS_PER_SUIT + 1 for index in range(DECK_SIZE)]
+                   + [0], dtype=np.int64)
+
+_BITS = np.array([1 << index for index in range(DECK_SIZE)], dtype=np.uint64)
+
+# The cards of each value (and suit), as masks
+_VALUE_BITS = _BITS.reshape(SUIT_COUNT, CARDS_PER_SUIT).T
+_VALUE_MASKS = np.bitwise_or.reduce(_VALUE_BITS, axis=1)
+
+_ORO_MASK = np.uint64(SUIT_MASKS["oro"])
+_SIETE_DE_VELO = np.uint64(1 << card_index(7, "oro"))
+_BLOCK = np.uint64((1 << CARDS_PER_SUIT) - 1)
+
+# Best setenta points among the cards of each possible set of cards of a
+# single suit (0 for none). Points are doubled to keep them integers.
+_SETENTA = np.zeros(1 << CARDS_PER_SUIT, dtype=np.int64)
+for _block in range(1, 1 << CARDS_PER_SUIT):
+    _SETENTA[_block] = max(int(2 * SETENTA_SCORING[value])
+                           for value in range(CARDS_PER_SUIT)
+                           if _block >> value & 1)
+
+# Number of ways of picking t of the c cards of a value on the mesa
+_CHOOSE = np.array([[_comb(cards, times) for times in range(SUIT_COUNT + 1)]
+                    for cards in range(SUIT_COUNT + 1)], dtype=np.int64)
+
+# To generate moves, a mesa is described by the suits of its cards of each
+# value: a nibble per value, packed into an int with bit s of nibble v - 1
+# set if the card of value v and suit s is on the mesa. _NIBBLES spreads
+# the cards of a suit into bit 0 of those nibbles, and _NIBBLE_BITS turns
+# the nibble of a value back into cards.
+_NIBBLES = np.array([sum((block >> value & 1) << 4 * value
+                         for value in range(CARDS_PER_SUIT))
+                     for block in range(1 << CARDS_PER_SUIT)],
+                    dtype=np.uint64)
+_NIBBLE_BITS = np.array([[sum(1 << suit * CARDS_PER_SUIT + value
+                              for suit in range(SUIT_COUNT)
+                              if nibble >> suit & 1)
+                          for nibble in range(1 << SUIT_COUNT)]
+                         for value in range(CARDS_PER_SUIT)], dtype=np.uint64)
+
+# The subsets of each nibble with each number of suits, in order
+_SUBSETS = np.zeros((1 << SUIT_COUNT, SUIT_COUNT + 1, _comb(SUIT_COUNT, 2)),
+                    dtype=np.int64)
+for _nibble in range(1 << SUIT_COUNT):
+    _sizes = [0] * (SUIT_COUNT + 1)
+    for _subset in range(1 << SUIT_COUNT):
+        if _subset & ~_nibble == 0:
+            _size = bin(_subset).count("1")
+            _SUBSETS[_nibble, _size, _sizes[_size]] = _subset
+            _sizes[_size] += 1
+
+# Values 1 to 5 and 6 to 10 (the low and high halves of the packed nibbles)
+# are looked up separately, by the number of cards of each value: the
+# digits of a code in base 5, lowest value first.
+_HALF = CARDS_PER_SUIT // 2
+_HALF_BITS = 4 * _HALF
+_HALF_CODES = sum(
+    _bitwise_count(np.arange(1 << _HALF_BITS) >> 4 * value & 15)
+    .astype(np.int64) * (SUIT_COUNT + 1) ** value for value in range(_HALF))
+
+
+class _HalfTable(object):
+    """The captures that the cards of half the values on a mesa can make
+    up, by code: how many add up to each sum below 15, and how to pick one
+    of them at random.
+    """
+    def __init__(self, first):
+        """
+        Args:
+            first (int) -- Lowest value of the half
+        """
+        values = np.arange(first, first + _HALF)
+        codes = (SUIT_COUNT + 1) ** _HALF
+        counts = np.arange(codes)[:, None] \
+            // (SUIT_COUNT + 1) ** np.arange(_HALF) % (SUIT_COUNT + 1)
+
+        # every number of cards of each value that adds up to less than 15,
+        # sorted by sum
+        taken = np.array(list(product(range(SUIT_COUNT + 1), repeat=_HALF)))
+        sums = taken @ values
+        order = np.argsort(sums, kind="stable")
+        order = order[sums[order] < TARGET]
+        self.taken = taken[order]
+        sums = sums[order]
+
+        weights = np.prod(_CHOOSE[counts[:, None, :], self.taken[None]],
+                          axis=2)
+        cumulative = weights.cumsum(axis=1)
+        starts = np.searchsorted(sums, np.arange(TARGET + 1))
+        padded = np.hstack([np.zeros((codes, 1), dtype=np.int64),
+                            cumulative])
+
+        # ways[code, s] counts the captures adding up to s, and those of
+        # smaller sums come before them in cumulative
+        self.ways = padded[:, starts[1:]] - padded[:, starts[:-1]]
+        self._before = padded[:, starts[:-1]]
+
+        # rows of cumulative, offset so that they can be searched together
+        self._stride = int(cumulative[:, -1].max()) + 1
+        self._cumulative = (cumulative + np.arange(codes)[:, None]
+                            * self._stride).ravel()
+        self._size = len(sums)
+
+    def sample(self, codes, sums, rng):
+        """Picks how many cards of each value to take, for captures of
+        the given sums, with the chance of each proportional to the number
+        of captures it makes up.
+
+        Returns:
+            Array (number of codes, 5)
+        """
+        pick = np.floor(rng.random(len(codes)) * self.ways[codes, sums])
+        found = np.searchsorted(self._cumulative,
+                                codes * self._stride
+                                + self._before[codes, sums] + pick,
+                                side="right")
+        return self.taken[found - codes * self._size]
+
+
+_LOW = _HalfTable(1)
+_HIGH = _HalfTable(_HALF + 1)
+
+# The sums that the high values can add up to, below 15, and the number
+# of ways of making up each of them
+_HIGH_SUMS = np.flatnonzero(_HIGH.ways.any(axis=0))
+_HIGH_WAYS = _HIGH.ways[:, _HIGH_SUMS].astype(np.int32)
+
+# The ways of making up each sum with the low values, flattened, with
+# columns of zeros for sums down to -2 * 15 so that negative sums need
+# no special case
+_LOW_OFFSET = 2 * TARGET
+_LOW_WIDTH = _LOW_OFFSET + TARGET
+_LOW_WAYS = np.hstack([np.zeros((len(_LOW.ways), _LOW_OFFSET), np.int32),
+                       _LOW.ways.astype(np.int32)]).ravel()
+
+
+class IllegalMoveError(Exception):
+    """Error raised when a BatchRonda is given moves that some of its
+    rondas cannot make.
+    """
+    def __init__(self, msg=None):
+        if msg is None:
+            msg = "Some of the moves are not legal."
+        super(IllegalMoveError, self).__init__(msg)
+
+
+class BatchFinishedError(Exception):
+    """Error raised when trying to play a turn of a finished batch."""
+    def __init__(self, msg=None):
+        if msg is None:
+            msg = "The rondas in the batch are finished."
+        super(BatchFinishedError, self).__init__(msg)
+
+
+def deck_orders(decks):
+    """Converts decks to an array of card indices, first to be dealt first.
+
+    Args:
+        decks -- Iterable of full Deck objects
+
+    Returns:
+        numpy array of shape (number of decks, 40)
+    """
+    return np.array([[card.index for card in deck.cards()] for deck in decks],
+                    dtype=np.int64)
+
+
+class DeckFactory(object):
+    """Shuffles decks many at a time, as rows of card indices, so that
+    simulations do not build and shuffle 40 Card objects per ronda.
+    """
+    def __init__(self, rng=None):
+        """
+        Args:
+            rng -- Seed or numpy.random.Generator used for every shuffle
+        """
+        self.rng = np.random.default_rng(rng)
+
+    def orders(self, count):
+        """Shuffles decks.
+
+        Args:
+            count (int) -- Number of decks
+
+        Returns:
+            uint8 array of shape (count, 40) with the index of every card
+            in each deck, first to be dealt first. It can be passed to
+            BatchRonda as it is.
+        """
+        if not hasattr(self.rng, "permuted"):
+            # before NumPy 1.20, sort random keys instead
+            keys = self.rng.random((count, DECK_SIZE))
+            return np.argsort(keys, axis=1).astype(np.uint8)
+
+        decks = np.broadcast_to(np.arange(DECK_SIZE, dtype=np.uint8),
+                                (count, DECK_SIZE))
+        return self.rng.permuted(decks, axis=1)
+
+    def decks(self, Card, count):
+        """Shuffles decks, wrapped as Deck objects (see Deck.from_indices).
+
+        Args:
+            Card -- A class of card to deal
+            count (int) -- Number of decks
+
+        Returns:
+            List of Deck
+        """
+        return [Deck.from_indices(Card, order)
+                for order in self.orders(count)]
+
+
+class BatchRonda(object):
+    """N rondas with the same number of players, played in lockstep.
+
+    Attributes:
+        hands -- Array (N, players, 3) with the index of each card in every
+                 hand, or -1 for slots that have been played
+        mesa -- Array (N,) with the mask of the cards on each mesa
+        pilas -- Array (N, players) with the mask of each pila
+        escobas -- Array (N, players) with the escobas of each player
+        dealer -- Array (N,) with the seat of each dealer
+        current -- Array (N,) with the seat of the player whose turn it is
+        last_pickup -- Array (N,) with the seat of the last player to
+                       pick up cards
+        turn (int) -- Number of turns played by every ronda
+    """
+    def __init__(self, orders, players, dealers=0):
+        """Deals N rondas, following Ronda.start.
+
+        Args:
+            orders -- Array (N, 40) of card indices, in the order in which
+                      each deck deals them (see deck_orders)
+            players (int) -- Number of players in every ronda
+            dealers -- Seat of the dealer of each ronda, or of all of them
+        """
+        self.orders = np.asarray(orders, dtype=np.int64)
+        size = len(self.orders)
+        self.players = players
+        self._rows = np.arange(size)
+
+        dealt = players * HAND_SIZE
+        self.hands = self.orders[:, :dealt].reshape(size, players,
+                                                    HAND_SIZE).copy()
+        self._cursor = dealt + MESA_SIZE
+
+        self.dealer = np.broadcast_to(np.asarray(dealers, dtype=np.int64),
+                                      (size,)).copy()
+        self.current = (self.dealer + 1) % players
+        self.last_pickup = self.dealer.copy()
+        self.turn = 0
+
+        self.pilas = np.zeros((size, players), dtype=np.uint64)
+        self.escobas = np.zeros((size, players), dtype=np.int64)
+
+        # a mesa dealt adding up to 15 goes straight to the dealer
+        table = self.orders[:, dealt:self._cursor]
+        mesa = np.bitwise_or.reduce(_BITS[table], axis=1)
+        straight = _VALUES[table].sum(axis=1) == TARGET
+        self.pilas[self._rows, self.dealer] = np.where(straight, mesa, 0)
+        self.mesa = np.where(straight, np.uint64(0), mesa)
+
+    def __len__(self):
+        return len(self.orders)
+
+    @property
+    def is_finished(self):
+        """True once every ronda has played its last card."""
+        return self.turn == TURNS
+
+    def current_hands(self):
+        """Returns the hand of the player whose turn it is in each ronda,
+        as an array (N, 3) of card indices (-1 for played slots).
+        """
+        return self.hands[self._rows, self.current]
+
+    def is_legal(self, cards, captures):
+        """Checks moves for the player whose turn it is in each ronda.
+
+        Args:
+            cards -- Array (N,) with the index of the card played
+            captures -- Array (N,) with the mask of the cards picked up
+
+        Returns:
+            Boolean array (N,)
+        """
+        cards = np.asarray(cards, dtype=np.int64)
+        captures = np.asarray(captures, dtype=np.uint64)
+
+        in_hand = (self.current_hands() == cards[:, None]).any(axis=1) \
+            & (cards >= 0)
+        on_mesa = captures & ~self.mesa == 0
+        total = _VALUES[cards] + (
+            _bitwise_count(captures[:, None] & _VALUE_MASKS)
+            * np.arange(1, CARDS_PER_SUIT + 1)).sum(axis=1)
+        return in_hand & on_mesa & ((captures == 0) | (total == TARGET))
+
+    def play(self, cards, captures, check=True):
+        """Plays a turn of every ronda, then deals new hands or sweeps the
+        mesas once the hands are empty, like Ronda.play_turn.
+
+        Args:
+            cards -- Array (N,) with the index of the card played
+            captures -- Array (N,) with the mask of the cards picked up,
+                        or 0 to drop the card on the mesa
+            check (bool) -- Raise IllegalMoveError if any move is not
+                            legal. Moves from random_moves always are.
+        """
+        if self.is_finished:
+            raise BatchFinishedError()
+
+        cards = np.asarray(cards, dtype=np.int64)
+        captures = np.asarray(captures, dtype=np.uint64)
+        if check and not self.is_legal(cards, captures).all():
+            raise IllegalMoveError()
+
+        rows = self._rows
+        seats = self.current
+        slots = (self.hands[rows, seats] == cards[:, None]).argmax(axis=1)
+        self.hands[rows, seats, slots] = -1
+
+        picked = captures != 0
+        played = _BITS[cards]
+        self.mesa = np.where(picked, self.mesa & ~captures,
+                             self.mesa | played)
+        self.pilas[rows, seats] |= np.where(picked, captures | played, 0)
+        self.escobas[rows, seats] += picked & (self.mesa == 0)
+        self.last_pickup = np.where(picked, seats, self.last_pickup)
+
+        self.turn += 1
+        self.current = (seats + 1) % self.players
+
+        if self.turn % (self.players * HAND_SIZE):
+            return
+
+        if self._cursor < DECK_SIZE:
+            dealt = self.players * HAND_SIZE
+            self.hands = self.orders[:, self._cursor:self._cursor + dealt] \
+                .reshape(len(self), self.players, HAND_SIZE).copy()
+            self._cursor += dealt
+        else:
+            self.pilas[rows, self.last_pickup] |= self.mesa
+            self.mesa = np.zeros_like(self.mesa)
+
+    def random_moves(self, rng):
+        """Picks a move for the player whose turn it is in each ronda,
+        like the playouts of quince.ai.rollout: one of their captures,
+        uniformly at random, or a random card to drop if they have none.
+
+        Args:
+            rng -- numpy.random.Generator
+
+        Returns:
+            Tuple of arrays (cards, captures), as taken by play
+        """
+        hands = self.current_hands()
+        targets = np.where(hands >= 0, TARGET - _VALUES[hands], -TARGET)
+
+        packed = _NIBBLES[self.mesa & _BLOCK]
+        for suit in range(1, SUIT_COUNT):
+            packed |= _NIBBLES[self.mesa >> np.uint64(suit * CARDS_PER_SUIT)
+                               & _BLOCK] << np.uint64(suit)
+        low_codes = _HALF_CODES[packed & np.uint64((1 << _HALF_BITS) - 1)]
+        high_codes = _HALF_CODES[packed >> np.uint64(_HALF_BITS)]
+
+        # captures available with each card of the hand, by how much of
+        # the sum the high values make up
+        low_sums = targets[:, :, None] - _HIGH_SUMS
+        rows_of_codes = low_codes * _LOW_WIDTH + _LOW_OFFSET
+        low_ways = _LOW_WAYS[rows_of_codes[:, None, None] + low_sums]
+        high_ways = _HIGH_WAYS[high_codes]
+        per_card = np.einsum("nck,nk->nc", low_ways, high_ways)
+        total = per_card.sum(axis=1)
+        capturing = total > 0
+
+        pick = np.floor(rng.random(len(self)) * total)
+        capture_slots = (per_card.cumsum(axis=1) > pick[:, None]) \
+            .argmax(axis=1)
+
+        held = hands >= 0
+        pick = np.floor(rng.random(len(self)) * held.sum(axis=1))
+        drop_slots = (held.cumsum(axis=1) > pick[:, None]).argmax(axis=1)
+
+        slots = np.where(capturing, capture_slots, drop_slots)
+        cards = np.take_along_axis(hands, slots[:, None], axis=1)[:, 0]
+        captures = np.zeros(len(self), dtype=np.uint64)
+
+        # how much of the sum to make up with the high values
+        found = np.flatnonzero(capturing)
+        splits = (low_ways[found, slots[found]]
+                  * high_ways[found]).cumsum(axis=1)
+        pick = np.floor(rng.random(len(found)) * splits[:, -1])
+        high_sums = _HIGH_SUMS[(splits > pick[:, None]).argmax(axis=1)]
+        low_sums = targets[found, slots[found]] - high_sums
+
+        # then how many cards of each value, and which suits
+        taken = np.hstack([_LOW.sample(low_codes[found], low_sums, rng),
+                           _HIGH.sample(high_codes[found], high_sums, rng)])
+        nibbles = (packed[found, None]
+                   >> np.arange(0, 4 * CARDS_PER_SUIT, 4, dtype=np.uint64)
+                   & np.uint64(15)).astype(np.int64)
+        pick = np.floor(rng.random(taken.shape)
+                        * _CHOOSE[_bitwise_count(nibbles), taken])
+        chosen = _SUBSETS[nibbles, taken, pick.astype(np.int64)]
+        captures[found] = _NIBBLE_BITS[np.arange(CARDS_PER_SUIT),
+                                       chosen].sum(axis=1)
+        return (cards, captures)
+
+    def playout(self, rng, policy=None):
+        """Plays every ronda to the end.
+
+        Args:
+            rng -- numpy.random.Generator
+            policy -- Function taking the batch and rng, and returning
+                      moves like random_moves (which is the default)
+        """
+        while not self.is_finished:
+            if policy is None:
+                self.play(*self.random_moves(rng), check=False)
+            else:
+                self.play(*policy(self, rng))
+
+    def totals(self):
+        """Returns the score-relevant totals of every pila, as a tuple of
+        arrays (N, players): cards, oros, siete de velo, best setenta
+        points (doubled, or 0 without a card of every suit), escobas.
+        """
+        pilas = self.pilas
+        cards = _bitwise_count(pilas).astype(np.int64)
+        oros = _bitwise_count(pilas & _ORO_MASK).astype(np.int64)
+        siete = (pilas & _SIETE_DE_VELO) != 0
+
+        bests = [_SETENTA[(pilas >> np.uint64(suit * CARDS_PER_SUIT))
+                          & _BLOCK] for suit in range(SUIT_COUNT)]
+        setenta = np.where(np.logical_and.reduce([best > 0
+                                                  for best in bests]),
+                           sum(bests), 0)
+        return (cards, oros, siete, setenta, self.escobas)
+
+    def points(self):
+        """Totals the points that each player earns, following
+        Ronda.calculate_scores. Ties for most cards, most oros and best
+        setenta all earn the point.
+
+        Returns:
+            Array (N, players)
+        """
+        (cards, oros, siete, setenta, escobas) = self.totals()
+        most_cards = cards == cards.max(axis=1, keepdims=True)
+        most_oros = oros == oros.max(axis=1, keepdims=True)
+        best_setenta = (setenta == setenta.max(axis=1, keepdims=True)) \
+            & (setenta > 0)
+        return escobas + siete + most_cards + most_oros + best_setenta
@@ -10,6 +10,14 @@ Pila - Represents the collection of cards that a player piles up
 as they collect cards on their turns.
 
 Player - A player of the game.
+
+cardset - Helpers for storing sets of cards as bitmasks, with one bit
+for each of the 40 cards in the deck.
+
+zobrist - Random keys for identifying game states, such as Ronda.key.
+
+symmetry - Permutations of the suits that do not change how a ronda
+plays or scores, for treating equivalent states as one.
 """
 
 __all__ = ["Card", "Deck", "Pila", "Player", "NPC", "Ronda"]
@@ -4,43 +4,91 @@ Each card has a value and a suit.
 """
 from os import path, getcwd
 from PIL import Image
+from quince.components.cardset import card_index
 
 
 SETENTA_SCORING = [11.0, 4.0, 6.0, 8.0, 10.0, 14.0, 17.5, 1, 1, 1]
 
+# Interned cards, keyed by (card class, value, suit)
+_REGISTRY = {}
+
 
 class Card(object):
     """
     The Card object represents a Card.
     Each card has a value and a suit.
+
+    Cards are immutable flyweights: there is exactly one instance of
+    each card (per Card class), so equality is identity and cloning
+    returns the same object.
     """
-    def __init__(self, value, suit):
-        """Instatiates a Card object.
+    __slots__ = ("value", "suit", "index", "mask",
+                 "points_setenta", "_image", "_hash")
+
+    def __new__(cls, value, suit):
+        """Returns the Card object for a value and suit.
 
         Args:
             value (int) -- Number on the card
             suit (str) -- Card suit
         """
+        key = (cls, value, suit)
+        try:
+            return _REGISTRY[key]
+        except KeyError:
+            pass
+
         if value < 1 or value > 10:
             raise ValueError("Cards can only be between 1 and 10")
 
-        self.value = value
-        self.suit = suit
+        card = super(Card, cls).__new__(cls)
+        setattr_ = super(Card, card).__setattr__
+
+        setattr_("value", value)
+        setattr_("suit", suit)
+
+        # Position of the card in a bitmask-backed card set
+        setattr_("index", card_index(value, suit))
+        setattr_("mask", 1 << card.index)
+        setattr_("_hash", hash(card.index))
 
         # Values 8, 9, and 10 use the card images numbered 10, 11, 12
         img_num = value if value < 8 else value + 2
-        self._image = f"quince/assets/cards/card_{suit}_{img_num}.png"
+        setattr_("_image", f"quince/assets/cards/card_{suit}_{img_num}.png")
+
+        setattr_("points_setenta", SETENTA_SCORING[value - 1])
 
-        self.points_setenta = SETENTA_SCORING[value - 1]
+        _REGISTRY[key] = card
+        return card
+
+    @property
+    def image_path(self):
+        """Path to the file with the card's image"""
+        return path.join(getcwd(), self._image)
 
     def image(self):
         """Getter for the card's image"""
-        img_path = path.join(getcwd(), self._image)
-        return Image.open(img_path)
+        return Image.open(self.image_path)
 
     def clone(self):
-        """Clones a Card object"""
-        return Card(self.value, self.suit)
+        """Cards are immutable, so a clone is the card itself"""
+        return self
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Card objects are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Card objects are immutable")
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        # Unpickling goes through __new__, so it returns the interned card
+        return (self.__class__, (self.value, self.suit))
 
     def __str__(self):
         return str((self.value, self.suit))
@@ -49,8 +97,10 @@ class Card(object):
         return str((self.value, self.suit))
 
     def __hash__(self):
-        hashable = f"{self.value}{self.suit}"
-        return hash(hashable)
+        return self._hash
 
     def __eq__(self, other):
-        return self.value == other.value and self.suit == other.suit
+        return self is other
+
+    def __ne__(self, other):
+        return self is not other
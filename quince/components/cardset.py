@@ -0,0 +1,143 @@
+"""
+Bitmask representation for sets of cards.
+
+Each of the 40 cards in the deck is assigned a single bit of an integer,
+so that a hand, the mesa, a pila or the remaining deck can be stored as
+one int. Unions, differences and membership tests then become single
+bitwise operations, and counting cards is a popcount.
+
+Bits are assigned by suit, in blocks of ten:
+oros use bits 0-9, bastos 10-19, espadas 20-29 and copas 30-39.
+Within each block, the card with value v is stored at bit (v - 1).
+"""
+
+SUITS = ["oro", "basto", "espada", "copa"]
+CARDS_PER_SUIT = 10
+DECK_SIZE = 40
+
+EMPTY = 0
+FULL = (1 << DECK_SIZE) - 1
+
+_SUIT_OFFSETS = {suit: i * CARDS_PER_SUIT for i, suit in enumerate(SUITS)}
+_SUIT_BLOCK = (1 << CARDS_PER_SUIT) - 1
+
+SUIT_MASKS = {suit: _SUIT_BLOCK << offset
+              for suit, offset in _SUIT_OFFSETS.items()}
+
+VALUE_MASKS = {value: sum(1 << (offset + value - 1)
+                          for offset in _SUIT_OFFSETS.values())
+               for value in range(1, CARDS_PER_SUIT + 1)}
+
+# Popcounts of every 16 bit integer, so that counting the cards in
+# a 40 bit mask only takes three lookups.
+_POPCOUNT_16 = [bin(i).count("1") for i in range(1 << 16)]
+
+
+def card_index(value, suit):
+    """Returns the bit position assigned to a card.
+
+    Args:
+        value (int) -- Number on the card, between 1 and 10
+        suit (str) -- Card suit
+
+    Returns:
+        int between 0 and 39
+    """
+    try:
+        offset = _SUIT_OFFSETS[suit]
+    except KeyError:
+        raise ValueError(f"Unknown suit: {suit}")
+
+    return offset + value - 1
+
+
+def index_value(index):
+    """Returns the value of the card stored at a bit position."""
+    return index % CARDS_PER_SUIT + 1
+
+
+def index_suit(index):
+    """Returns the suit of the card stored at a bit position."""
+    return SUITS[index // CARDS_PER_SUIT]
+
+
+def mask_of(cards):
+    """Builds a mask from an iterable of Card objects.
+
+    Args:
+        cards -- Iterable of Card
+
+    Returns:
+        int with one bit set for each card
+    """
+    mask = EMPTY
+    for card in cards:
+        mask |= card.mask
+    return mask
+
+
+def count(mask):
+    """Returns the number of cards in a mask."""
+    return (_POPCOUNT_16[mask & 0xFFFF]
+            + _POPCOUNT_16[(mask >> 16) & 0xFFFF]
+            + _POPCOUNT_16[mask >> 32])
+
+
+def indices(mask):
+    """Yields the bit positions set in a mask, in ascending order."""
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
+
+
+def value_sum(mask):
+    """Returns the sum of the values of all cards in a mask."""
+    return sum(index_value(i) for i in indices(mask))
+
+
+def cards_in(mask, Card):
+    """Builds the list of cards contained in a mask.
+
+    Args:
+        mask (int) -- Set of cards
+        Card -- A class of card to build
+
+    Returns:
+        List of Card, sorted by suit and then by value.
+    """
+    return [Card(index_value(i), index_suit(i)) for i in indices(mask)]
+
+
+# A move (a card played from the hand, and the cards it picks up from the
+# mesa) fits in a single int: the index of the played card in the lowest
+# bits, and the mask of the cards picked up above them.
+MOVE_SHIFT = 6
+
+
+def encode_move(card, captured):
+    """Packs a move into an int.
+
+    Args:
+        card -- Card played from the hand
+        captured -- Iterable of Card picked up from the mesa
+
+    Returns:
+        int
+    """
+    return card.index | mask_of(captured) << MOVE_SHIFT
+
+
+def decode_move(move, Card):
+    """Unpacks a move packed by encode_move.
+
+    Args:
+        move (int)
+        Card -- A class of card to build
+
+    Returns:
+        Tuple (Card, tuple of the Cards picked up, sorted by suit and value)
+    """
+    index = move & ((1 << MOVE_SHIFT) - 1)
+    card = Card(index_value(index), index_suit(index))
+    return (card, tuple(cards_in(move >> MOVE_SHIFT, Card)))
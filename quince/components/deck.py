@@ -1,7 +1,8 @@
 """
 Module containing the Deck class, for creating a deck of cards.
 """
-import random as random
+from quince.components.cardset import index_suit, index_value, mask_of
+from quince.utility import get_rng
 
 
 class Deck(object):
@@ -9,32 +10,84 @@ class Deck(object):
     A Deck represents a deck of cards. When the constructor is called,
     it generates a deck in randomized order.
 
-    Subsequent calls to .deal will deal out cards from the end of the deck.
+    The shuffled order is fixed once the deck is built. Dealing only
+    moves a cursor along it, and decks produced by dealing share the
+    same order, so dealing, counting the remaining cards and checking
+    for an empty deck all take constant time.
     """
 
-    def __init__(self, Card, clone=None):
+    def __init__(self, Card, clone=None, rng=None):
         """Builds a deck of 40 cards using the passed type.
 
         Cards are provided numbers from 1 to 11, and standard suits.
         Once the deck is built, it is shuffled so that later operations
-        can easily pop cards off the end in constant time.
+        can deal cards off the front in constant time.
 
         Args:
             Card -- A class of card to deal
             clone (Deck object) - An existing deck to clone.
+            rng - Seed or random.Random used to shuffle the deck
+                  (defaults to the global random module)
         """
         self._card_type = Card
 
         if clone is None:
-            self._build_new_deck()
-            return
+            self._build_new_deck(get_rng(rng))
         else:
-            self._cards = clone.cards()
+            self._order = clone._order
+            self._cursor = clone._cursor
+
+    @classmethod
+    def from_order(cls, Card, cards):
+        """Builds a deck that deals the cards passed, in that order,
+        instead of shuffling a full deck.
+
+        Args:
+            Card -- A class of card to deal
+            cards -- Iterable of Card objects, first to be dealt first
+        """
+        deck = cls.__new__(cls)
+        deck._card_type = Card
+        deck._order = tuple(cards)
+        deck._cursor = 0
+        return deck
+
+    @classmethod
+    def from_indices(cls, Card, indices):
+        """Builds a deck that deals the cards at the indices passed
+        (see cardset.card_index), in that order. Card objects are only
+        looked up as the cards are dealt, so this is a cheap way to wrap
+        a row of a batch of shuffled orders (see batch.DeckFactory).
+
+        Args:
+            Card -- A class of card to deal
+            indices -- Sequence of ints, or a uint8 numpy array
+        """
+        deck = cls.__new__(cls)
+        deck._card_type = Card
+        deck._order = _IndexOrder(Card, indices)
+        deck._cursor = 0
+        return deck
 
     def cards(self):
         """Returns a copy of the list of cards in the deck.
         """
-        return [x.clone() for x in self._cards]
+        return list(self._order[self._cursor:])
+
+    def mask(self):
+        """Returns the set of cards remaining in the deck as a bitmask.
+        """
+        return mask_of(self._order[self._cursor:])
+
+    def remaining(self):
+        """Returns the number of cards left to deal.
+        """
+        return len(self._order) - self._cursor
+
+    def is_empty(self):
+        """True if every card in the deck has been dealt.
+        """
+        return self._cursor >= len(self._order)
 
     def deal(self, amount):
         """Removes cards from the deck and returns a tuple containing a new
@@ -46,27 +99,70 @@ class Deck(object):
         Returns:
             Tuple (Deck, List of Card).
         """
-        hand = [x.clone() for x in self._cards[:amount]]
-        self._cards = self._cards[amount:]
-        newdeck = Deck(self._card_type, clone=self)
+        (newdeck, hand) = self.split(amount)
+        self._cursor = newdeck._cursor
 
         return (newdeck, hand)
 
-    def _build_new_deck(self):
-        self._cards = []
+    def split(self, amount):
+        """Like deal(), but leaves this deck untouched. The new deck
+        shares its order with this one.
+
+        Args:
+            amount (int) -- Amount of cards to deal
+
+        Returns:
+            Tuple (Deck, List of Card).
+        """
+        start = self._cursor
+        end = min(start + amount, len(self._order))
+
+        newdeck = Deck.__new__(Deck)
+        newdeck._card_type = self._card_type
+        newdeck._order = self._order
+        newdeck._cursor = end
+
+        return (newdeck, list(self._order[start:end]))
+
+    def _build_new_deck(self, rng):
+        cards = []
 
         for i in range(0, 10):
             # Sotas, caballos, and reyes are represented
             # using their real value, not their face number
             for suit in ["oro", "basto", "espada", "copa"]:
                 new_card = self._card_type(i + 1, suit)
-                self._cards.append(new_card)
+                cards.append(new_card)
 
-        # shuffle the deck so that cards can be popped off the end
-        random.shuffle(self._cards)
+        # shuffle the deck so that cards can be dealt off the front
+        rng.shuffle(cards)
+        self._order = tuple(cards)
+        self._cursor = 0
 
     def __str__(self):
-        return f"Deck containing {len(self.cards())} Cards."
+        return f"Deck containing {self.remaining()} Cards."
 
     def __repr__(self):
-        return f"Deck containing {len(self.cards())} Cards."
+        return f"Deck containing {self.remaining()} Cards."
+
+
+class _IndexOrder(object):
+    """The order of a deck, kept as card indices. Slicing it builds the
+    Card objects for the slice only.
+    """
+    __slots__ = ("_card_type", "_indices")
+
+    def __init__(self, Card, indices):
+        self._card_type = Card
+        self._indices = bytes(indices)
+
+    def __len__(self):
+        return len(self._indices)
+
+    def __getitem__(self, key):
+        Card = self._card_type
+        if isinstance(key, slice):
+            return tuple(Card(index_value(i), index_suit(i))
+                         for i in self._indices[key])
+        i = self._indices[key]
+        return Card(index_value(i), index_suit(i))
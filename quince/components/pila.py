@@ -1,7 +1,20 @@
 """
 Module containing the Pila object
 """
-from copy import deepcopy
+from collections import namedtuple
+from quince.components.card import Card
+from quince.components.cardset import (SUITS, SUIT_MASKS, CARDS_PER_SUIT,
+                                       EMPTY, card_index, cards_in, count,
+                                       index_suit, index_value, indices,
+                                       mask_of)
+
+
+SIETE_DE_VELO = 1 << card_index(7, "oro")
+
+# The score-relevant aggregates of a pila
+PilaSummary = namedtuple("PilaSummary", ["total_cards", "total_oros",
+                                         "setenta", "siete_de_velo",
+                                         "escobas"])
 
 
 class Pila(object):
@@ -14,21 +27,36 @@ class Pila(object):
     If, in picking up their combination, the player also manages
     to remove the last card from the table, this is called an "escoba,"
     and counts as an additional point.
+
+    Pilas keep running totals of everything that is needed for scoring,
+    updated as cards are added, so no score query has to scan the cards.
     """
-    def __init__(self, cards=None, escobas=0):
+    def __init__(self, cards=None, escobas=0, mask=0):
         """Creates a data structure for tallying up
         the cards that a player has collected.
 
-        Cards are organized by suit in order to make it easier
+        Cards are stored as a bitmask (see quince.components.cardset),
+        and organized by suit on request in order to make it easier
         to tally up scores.
 
         Args:
             cards -- Dictionary of cards with which to instantiate the pile
+            escobas (int) -- Number of escobas already scored
+            mask (int) -- Set of cards with which to instantiate the pile
         """
-        if cards is None:
-            self._cards = {"oro": [], "basto": [], "espada": [], "copa": []}
-        else:
-            self._cards = deepcopy(cards)
+        if cards is not None:
+            for suit_cards in cards.values():
+                mask |= mask_of(suit_cards)
+
+        self._mask = EMPTY
+        self._total = 0
+        self._oros = 0
+        self._siete = False
+
+        # best setenta card of each suit, in the order of SUITS
+        self._best = (None,) * len(SUITS)
+
+        self._tally(mask)
 
         # number of escobas scored
         self._escobas = escobas
@@ -41,18 +69,46 @@ class Pila(object):
             cards -- List of cards
             escoba (bool) -- True if the pickup was an escoba
         """
-        existing_cards = self.get_cards()
-
-        for card in cards:
-            suit = card.suit
-            existing_cards[suit].append(card)
-
-        escobas_count = self._escobas
-
+        pila = Pila.__new__(Pila)
+        pila._mask = self._mask
+        pila._total = self._total
+        pila._oros = self._oros
+        pila._siete = self._siete
+        pila._best = self._best
+        pila._tally(mask_of(cards))
+
+        pila._escobas = self._escobas
         if escoba:
-            escobas_count += 1
+            pila._escobas += 1
 
-        return Pila(cards=existing_cards, escobas=escobas_count)
+        return pila
+
+    def _tally(self, mask):
+        """Adds the cards in mask to the pila, updating the running totals.
+        """
+        new = mask & ~self._mask
+        if not new:
+            return
+
+        self._mask |= new
+        best = list(self._best)
+
+        for i in indices(new):
+            self._total += 1
+            suit = i // CARDS_PER_SUIT
+            card = Card(index_value(i), index_suit(i))
+
+            current = best[suit]
+            # ties go to the lowest card, as if the suit had been scanned
+            if current is None \
+                    or card.points_setenta > current.points_setenta \
+                    or (card.points_setenta == current.points_setenta
+                        and card.index < current.index):
+                best[suit] = card
+
+        self._oros += count(new & SUIT_MASKS["oro"])
+        self._siete = self._siete or bool(new & SIETE_DE_VELO)
+        self._best = tuple(best)
 
     def get_cards(self):
         """Returns a copy of the cards currently in the pila
@@ -60,7 +116,14 @@ class Pila(object):
         Returns:
             Dictionary of cards sorted by suit
         """
-        return deepcopy(self._cards)
+        return {suit: cards_in(self._mask & SUIT_MASKS[suit], Card)
+                for suit in SUITS}
+
+    @property
+    def mask(self):
+        """Returns the set of cards in the pila as a bitmask
+        """
+        return self._mask
 
     @property
     def escobas(self):
@@ -80,36 +143,47 @@ class Pila(object):
             A list containing copies of the card objects used to make up
             the player's best possible setenta.
         """
-        cards = self.get_cards()
-
         # Setenta requires at least 1 card from each suit
-        has_empty_suit = [] in cards.values()
-        if has_empty_suit:
+        if None in self._best:
             return []
 
-        best_cards = [max(suit, key=lambda x: x.points_setenta)
-                      for suit in cards.values()]
-        return best_cards
+        return list(self._best)
+
+    def setenta_points(self):
+        """Returns the points of the best setenta in the pila,
+        or 0 if the pila is missing a suit.
+        """
+        if None in self._best:
+            return 0
+
+        return sum(card.points_setenta for card in self._best)
+
+    def setenta_mask(self):
+        """Returns the best setenta card of each suit in the pila
+        (for the suits it has cards of) as a bitmask.
+        """
+        return mask_of(card for card in self._best if card is not None)
 
     def has_siete_de_velo(self):
         """Returns True if the pila contains the 7 of oro
         """
-        for card in self._cards["oro"]:
-            if card.value == 7:
-                return True
-
-        return False
+        return self._siete
 
     def total_cards(self):
         """Returns the total number of cards the user has picked up.
         """
-        amount = 0
-        for palo in self._cards:
-            amount = amount + len(self._cards[palo])
-
-        return amount
+        return self._total
 
     def total_oros(self):
         """Returns the total number of oros that the user has picked up.
         """
-        return len(self._cards["oro"])
+        return self._oros
+
+    def summary(self):
+        """Returns the score-relevant totals of the pila.
+
+        Returns:
+            PilaSummary tuple
+        """
+        return PilaSummary(self._total, self._oros, self.setenta_points(),
+                           self._siete, self._escobas)
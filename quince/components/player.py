@@ -1,9 +1,9 @@
 """Module containing the Player class
 """
-import random as random
 from os import getcwd, path
 from PIL import Image
-from quince.cpu import enumerate_possibilities
+from quince.cpu import random_possibility
+from quince.utility import get_rng
 
 
 STOCK_IMAGE_PATH = path.join(getcwd(), "quince/assets/avatars/avatar01.png")
@@ -97,12 +97,27 @@ class Player(object):
 class NPC(Player):
     """A computer player"""
 
-    def get_move(self, hand, mesa):
+    def __init__(self, name, image_path=STOCK_IMAGE_PATH, rng=None):
+        """Instantiates a computer player.
+
+        Args:
+            name (str) -- Player's name
+            image_path (string) -- Path to the image for the player's avatar
+            rng -- Seed or random.Random used to choose moves
+                   (defaults to the global random module). Can be replaced
+                   later by assigning to the rng attribute.
+        """
+        super(NPC, self).__init__(name, image_path)
+        self.rng = get_rng(rng)
+
+    def get_move(self, hand, mesa, ronda=None):
         """Select a move for the NPC to make.
 
         Args:
             hand -- List of card objects
             mesa -- List of card objects
+            ronda -- The Ronda being played. Not needed to play randomly,
+                     but available to strategies that look further ahead.
 
         Returns:
             Tuple containing a card info tuple in the 0th position
@@ -110,22 +125,11 @@ class NPC(Player):
             and a list of card info tuples in the 1st position
             (representing the cards to be picked up from the mesa).
         """
-        possibilities = enumerate_possibilities(mesa, hand)
+        move = random_possibility(mesa, hand, self.rng)
 
         # If there's no way to add to 15, select a random card
         # from the hand and drop it
-        if not possibilities:
-            return (random.choice(hand), [])
-
-        move = random.choice(possibilities)
-
-        from_hand = None
-        from_mesa = []
-
-        for card in move:
-            if card in hand:
-                from_hand = card
-            else:
-                from_mesa.append(card)
+        if move is None:
+            return (self.rng.choice(hand), [])
 
-        return (from_hand, from_mesa)
+        return (move[0], list(move[1:]))
@@ -30,11 +30,17 @@ on the mesa will be awarded to the player who last picked up cards.
 A complete game will have as many rondas as necessary
 until one player reaches a total of 30 points.
 """
-from copy import deepcopy
-from quince.components import Pila, Deck, Card
+from quince.components import Pila, Deck, Card, zobrist
+from quince.components.cardset import EMPTY, cards_in, mask_of
 from quince.components.points_counters import PointsCounter, SetentaCounter
 
 
+# The types of scores awarded at the end of a ronda,
+# as named in the dictionary returned by Ronda.calculate_scores
+SCORE_CATEGORIES = ["most_cards", "most_oros", "7_de_velo",
+                    "setenta", "escobas"]
+
+
 def deal_to_players(players, deck):
     """Perform an initial deal to a list of players.
 
@@ -47,9 +53,9 @@ def deal_to_players(players, deck):
     """
     player_cards = {}
     for player in players:
-        (deck, hand) = deck.deal(3)
+        (deck, hand) = deck.split(3)
         player_cards[player] = {
-            "hand": hand,
+            "hand": tuple(hand),
             "pila": Pila()
         }
 
@@ -80,11 +86,15 @@ def remove_card_from_hand(player, card, player_cards):
 
     Returns:
         Copy of the player_cards dictionary with the card of choice removed
-        from that player's hand.
+        from that player's hand. Entries for the other players are shared
+        with the original dictionary.
     """
-    new_dict = deepcopy(player_cards)
-    new_dict[player]["hand"] = remove_cards_from_list([card],
-                                                      new_dict[player]["hand"])
+    cards = player_cards[player]
+    new_dict = dict(player_cards)
+    new_dict[player] = {
+        "hand": tuple(remove_cards_from_list([card], cards["hand"])),
+        "pila": cards["pila"]
+    }
     return new_dict
 
 
@@ -98,7 +108,8 @@ def remove_cards_from_list(cards_to_remove, card_list):
     Returns:
         List of Card objects
     """
-    return [crd for crd in card_list if crd not in cards_to_remove]
+    removed = mask_of(cards_to_remove)
+    return [crd for crd in card_list if not crd.mask & removed]
 
 
 def add_cards_to_pila(player, player_cards, cards, is_escoba):
@@ -111,15 +122,63 @@ def add_cards_to_pila(player, player_cards, cards, is_escoba):
         cards - List of Card
 
     Returns:
-        Copy of the player_cards dictionary.
+        Copy of the player_cards dictionary. Entries for the other players
+        are shared with the original dictionary.
     """
-    new_dict = deepcopy(player_cards)
-    new_dict[player]["pila"] = new_dict[player]["pila"].add(cards, is_escoba)
+    entry = player_cards[player]
+    new_dict = dict(player_cards)
+    new_dict[player] = {
+        "hand": entry["hand"],
+        "pila": entry["pila"].add(cards, is_escoba)
+    }
     return new_dict
 
 
+def tally_points(scores):
+    """Converts the results of Ronda.calculate_scores into points.
+
+    Args:
+        scores -- Dictionary returned by Ronda.calculate_scores
+
+    Returns:
+        Dictionary with a key for each of the 5 types of scores.
+        Each one holds a dictionary of the points earned by each player
+        (players who earned nothing are left out).
+    """
+    points = {category: {} for category in SCORE_CATEGORIES}
+
+    (most_cards, _) = scores.get("most_cards", ([], None))
+    for player in most_cards:
+        points["most_cards"][player] = 1
+
+    (most_oros, _) = scores.get("most_oros", ([], None))
+    for player in most_oros:
+        points["most_oros"][player] = 1
+
+    siete = scores.get("7_de_velo", None)
+    if siete is not None:
+        points["7_de_velo"][siete] = 1
+
+    for winner in scores.get("setenta", []):
+        points["setenta"][winner.player] = 1
+
+    for (player, count) in scores.get("escobas", []):
+        points["escobas"][player] = count
+
+    return points
+
+
 class Ronda(object):
-    """Represents one play through a single deck of cards."""
+    """Represents one play through a single deck of cards.
+
+    Unless a ronda is mutable, play_turn leaves it untouched and returns
+    a new snapshot. Snapshots share everything that a turn does not change
+    (the deck, the mesa and pila values, and the entries of players whose
+    cards did not move), so they should be treated as read-only.
+
+    Every ronda keeps a Zobrist key of its state (see the key property),
+    which turns update with a handful of XORs instead of rebuilding it.
+    """
 
     # pylint: disable=too-many-instance-attributes
     # 8 is acceptable in this case
@@ -134,25 +193,40 @@ class Ronda(object):
             dealer - Reference to a player
             deck - Deck to be used (can be full or partially empty)
             last_pickup - Reference to the last player to pick up cards
-            mesa - List of cards currently on the table
+            mesa - List of cards currently on the table, or a bitmask
             players - Ordered list of Player (used to track whose turn is next)
             player_cards - Dictionary of Cards belonging to each player
+            mutable - If True, play_turn modifies this ronda in place
+                      and records how to undo each turn (see undo()).
+            key - Zobrist key of the state given by the other arguments,
+                  if already known. Built from scratch otherwise.
         """
         self.current_player = kwargs.get("current_player", None)
         self._dealer = kwargs.get("dealer", None)
         self.deck = kwargs.get("deck", None)
         self._last_picked_up = kwargs.get("last_pickup", None)
-        self._mesa = kwargs.get("mesa", None)
+        self._mesa = kwargs.get("mesa", EMPTY)
+        if not isinstance(self._mesa, int):
+            self._mesa = mask_of(self._mesa)
         self._players = kwargs.get("players", [])
         self._player_cards = kwargs.get("player_cards", None)
+        self._mutable = kwargs.get("mutable", False)
+        self._undo_log = []
+
+        self._key = kwargs.get("key", None)
+        if self._key is None:
+            self._key = self._build_key()
 
         # If the entire ronda is done
         if self.is_finished:
-            self._player_cards = add_cards_to_pila(self._last_picked_up,
+            last = self._last_picked_up
+            pila = self._player_cards[last]["pila"]
+            self._player_cards = add_cards_to_pila(last,
                                                    self._player_cards,
-                                                   self._mesa,
+                                                   self.current_mesa,
                                                    False)
-            self.mesa = []
+            self._key ^= self._sweep_key(last, pila)
+            self._mesa = EMPTY
 
         # If the hand is done but there are still cards to be dealt
         elif self._hand_is_done:
@@ -160,26 +234,33 @@ class Ronda(object):
             for player in self._player_cards.keys():
                 player_cards[player]["pila"] = \
                     self._player_cards[player]["pila"]
+            self._key ^= self._deal_key(player_cards, self.deck, deck)
             self._player_cards = player_cards
             self.deck = deck
 
     @classmethod
-    def start(cls, players, dealer):
+    def start(cls, players, dealer, mutable=False, rng=None, deck=None):
         """Performs all the initial setup for starting to play a ronda.
 
         Args:
             players (list of Player) -- The players in the game
             dealer (Player) -- The player who will deal the cards
+            mutable (bool) -- Play turns in place (see Ronda.undo())
+            rng -- Seed or random.Random used to shuffle the deck
+            deck (Deck) -- Full deck to deal, instead of shuffling one
 
         Returns:
             A new Ronda object.
         """
+        if deck is None:
+            deck = Deck(Card, rng=rng)
+
         # Deal to players
-        (player_cards, deck) = deal_to_players(players, Deck(Card))
+        (player_cards, deck) = deal_to_players(players, deck)
 
         # Then to the table,
         # and check whether or not a straight escoba was dealt
-        (deck, table_deal) = deck.deal(4)
+        (deck, table_deal) = deck.split(4)
 
         if sum([card.value for card in table_deal]) == 15:
             # transfer the cards directly to the dealer's pila
@@ -196,7 +277,8 @@ class Ronda(object):
             "last_pickup": dealer,
             "mesa": mesa,
             "players": players,
-            "player_cards": player_cards
+            "player_cards": player_cards,
+            "mutable": mutable
         }
 
         return cls(**attributes)
@@ -208,7 +290,27 @@ class Ronda(object):
         Returns:
             List of Card objects.
         """
-        return [card.clone() for card in self._mesa]
+        return cards_in(self._mesa, Card)
+
+    @property
+    def mesa_mask(self):
+        """Public getter for the current cards on the table as a bitmask.
+
+        Returns:
+            int
+        """
+        return self._mesa
+
+    def hand_mask(self, player):
+        """Returns the cards in a player's hand as a bitmask.
+
+        Args:
+            player -- Reference to a Player object
+
+        Returns:
+            int
+        """
+        return mask_of(self._player_cards[player]["hand"])
 
     @property
     def player_cards(self):
@@ -220,6 +322,15 @@ class Ronda(object):
         """
         return self._player_cards
 
+    @property
+    def players(self):
+        """Public getter for the players, in the order in which they play.
+
+        Returns:
+            List of Player objects.
+        """
+        return self._players
+
     @property
     def dealer(self):
         """Public getter for the player who is dealing during the ronda.
@@ -239,18 +350,56 @@ class Ronda(object):
         """
         return self._last_picked_up
 
+    @property
+    def key(self):
+        """Zobrist key of the state of the ronda: the cards in every hand,
+        on the mesa and in every pila, the escobas scored, whose turn it is,
+        who last picked up cards and how many cards are left in the deck.
+        Players are identified by their seat, so rondas that reach the same
+        state have the same key, whichever way they got there.
+
+        Returns:
+            int (64 bits)
+        """
+        return self._key
+
+    @property
+    def is_mutable(self):
+        """True if play_turn modifies the ronda in place."""
+        return self._mutable
+
+    def mutable_copy(self):
+        """Returns a mutable ronda with the same state as this one,
+        which can be played and undone without affecting this ronda.
+        """
+        player_cards = {player: dict(cards)
+                        for (player, cards) in self._player_cards.items()}
+
+        copy = Ronda.__new__(Ronda)
+        copy.current_player = self.current_player
+        copy._dealer = self._dealer
+        copy.deck = self.deck
+        copy._last_picked_up = self._last_picked_up
+        copy._mesa = self._mesa
+        copy._players = self._players
+        copy._player_cards = player_cards
+        copy._mutable = True
+        copy._undo_log = []
+        copy._key = self._key
+        return copy
+
     @property
     def is_finished(self):
         """True if deck is empty and all players have played their last cards.
         """
-        return self._hand_is_done and not self.deck.cards()
+        return self._hand_is_done and self.deck.is_empty()
 
     def play_turn(self, own_card, mesa_cards=None):
         """Cause the current player to perform an action, and then pass
         the turn to the next player.
 
-        If a player picks up cards, the _last_picked_up attribute
-        is modified to point to the current player.
+        If a player picks up cards, the last_picked_up attribute
+        of the new ronda points to the current player.
 
         Once the player has completed their action, the ronda checks its own
         state and decides whether it should move to the next player,
@@ -261,43 +410,182 @@ class Ronda(object):
             mesa_cards (List of cards) -- The cards to pick up
 
         Returns:
-            New Ronda object with updated attributes
+            New Ronda object with updated attributes,
+            or this same Ronda if it is mutable.
         """
         if self.is_finished:
             raise RondaFinishedError()
 
+        if self._mutable:
+            self._play_turn_in_place(own_card, mesa_cards)
+            return self
+
+        last_pickup = self._last_picked_up
+        pila = self._player_cards[self.current_player]["pila"]
+
         if not mesa_cards:
             new_player_cards = remove_card_from_hand(self.current_player,
                                                      own_card,
                                                      self._player_cards)
-            new_mesa = self.current_mesa
-            new_mesa.append(own_card)
+            new_mesa = self._mesa | own_card.mask
         else:
             new_player_cards = remove_card_from_hand(self.current_player,
                                                      own_card,
                                                      self._player_cards)
-            new_mesa = remove_cards_from_list(mesa_cards,
-                                              self.current_mesa)
-            is_escoba = True if not new_mesa else False
+            new_mesa = self._mesa & ~mask_of(mesa_cards)
+            is_escoba = new_mesa == EMPTY
             new_player_cards = add_cards_to_pila(self.current_player,
                                                  new_player_cards,
-                                                 mesa_cards + [own_card],
+                                                 list(mesa_cards) + [own_card],
                                                  is_escoba)
-            self._last_picked_up = self.current_player
+            last_pickup = self.current_player
+
+        seat = self._players.index(self.current_player)
+        key = self._turn_key(seat, own_card, new_mesa, pila,
+                             new_player_cards[self.current_player]["pila"])
 
         attributes = {
-            "current_player": get_next_player(self._players,
-                                              self.current_player),
+            "current_player": self._players[(seat + 1) % len(self._players)],
             "dealer": self.dealer,
             "deck": self.deck,
-            "last_pickup": self._last_picked_up,
+            "last_pickup": last_pickup,
             "mesa": new_mesa,
             "players": self._players,
-            "player_cards": new_player_cards
+            "player_cards": new_player_cards,
+            "key": key
         }
 
         return Ronda(**attributes)
 
+    def _play_turn_in_place(self, own_card, mesa_cards):
+        """Applies a turn to this ronda, pushing onto the undo log
+        everything needed to revert it.
+        """
+        player = self.current_player
+        cards = self._player_cards[player]
+
+        # (player, last pickup, mesa, deck, key,
+        #  [(player, hand, pila) for every player whose cards change])
+        changed = [(player, cards["hand"], cards["pila"])]
+        record = (player, self._last_picked_up, self._mesa,
+                  self.deck, self._key, changed)
+        self._undo_log.append(record)
+
+        cards["hand"] = tuple(remove_cards_from_list([own_card],
+                                                     cards["hand"]))
+        (pila, last_pickup) = (cards["pila"], self._last_picked_up)
+
+        if not mesa_cards:
+            mesa = self._mesa | own_card.mask
+        else:
+            mesa = self._mesa & ~mask_of(mesa_cards)
+            is_escoba = mesa == EMPTY
+            cards["pila"] = pila.add(list(mesa_cards) + [own_card], is_escoba)
+            last_pickup = player
+
+        seat = self._players.index(player)
+        self._key = self._turn_key(seat, own_card, mesa, pila, cards["pila"])
+        self._mesa = mesa
+        self._last_picked_up = last_pickup
+        self.current_player = self._players[(seat + 1) % len(self._players)]
+
+        if self.is_finished:
+            last = self._last_picked_up
+            last_cards = self._player_cards[last]
+            if last is not player:
+                changed.append((last, last_cards["hand"], last_cards["pila"]))
+            pila = last_cards["pila"]
+            last_cards["pila"] = pila.add(self.current_mesa)
+            self._key ^= self._sweep_key(last, pila)
+            self._mesa = EMPTY
+
+        elif self._hand_is_done:
+            deck = self.deck
+            for other in self._players:
+                other_cards = self._player_cards[other]
+                if other is not player:
+                    changed.append((other,
+                                    other_cards["hand"],
+                                    other_cards["pila"]))
+                (self.deck, hand) = self.deck.split(3)
+                other_cards["hand"] = tuple(hand)
+            self._key ^= self._deal_key(self._player_cards, deck, self.deck)
+
+    def undo(self):
+        """Reverts the last turn played on a mutable ronda,
+        including any cards dealt or swept up at the end of it.
+        """
+        if not self._undo_log:
+            raise NothingToUndoError()
+
+        (player, last_pickup, mesa, deck, key,
+         changed) = self._undo_log.pop()
+
+        for (owner, hand, pila) in changed:
+            self._player_cards[owner]["hand"] = hand
+            self._player_cards[owner]["pila"] = pila
+
+        self.deck = deck
+        self._key = key
+        self._mesa = mesa
+        self._last_picked_up = last_pickup
+        self.current_player = player
+
+    def _build_key(self):
+        """Computes the Zobrist key of the ronda from scratch."""
+        seats = self._players
+        return zobrist.position_key(
+            [mask_of(self._player_cards[player]["hand"]) for player in seats],
+            self._mesa,
+            [self._player_cards[player]["pila"] for player in seats],
+            seats.index(self.current_player),
+            seats.index(self._last_picked_up),
+            self.deck.remaining())
+
+    def _turn_key(self, seat, own_card, mesa, pila, new_pila):
+        """Zobrist key of the ronda after the current player plays a card,
+        before any cards are dealt or swept up at the end of the turn.
+
+        Args:
+            seat (int) -- Seat of the current player
+            own_card -- Card played
+            mesa (int) -- Mask of the cards on the mesa after the turn
+            pila -- The player's Pila before the turn
+            new_pila -- The player's Pila after the turn, which is the
+                        same object unless cards were picked up
+        """
+        following = (seat + 1) % len(self._players)
+        key = self._key ^ zobrist.HAND[seat][own_card.index] \
+            ^ zobrist.TURN[seat] ^ zobrist.TURN[following]
+
+        if new_pila is pila:
+            return key ^ zobrist.MESA[own_card.index]
+
+        previous = self._players.index(self._last_picked_up)
+        return key ^ zobrist.mask_key(zobrist.MESA, self._mesa ^ mesa) \
+            ^ zobrist.pila_change(seat, pila, new_pila) \
+            ^ zobrist.LAST_PICKUP[previous] ^ zobrist.LAST_PICKUP[seat]
+
+    def _sweep_key(self, last, pila):
+        """Change to the Zobrist key when the cards left on the mesa go to
+        the pila of the last player to pick up, whose Pila was pila.
+        """
+        seat = self._players.index(last)
+        return zobrist.mask_key(zobrist.MESA, self._mesa) \
+            ^ zobrist.pila_change(seat, pila,
+                                  self._player_cards[last]["pila"])
+
+    def _deal_key(self, player_cards, deck, new_deck):
+        """Change to the Zobrist key when the hands in player_cards are
+        dealt from deck to players with empty hands, leaving new_deck.
+        """
+        key = zobrist.DECK[deck.remaining()] \
+            ^ zobrist.DECK[new_deck.remaining()]
+        for (seat, player) in enumerate(self._players):
+            key ^= zobrist.mask_key(zobrist.HAND[seat],
+                                    mask_of(player_cards[player]["hand"]))
+        return key
+
     @property
     def _hand_is_done(self):
         """Returns True if all players currently have empty hands."""
@@ -358,6 +646,29 @@ class Ronda(object):
 
         return ronda_points
 
+    def points(self):
+        """Totals the points that each player earns in this ronda.
+
+        Returns:
+            Dictionary with players as keys and points as values.
+        """
+        totals = {player: 0 for player in self._player_cards}
+        for earned in tally_points(self.calculate_scores()).values():
+            for (player, points) in earned.items():
+                totals[player] += points
+        return totals
+
+    def standings(self):
+        """Returns the score-relevant totals of every player's pila.
+        Pilas keep these up to date as cards are added, so this is cheap
+        to call at any point during the ronda.
+
+        Returns:
+            Dictionary with players as keys and PilaSummary values.
+        """
+        return {player: cards["pila"].summary()
+                for (player, cards) in self._player_cards.items()}
+
 
 class RondaFinishedError(Exception):
     """Error raised when trying to perform an action that can only
@@ -377,3 +688,13 @@ class RondaNotFinishedError(Exception):
         if msg is None:
             msg = "The current ronda is not yet finished."
         super(RondaNotFinishedError, self).__init__(msg)
+
+
+class NothingToUndoError(Exception):
+    """Error raised when calling undo() on a ronda that has no
+    turns recorded in its undo log.
+    """
+    def __init__(self, msg=None):
+        if msg is None:
+            msg = "There are no turns to undo."
+        super(NothingToUndoError, self).__init__(msg)
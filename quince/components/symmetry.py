@@ -0,0 +1,123 @@
+"""
+Symmetries between suits.
+
+Only oros are special when scoring a ronda (most oros, 7 de velo).
+Bastos, espadas and copas just count towards most cards and contribute
+their best card to the setenta, so swapping those three suits around
+turns any state into one that plays and scores exactly the same.
+Up to 6 states (one for each order of the three suits) can therefore be
+treated as one, by putting their suits in a canonical order first.
+
+A permutation is a tuple with the position each suit is moved to,
+by position in cardset.SUITS. Oros always stay at position 0.
+"""
+from itertools import permutations as _orders
+from quince.components import zobrist
+from quince.components.cardset import (CARDS_PER_SUIT, MOVE_SHIFT,
+                                       SUIT_MASKS, SUITS, mask_of)
+
+_BLOCK = (1 << CARDS_PER_SUIT) - 1
+_ORO_MASK = SUIT_MASKS["oro"]
+_PLAIN_SUITS = range(1, len(SUITS))
+
+PERMUTATIONS = tuple((0,) + order for order in _orders(_PLAIN_SUITS))
+IDENTITY = PERMUTATIONS[0]
+
+
+def inverse(permutation):
+    """Returns the permutation that undoes another one."""
+    undone = [0] * len(permutation)
+    for (suit, position) in enumerate(permutation):
+        undone[position] = suit
+    return tuple(undone)
+
+
+def permute_mask(mask, permutation):
+    """Moves the cards of each suit in a mask to the suit's new position.
+
+    Args:
+        mask (int) -- Set of cards
+        permutation -- One of PERMUTATIONS
+
+    Returns:
+        int
+    """
+    permuted = mask & _ORO_MASK
+    for suit in _PLAIN_SUITS:
+        block = mask >> suit * CARDS_PER_SUIT & _BLOCK
+        permuted |= block << permutation[suit] * CARDS_PER_SUIT
+    return permuted
+
+
+def permute_index(index, permutation):
+    """Returns the bit position a card is moved to by a permutation."""
+    (suit, value) = divmod(index, CARDS_PER_SUIT)
+    return permutation[suit] * CARDS_PER_SUIT + value
+
+
+def permute_move(move, permutation):
+    """Applies a permutation to a move packed by cardset.encode_move."""
+    index = move & (1 << MOVE_SHIFT) - 1
+    picked = move >> MOVE_SHIFT
+    return permute_index(index, permutation) \
+        | permute_mask(picked, permutation) << MOVE_SHIFT
+
+
+def canonical(masks):
+    """Finds the permutation that puts a state in canonical order.
+
+    The plain suits are sorted by the cards they hold in each of the
+    masks, in turn, so every state that differs from another only by
+    the order of its plain suits ends up in the same order. Suits that
+    tie hold the same cards everywhere, and can go in either order.
+
+    Args:
+        masks -- Sequence of masks describing the state, always given
+                 in the same order (say, the mesa and then every hand)
+
+    Returns:
+        One of PERMUTATIONS
+    """
+    signatures = sorted(
+        (tuple(mask >> suit * CARDS_PER_SUIT & _BLOCK for mask in masks),
+         suit)
+        for suit in _PLAIN_SUITS)
+
+    permutation = [0] * len(SUITS)
+    for (position, (_, suit)) in enumerate(signatures, 1):
+        permutation[suit] = position
+    return tuple(permutation)
+
+
+def canonical_key(ronda):
+    """Finds the Zobrist key of a ronda with its suits in canonical order.
+    Rondas that only differ by the order of their plain suits have the
+    same canonical key.
+
+    Args:
+        ronda -- Ronda object
+
+    Returns:
+        Tuple (key, permutation that puts the ronda in canonical order)
+    """
+    players = ronda.players
+    cards = ronda.player_cards
+    hands = [mask_of(cards[player]["hand"]) for player in players]
+    pilas = [cards[player]["pila"].mask for player in players]
+    mesa = ronda.mesa_mask
+
+    permutation = canonical([mesa] + hands + pilas)
+    if permutation == IDENTITY:
+        return (ronda.key, permutation)
+
+    # only the cards move, so the rest of the key stays as it is
+    key = ronda.key ^ zobrist.mask_key(
+        zobrist.MESA, mesa ^ permute_mask(mesa, permutation))
+    for seat in range(len(players)):
+        key ^= zobrist.mask_key(
+            zobrist.HAND[seat],
+            hands[seat] ^ permute_mask(hands[seat], permutation))
+        key ^= zobrist.mask_key(
+            zobrist.PILA[seat],
+            pilas[seat] ^ permute_mask(pilas[seat], permutation))
+    return (key, permutation)
@@ -0,0 +1,95 @@
+"""
+Zobrist keys for identifying game states.
+
+Every feature of a state (a card being in a certain place, whose turn it
+is, ...) is assigned a random 64 bit number, and a state's key is the XOR
+of the numbers of all its features. Moving a card from one place to
+another only takes two XORs to reflect in the key, so keys can be kept up
+to date as turns are played instead of being recomputed.
+
+The numbers come from a fixed seed, so keys are the same in every process
+and can be stored and compared across runs.
+"""
+import random as random
+from quince.components.cardset import DECK_SIZE, indices
+
+MAX_PLAYERS = 4
+
+# Enough escobas for a single player to sweep the mesa with every card
+MAX_ESCOBAS = DECK_SIZE
+
+_rng = random.Random(0x5EED15)
+
+
+def _numbers(amount):
+    return tuple(_rng.getrandbits(64) for _ in range(amount))
+
+
+# Keys for cards on the mesa, in a player's hand and in a player's pila
+MESA = _numbers(DECK_SIZE)
+HAND = tuple(_numbers(DECK_SIZE) for _ in range(MAX_PLAYERS))
+PILA = tuple(_numbers(DECK_SIZE) for _ in range(MAX_PLAYERS))
+
+# Keys for the number of escobas scored by each player
+ESCOBAS = tuple(_numbers(MAX_ESCOBAS + 1) for _ in range(MAX_PLAYERS))
+
+# Keys for the player whose turn it is, and the last one to pick up cards
+TURN = _numbers(MAX_PLAYERS)
+LAST_PICKUP = _numbers(MAX_PLAYERS)
+
+# Keys for the number of cards left in the deck
+DECK = _numbers(DECK_SIZE + 1)
+
+
+def mask_key(table, mask):
+    """XORs together the keys of every card in a mask.
+
+    Args:
+        table -- One of MESA, or an entry of HAND or PILA
+        mask (int) -- Set of cards
+
+    Returns:
+        int
+    """
+    key = 0
+    for i in indices(mask):
+        key ^= table[i]
+    return key
+
+
+def pila_change(seat, before, after):
+    """Change to a key when cards (and possibly an escoba)
+    are added to a seat's pila.
+
+    Args:
+        seat (int) -- Seat of the pila's owner
+        before -- The Pila before the cards were added
+        after -- The Pila after the cards were added
+
+    Returns:
+        int
+    """
+    return mask_key(PILA[seat], before.mask ^ after.mask) \
+        ^ ESCOBAS[seat][before.escobas] ^ ESCOBAS[seat][after.escobas]
+
+
+def position_key(hands, mesa, pilas, current, last_pickup, deck_size):
+    """Builds the key of a game state from scratch.
+
+    Args:
+        hands -- List with the mask of each seat's hand
+        mesa (int) -- Mask of the cards on the mesa
+        pilas -- List with the Pila of each seat
+        current (int) -- Seat whose turn it is
+        last_pickup (int) -- Seat that last picked up cards
+        deck_size (int) -- Number of cards left in the deck
+
+    Returns:
+        int
+    """
+    key = mask_key(MESA, mesa) ^ TURN[current] \
+        ^ LAST_PICKUP[last_pickup] ^ DECK[deck_size]
+    for (seat, (hand, pila)) in enumerate(zip(hands, pilas)):
+        key ^= mask_key(HAND[seat], hand) \
+            ^ mask_key(PILA[seat], pila.mask) ^ ESCOBAS[seat][pila.escobas]
+    return key
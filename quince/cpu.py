@@ -1,20 +1,73 @@
 """
 Module containing CPU Player logic
 """
+import random as random
+from collections import namedtuple
+from itertools import chain, combinations, product
 
 
-def enumerate_possibilities(mesa, hand):
+TARGET = 15
+
+# A group of moves that are interchangeable for scoring, given by one
+# of them and the number of moves in the group
+MoveClass = namedtuple("MoveClass", ["representative", "multiplicity"])
+
+
+def value_multisets(target, largest=10):
+    """Lists every multiset of card values that adds up to target.
+
+    Args:
+        target (int) -- The sum to reach
+        largest (int) -- The highest card value that may be used
+
+    Returns:
+        List of tuples of (value, multiplicity) pairs,
+        with values in descending order.
+        Example: for a target of 4, [((4, 1),), ((3, 1), (1, 1)),
+        ((2, 1), (1, 2)), ((2, 2),), ((1, 4),)]
+    """
+    if target == 0:
+        return [()]
+
+    multisets = []
+    for value in range(min(target, largest), 0, -1):
+        for times in range(1, target // value + 1):
+            for rest in value_multisets(target - value * times, value - 1):
+                multisets.append(((value, times),) + rest)
+    return multisets
+
+
+# Every way of picking values from the mesa to complete each hand card
+# to 15, precomputed once so that move generation only has to check which
+# of them the mesa can actually supply.
+SUM_TABLES = {target: value_multisets(target) for target in range(1, TARGET)}
+
+# The same tables, with each multiset paired with a bitmask of the values
+# it uses, so that multisets needing a value absent from the mesa can be
+# skipped with a single check.
+_MASKED_SUM_TABLES = {
+    target: [(multiset, sum(1 << value for (value, _) in multiset))
+             for multiset in multisets]
+    for (target, multisets) in SUM_TABLES.items()
+}
+
+
+def enumerate_possibilities(mesa, hand, interchangeable=None):
     """Finds all the way of adding to 15 using exactly 1 card from the hand,
     and any arbitrary number from the mesa.
 
     Args:
          mesa -- List of Card objects
          hand -- List of Card objects
+         interchangeable (int) -- Bitmask of cards that only matter through
+                                  their value (see group_moves). If given,
+                                  captures are grouped into classes.
 
     Returns:
         List of tuples, each representing a different possibility for adding
         up to 15.
         Example: [(card1, card2), (card1, card3, card4)]
+        With interchangeable, a list of MoveClass tuples instead.
 
     Example:
         >>> from quince.components.card import Card
@@ -35,29 +88,242 @@ def enumerate_possibilities(mesa, hand):
         True
     """
 
-    def find_permutation(card_pool, partial_sum, permutations):
-        """Recursively find all permutations of card_pool and partial_sum
-        which add to 15, and append each result to permutations
-        """
-
-        # calculate the current sum of all cards in partial_sum
-        current_sum = sum([card.value for card in partial_sum])
-        if current_sum == 15:
-            # found a permutation, append it to permutations
-            permutations.append(tuple(partial_sum))
-        if current_sum >= 15:
-            # at or beyond target sum, so stop recursing
-            return
-
-        # for each remaining card in card_pool, see if there is a permutation
-        # adding to the target, given the current partial_sum
-        for card in enumerate(card_pool):
-            remaining_cards = card_pool[card[0] + 1:]
-            new_partial_sum = partial_sum + [card[1]]
-            find_permutation(remaining_cards, new_partial_sum, permutations)
+    positions = _group_by_value(mesa)
 
     permutations = []
-    # for each card in the hand, find all permutations that add to 15
+    # for each card in the hand, find all combinations that add to 15
     for card in hand:
-        find_permutation(mesa, [card], permutations)
+        found = [sorted(picked) for picked in _captures(card, positions)]
+
+        # keep the order in which the cards appear on the mesa
+        found.sort()
+        permutations.extend((card,) + tuple(mesa[i] for i in chosen)
+                            for chosen in found)
+
+    if interchangeable is not None:
+        return group_moves(permutations, interchangeable)
     return permutations
+
+
+def group_moves(moves, interchangeable):
+    """Groups moves that only differ by which interchangeable cards
+    they use.
+
+    Interchangeable cards are plain-suited cards whose suit can no longer
+    make a difference to anybody's score. Swapping one of them for another
+    of the same value from the same place (the hand or the mesa) leaves
+    every score, now and for the rest of the ronda, as it was, so a search
+    only needs to try one move of each class.
+
+    Args:
+        moves -- Sequence of tuples with a card from the hand, followed
+                 by the cards picked up from the mesa (if any)
+        interchangeable (int) -- Bitmask of interchangeable cards
+
+    Returns:
+        List of MoveClass tuples, in the order in which each class first
+        appears among the moves. Representatives are the moves of their
+        class using the lowest cards, so they do not depend on the order
+        of the hand or the mesa.
+    """
+    def label(card):
+        if interchangeable >> card.index & 1:
+            return -card.value
+        return card.index
+
+    classes = {}
+    for move in moves:
+        key = (label(move[0]), tuple(sorted(label(card)
+                                            for card in move[1:])))
+        rank = [card.index for card in move]
+        rank[1:] = sorted(rank[1:])
+        if key not in classes:
+            classes[key] = [rank, move, 1]
+            continue
+
+        found = classes[key]
+        found[2] += 1
+        if rank < found[0]:
+            found[0:2] = [rank, move]
+
+    return [MoveClass(move, multiplicity)
+            for (_, move, multiplicity) in classes.values()]
+
+
+def iter_possibilities(mesa, hand):
+    """Lazily yields the same captures as enumerate_possibilities.
+
+    Captures for each hand card are produced one at a time, so callers
+    that only need some of them can stop early. Cards within a capture
+    keep their mesa order, but the order in which captures are yielded
+    is not specified.
+
+    Args:
+         mesa -- List of Card objects
+         hand -- List of Card objects
+
+    Yields:
+        Tuples containing the card from the hand,
+        followed by the cards picked up from the mesa.
+    """
+    positions = _group_by_value(mesa)
+
+    for card in hand:
+        for picked in _captures(card, positions):
+            yield (card,) + tuple(mesa[i] for i in sorted(picked))
+
+
+def can_capture(mesa, card):
+    """True if the card can be used to pick up cards from the mesa.
+    Stops at the first combination of values that the mesa can supply,
+    without building any captures.
+
+    Args:
+        mesa -- List of Card objects
+        card -- Card object from the player's hand
+    """
+    positions = _group_by_value(mesa)
+    for multiset in _candidates(card, positions):
+        if _fits(multiset, positions):
+            return True
+    return False
+
+
+def count_possibilities(mesa, hand):
+    """Counts the captures available, without building any of them.
+
+    Args:
+        mesa -- List of Card objects
+        hand -- List of Card objects
+
+    Returns:
+        int, equal to len(enumerate_possibilities(mesa, hand))
+    """
+    positions = _group_by_value(mesa)
+
+    total = 0
+    for card in hand:
+        for multiset in _candidates(card, positions):
+            total += _ways(multiset, positions)
+    return total
+
+
+def can_escoba(mesa, hand):
+    """True if any card in the hand picks up every card on the mesa.
+
+    Args:
+        mesa -- List of Card objects
+        hand -- List of Card objects
+    """
+    if not mesa:
+        return False
+
+    missing = TARGET - sum(card.value for card in mesa)
+    return any(card.value == missing for card in hand)
+
+
+def random_possibility(mesa, hand, rng=random):
+    """Picks one of the captures available, uniformly at random,
+    without enumerating all of them.
+
+    Args:
+        mesa -- List of Card objects
+        hand -- List of Card objects
+        rng -- Source of randomness (defaults to the random module)
+
+    Returns:
+        A tuple like the ones in enumerate_possibilities,
+        or None if no capture is possible.
+    """
+    positions = _group_by_value(mesa)
+
+    options = []
+    weights = []
+    for card in hand:
+        for multiset in _candidates(card, positions):
+            ways = _ways(multiset, positions)
+            if ways:
+                options.append((card, multiset))
+                weights.append(ways)
+
+    if not options:
+        return None
+
+    # Choosing a multiset in proportion to the number of captures it
+    # produces, and then the cards for each value uniformly, gives every
+    # capture the same chance of being chosen.
+    pick = rng.randrange(sum(weights))
+    for ((card, multiset), ways) in zip(options, weights):
+        if pick < ways:
+            break
+        pick -= ways
+
+    picked = []
+    for (value, times) in multiset:
+        picked.extend(rng.sample(positions[value], times))
+    return (card,) + tuple(mesa[i] for i in sorted(picked))
+
+
+def _group_by_value(mesa):
+    """Maps each card value to the positions of the mesa that hold it."""
+    positions = {}
+    for i, card in enumerate(mesa):
+        positions.setdefault(card.value, []).append(i)
+    return positions
+
+
+def _captures(card, positions):
+    """Yields the mesa positions of every capture that adds up to 15
+    together with the card.
+    """
+    for multiset in _candidates(card, positions):
+        if not _fits(multiset, positions):
+            continue
+
+        choices = [combinations(positions[value], times)
+                   for (value, times) in multiset]
+        for picked in product(*choices):
+            yield list(chain.from_iterable(picked))
+
+
+def _candidates(card, positions):
+    """Yields the multisets that could complete the card to 15 using
+    only values present on the mesa (though possibly too many of them).
+    """
+    available = 0
+    for value in positions:
+        available |= 1 << value
+
+    for (multiset, needed) in _MASKED_SUM_TABLES.get(TARGET - card.value,
+                                                     []):
+        if not needed & ~available:
+            yield multiset
+
+
+def _fits(multiset, positions):
+    """True if the mesa holds enough cards of each value in the multiset.
+    """
+    for (value, times) in multiset:
+        if len(positions.get(value, ())) < times:
+            return False
+    return True
+
+
+def _ways(multiset, positions):
+    """Number of different captures the mesa can supply for a multiset."""
+    ways = 1
+    for (value, times) in multiset:
+        ways *= _choose(len(positions.get(value, ())), times)
+        if not ways:
+            break
+    return ways
+
+
+def _choose(n, k):
+    """Binomial coefficient"""
+    if k > n:
+        return 0
+    result = 1
+    for i in range(k):
+        result = result * (n - i) // (i + 1)
+    return result
@@ -0,0 +1,352 @@
+"""
+A compact binary record of rondas, for archiving games and replaying
+them later.
+
+A replay file starts with a short header and holds any number of ronda
+records, each prefixed by its length so that readers can skip to any
+ronda without decoding the ones before it. Every number is stored as an
+unsigned LEB128 varint (7 bits per byte, lowest first, with the high bit
+set on every byte but the last).
+
+A ronda record holds:
+    - the number of players, and the seat of the dealer
+    - the order in which the deck was dealt, as the rank of the
+      permutation of the 40 card indices (see cardset.card_index)
+    - one number per turn: the index of the card played, with the cards
+      picked up above it (bit i set for the i-th lowest card on the mesa
+      at the time), like cardset.encode_move does with full masks
+
+The deal is a keyframe from which every state of the ronda can be
+rebuilt, and whose turn it is follows from the turns before, so a turn
+usually takes one or two bytes and a whole ronda around 70.
+
+Writing:
+    writer = ReplayWriter(open(path, "wb"))
+    ronda = writer.start(Ronda.start(players, dealer))
+    while not ronda.is_finished:
+        ronda = writer.play_turn(ronda, card, mesa_cards)
+
+Reading:
+    for replay in read_replays(open(path, "rb")):
+        for ronda in replay.states():
+            ...
+"""
+from math import factorial
+from quince.components import Card, Deck, Player, Ronda
+from quince.components.cardset import (DECK_SIZE, cards_in, count,
+                                       index_suit, index_value, indices,
+                                       mask_of)
+
+
+MAGIC = b"QRPL"
+VERSION = 1
+
+_CARD_BITS = 6
+_CARD_MASK = (1 << _CARD_BITS) - 1
+
+
+class ReplayError(Exception):
+    """Error raised when a stream does not hold valid replays,
+    or a ronda cannot be recorded.
+    """
+    def __init__(self, msg=None):
+        if msg is None:
+            msg = "Not a valid replay."
+        super(ReplayError, self).__init__(msg)
+
+
+def write_varint(output, number):
+    """Appends a non-negative int to a bytearray as a varint."""
+    while number > 0x7F:
+        output.append(number & 0x7F | 0x80)
+        number >>= 7
+    output.append(number)
+
+
+def read_varint(data, position):
+    """Reads a varint.
+
+    Args:
+        data -- bytes
+        position (int) -- Where the varint starts
+
+    Returns:
+        Tuple (int, position after the varint)
+    """
+    number = 0
+    shift = 0
+    while True:
+        if position >= len(data):
+            raise ReplayError("The replay ends in the middle of a number.")
+        byte = data[position]
+        position += 1
+        number |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return (number, position)
+        shift += 7
+
+
+def rank_order(order):
+    """Numbers a permutation of the card indices, from 0 to 40! - 1.
+
+    Args:
+        order -- List of the 40 card indices
+
+    Returns:
+        int
+    """
+    left = list(range(DECK_SIZE))
+    rank = 0
+    for (position, index) in enumerate(order):
+        rank += left.index(index) * factorial(DECK_SIZE - 1 - position)
+        left.remove(index)
+    return rank
+
+
+def unrank_order(rank):
+    """Inverse of rank_order."""
+    if not 0 <= rank < factorial(DECK_SIZE):
+        raise ReplayError("The deck of the replay is not a valid order.")
+
+    left = list(range(DECK_SIZE))
+    order = []
+    for position in range(DECK_SIZE):
+        (digit, rank) = divmod(rank, factorial(DECK_SIZE - 1 - position))
+        order.append(left.pop(digit))
+    return order
+
+
+def dealt_order(ronda):
+    """Works out the order in which the deck of a ronda was dealt,
+    from the ronda as Ronda.start left it.
+
+    Returns:
+        List of the 40 card indices
+    """
+    cards = ronda.player_cards
+    order = []
+    for player in ronda.players:
+        order += [card.index for card in cards[player]["hand"]]
+
+    # a mesa that added up to 15 went straight to the dealer
+    mesa = ronda.mesa_mask or cards[ronda.dealer]["pila"].mask
+    order += list(indices(mesa))
+    return order + [card.index for card in ronda.deck.cards()]
+
+
+def encode_turn(mesa, card, captured):
+    """Packs a turn into an int.
+
+    Args:
+        mesa (int) -- Mask of the cards on the mesa before the turn
+        card -- Card played
+        captured -- Iterable of Card picked up
+
+    Returns:
+        int
+    """
+    picked = mask_of(captured)
+    relative = 0
+    for (bit, index) in enumerate(indices(mesa)):
+        if picked >> index & 1:
+            relative |= 1 << bit
+    return card.index | relative << _CARD_BITS
+
+
+def decode_turn(mesa, turn):
+    """Unpacks a turn packed by encode_turn.
+
+    Returns:
+        Tuple (Card, list of the Cards picked up)
+    """
+    index = turn & _CARD_MASK
+    relative = turn >> _CARD_BITS
+    if relative >> count(mesa):
+        raise ReplayError("The replay picks up cards that are not there.")
+
+    picked = 0
+    for (bit, mesa_index) in enumerate(indices(mesa)):
+        if relative >> bit & 1:
+            picked |= 1 << mesa_index
+    card = Card(index_value(index), index_suit(index))
+    return (card, cards_in(picked, Card))
+
+
+class ReplayWriter(object):
+    """Records rondas to a binary stream as they are played."""
+
+    def __init__(self, stream):
+        """Writes the header of a replay file.
+
+        Args:
+            stream -- Binary file-like object opened for writing
+        """
+        self._stream = stream
+        self._record = None
+        stream.write(MAGIC + bytes([VERSION]))
+
+    def start(self, ronda):
+        """Starts recording a ronda. Any ronda still being recorded is
+        written out first, as it is.
+
+        Args:
+            ronda -- Ronda as returned by Ronda.start, before any turn
+
+        Returns:
+            The same ronda
+        """
+        players = ronda.players
+        if ronda.deck.remaining() != DECK_SIZE - 3 * len(players) - 4 \
+                or any(len(ronda.player_cards[player]["hand"]) != 3
+                       for player in players):
+            raise ReplayError("Only rondas that have just been dealt "
+                              "can be recorded.")
+
+        self.flush()
+        self._record = bytearray()
+        write_varint(self._record, len(players))
+        write_varint(self._record, players.index(ronda.dealer))
+        write_varint(self._record, rank_order(dealt_order(ronda)))
+        return ronda
+
+    def play_turn(self, ronda, own_card, mesa_cards=None):
+        """Plays a turn of the ronda being recorded, and records it.
+        The ronda is written out once it is finished.
+
+        Args:
+            ronda -- The ronda being recorded, as last returned by
+                     start or play_turn
+            own_card, mesa_cards -- As taken by Ronda.play_turn
+
+        Returns:
+            The ronda returned by Ronda.play_turn
+        """
+        if self._record is None:
+            raise ReplayError("No ronda is being recorded.")
+
+        mesa = ronda.mesa_mask
+        ronda = ronda.play_turn(own_card, mesa_cards)
+        write_varint(self._record, encode_turn(mesa, own_card,
+                                               mesa_cards or []))
+
+        if ronda.is_finished:
+            self.flush()
+        return ronda
+
+    def flush(self):
+        """Writes out the ronda being recorded, if any, even if it is
+        not finished yet.
+        """
+        if self._record is None:
+            return
+
+        length = bytearray()
+        write_varint(length, len(self._record))
+        self._stream.write(bytes(length) + bytes(self._record))
+        self._record = None
+
+    def close(self):
+        """Writes out the ronda being recorded and closes the stream."""
+        self.flush()
+        self._stream.close()
+
+
+class Replay(object):
+    """A recorded ronda. Its turns are only decoded as its states are
+    asked for.
+
+    Attributes:
+        players (int) -- Number of players
+        dealer (int) -- Seat of the dealer
+        order -- List of the 40 card indices, in the order they were dealt
+    """
+
+    def __init__(self, data):
+        """
+        Args:
+            data (bytes) -- A ronda record, without its length
+        """
+        (self.players, position) = read_varint(data, 0)
+        (self.dealer, position) = read_varint(data, position)
+        (rank, position) = read_varint(data, position)
+        if not 2 <= self.players <= 4 or self.dealer >= self.players:
+            raise ReplayError("The replay has an invalid number of players.")
+
+        self.order = unrank_order(rank)
+        self._data = data
+        self._turns = position
+
+    def turns(self):
+        """Yields every turn as the int packed by encode_turn."""
+        position = self._turns
+        while position < len(self._data):
+            (turn, position) = read_varint(self._data, position)
+            yield turn
+
+    def states(self, players=None):
+        """Rebuilds the ronda turn by turn.
+
+        Args:
+            players -- List of Player to seat at the ronda.
+                       New players named after their seat by default.
+
+        Yields:
+            The Ronda as dealt, and then after each turn
+        """
+        if players is None:
+            players = [Player(f"Player {seat}")
+                       for seat in range(self.players)]
+
+        deck = Deck.from_indices(Card, self.order)
+        ronda = Ronda.start(players, players[self.dealer], deck=deck)
+        yield ronda
+
+        for turn in self.turns():
+            (card, captured) = decode_turn(ronda.mesa_mask, turn)
+            if ronda.is_finished or card not in \
+                    ronda.player_cards[ronda.current_player]["hand"]:
+                raise ReplayError("The replay plays a card that is not "
+                                  "in the player's hand.")
+            ronda = ronda.play_turn(card, captured)
+            yield ronda
+
+    def final(self, players=None):
+        """Returns the last state of the ronda."""
+        for ronda in self.states(players):
+            pass
+        return ronda
+
+
+def read_replays(stream):
+    """Reads the rondas in a replay file one at a time.
+
+    Args:
+        stream -- Binary file-like object opened for reading
+
+    Yields:
+        Replay objects
+    """
+    header = stream.read(len(MAGIC) + 1)
+    if header[:len(MAGIC)] != MAGIC:
+        raise ReplayError()
+    if header[len(MAGIC):] != bytes([VERSION]):
+        raise ReplayError("Unsupported replay version.")
+
+    while True:
+        length = 0
+        shift = 0
+        byte = stream.read(1)
+        if not byte:
+            return
+        while byte[0] >= 0x80:
+            length |= (byte[0] & 0x7F) << shift
+            shift += 7
+            byte = stream.read(1)
+            if not byte:
+                raise ReplayError("The replay file is truncated.")
+        length |= byte[0] << shift
+
+        data = stream.read(length)
+        if len(data) < length:
+            raise ReplayError("The replay file is truncated.")
+        yield Replay(data)
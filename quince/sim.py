@@ -0,0 +1,384 @@
+"""
+Headless simulation of complete games, for comparing NPC strategies.
+
+Games are played to 30 points using Ronda directly, without any of the
+graphical interface, and can be spread across several processes.
+
+Every game draws its randomness from streams derived from a master seed
+and the index of the game (see quince.utility.spawn_seed): one stream
+for shuffling the decks and one for each NPC. Any game can therefore be
+replayed exactly with replay_game(), no matter which process played it.
+
+Usage:
+    python -m quince.sim --games 100000 --players random random --workers 8
+"""
+import argparse
+import functools
+import random as random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from quince.ai import RolloutNPC, ISMCTSNPC
+from quince.components import NPC
+from quince.components.ronda import Ronda, SCORE_CATEGORIES, tally_points
+from quince.utility import get_rng, spawn_seed
+
+
+WINNING_SCORE = 30
+
+# Work done by the search strategies for each move. Simulated players
+# search for a fixed amount of work rather than for a time budget, so
+# that their moves do not depend on how fast the machine is.
+ROLLOUTS = 400
+ITERATIONS = 1000
+
+# NPC classes that can be selected by name from the command line
+STRATEGIES = {
+    "random": NPC,
+    "rollout": functools.partial(RolloutNPC, rollouts=ROLLOUTS,
+                                 time_budget=None),
+    "ismcts": functools.partial(ISMCTSNPC, iterations=ITERATIONS,
+                                time_budget=None),
+}
+
+
+def play_game(players, first_dealer=0, rng=None, writer=None):
+    """Plays a complete game, until at least one player reaches 30 points.
+
+    Args:
+        players -- Ordered list of NPC
+        first_dealer (int) -- Position of the player who deals first
+        rng -- Seed or random.Random used to shuffle every deck
+        writer -- ReplayWriter to record every ronda to (see quince.replay)
+
+    Returns:
+        GameResult object
+    """
+    # one stream for the whole game, so that every ronda is dealt anew
+    rng = get_rng(rng)
+    result = GameResult(len(players))
+    scores = {player: 0 for player in players}
+    dealer = first_dealer
+
+    while max(scores.values()) < WINNING_SCORE:
+        ronda = Ronda.start(players, players[dealer], mutable=True, rng=rng)
+        if writer is not None:
+            writer.start(ronda)
+
+        while not ronda.is_finished:
+            player = ronda.current_player
+            hand = ronda.player_cards[player]["hand"]
+            (own_card, mesa_cards) = player.get_move(hand, ronda.current_mesa,
+                                                     ronda)
+            if writer is None:
+                ronda.play_turn(own_card, mesa_cards)
+            else:
+                writer.play_turn(ronda, own_card, mesa_cards)
+
+        points = tally_points(ronda.calculate_scores())
+        result.add_ronda(players, dealer, points)
+        for earned in points.values():
+            for (player, amount) in earned.items():
+                scores[player] += amount
+
+        dealer = (dealer + 1) % len(players)
+
+    result.set_final_scores([scores[player] for player in players])
+    return result
+
+
+class GameResult(object):
+    """The outcome of a single game, recorded by seat
+    (the position of each player in the list of players).
+    """
+    def __init__(self, seats):
+        self.rondas = 0
+        self.final_scores = [0] * seats
+        self.category_points = [dict.fromkeys(SCORE_CATEGORIES, 0)
+                                for _ in range(seats)]
+
+        # points earned in rondas where the seat was / was not dealing
+        self.dealer_points = 0
+        self.others_points = 0
+
+    def add_ronda(self, players, dealer, points):
+        """Records the points earned in one ronda.
+
+        Args:
+            players -- Ordered list of players
+            dealer (int) -- Seat of the dealer
+            points -- Dictionary returned by tally_points
+        """
+        self.rondas += 1
+        for (category, earned) in points.items():
+            for (seat, player) in enumerate(players):
+                amount = earned.get(player, 0)
+                self.category_points[seat][category] += amount
+                if seat == dealer:
+                    self.dealer_points += amount
+                else:
+                    self.others_points += amount
+
+    def set_final_scores(self, scores):
+        """Records the total score of each seat at the end of the game."""
+        self.final_scores = scores
+
+    @property
+    def winners(self):
+        """Seats with the highest final score (more than one on a tie)."""
+        top = max(self.final_scores)
+        return [seat for (seat, score) in enumerate(self.final_scores)
+                if score == top]
+
+
+class SimulationStats(object):
+    """Running totals over any number of games.
+    Partial totals from different workers can be merged together.
+    """
+    def __init__(self, strategies):
+        """
+        Args:
+            strategies -- List with the strategy name playing each seat
+        """
+        seats = len(strategies)
+        self.strategies = list(strategies)
+        self.games = 0
+        self.rondas = 0
+        self.wins = [0.0] * seats
+        self.scores = [0] * seats
+        self.category_points = [dict.fromkeys(SCORE_CATEGORIES, 0)
+                                for _ in range(seats)]
+        self.dealer_points = 0
+        self.others_points = 0
+
+    def add(self, result):
+        """Adds a GameResult to the totals. Tied winners share the win."""
+        self.games += 1
+        self.rondas += result.rondas
+
+        winners = result.winners
+        for seat in winners:
+            self.wins[seat] += 1.0 / len(winners)
+
+        for (seat, score) in enumerate(result.final_scores):
+            self.scores[seat] += score
+            for (category, points) in result.category_points[seat].items():
+                self.category_points[seat][category] += points
+
+        self.dealer_points += result.dealer_points
+        self.others_points += result.others_points
+
+    def merge(self, other):
+        """Adds the totals of another SimulationStats to this one."""
+        self.games += other.games
+        self.rondas += other.rondas
+        self.dealer_points += other.dealer_points
+        self.others_points += other.others_points
+
+        for seat in range(len(self.strategies)):
+            self.wins[seat] += other.wins[seat]
+            self.scores[seat] += other.scores[seat]
+            for (category, points) in other.category_points[seat].items():
+                self.category_points[seat][category] += points
+
+    @property
+    def dealer_advantage(self):
+        """Average points per ronda earned by the dealer, minus the
+        average points per ronda earned by each of the other players.
+        """
+        if not self.rondas:
+            return 0.0
+
+        others = len(self.strategies) - 1
+        dealer = self.dealer_points / self.rondas
+        return dealer - self.others_points / (self.rondas * others)
+
+    def report(self):
+        """Returns a human readable summary of the totals."""
+        games = max(self.games, 1)
+        rondas = max(self.rondas, 1)
+
+        lines = [f"Games: {self.games}  Rondas: {self.rondas}"]
+        header = "Seat  Strategy     Win rate  Avg score"
+        header += "".join(f"  {category:>10}"
+                          for category in SCORE_CATEGORIES)
+        lines.append(header)
+
+        for (seat, strategy) in enumerate(self.strategies):
+            line = (f"{seat:>4}  {strategy:<11}"
+                    f"  {self.wins[seat] / games:>8.2%}"
+                    f"  {self.scores[seat] / games:>9.2f}")
+            for category in SCORE_CATEGORIES:
+                per_ronda = self.category_points[seat][category] / rondas
+                line += f"  {per_ronda:>10.3f}"
+            lines.append(line)
+
+        lines.append("Category columns show average points per ronda.")
+        lines.append(f"Dealer advantage: {self.dealer_advantage:+.3f} "
+                     "points per ronda")
+        return "\n".join(lines)
+
+
+def build_players(strategies):
+    """Instantiates one NPC for each strategy name."""
+    return [STRATEGIES[name](f"{name} {seat}")
+            for (seat, name) in enumerate(strategies)]
+
+
+def seeded_game(players, master_seed, game):
+    """Plays game number `game` of a simulation, seeding the deck and
+    every NPC from streams derived from the master seed.
+
+    Args:
+        players -- Ordered list of NPC
+        master_seed (int)
+        game (int) -- Index of the game within the simulation
+
+    Returns:
+        GameResult object
+    """
+    for (seat, player) in enumerate(players):
+        player.rng = random.Random(spawn_seed(master_seed, game, "npc", seat))
+
+    deck_rng = random.Random(spawn_seed(master_seed, game, "deck"))
+
+    # rotate the first dealer so that no seat is favoured
+    return play_game(players, game % len(players), deck_rng)
+
+
+def replay_game(strategies, master_seed, game):
+    """Replays a single game of a simulation exactly.
+
+    Args:
+        strategies -- List of strategy names, one per seat
+        master_seed (int) -- Seed the simulation was run with
+        game (int) -- Index of the game to replay
+
+    Returns:
+        GameResult object
+    """
+    return seeded_game(build_players(strategies), master_seed, game)
+
+
+def play_games(strategies, master_seed, first_game, count):
+    """Plays a batch of games and totals their results.
+    This is the unit of work sent to each worker process.
+
+    Args:
+        strategies -- List of strategy names, one per seat
+        master_seed (int) -- Seed from which every game's seeds are derived
+        first_game (int) -- Index of the first game in the batch
+        count (int) -- Number of games to play
+
+    Returns:
+        SimulationStats object
+    """
+    players = build_players(strategies)
+    stats = SimulationStats(strategies)
+
+    for game in range(first_game, first_game + count):
+        stats.add(seeded_game(players, master_seed, game))
+
+    return stats
+
+
+def run_simulation(strategies, games, workers=1, chunksize=100,
+                   master_seed=0):
+    """Plays games across a pool of processes, yielding the running
+    totals every time a batch of games finishes.
+
+    Args:
+        strategies -- List of strategy names, one per seat
+        games (int) -- Total number of games to play
+        workers (int) -- Number of worker processes.
+                         With a single worker, games are played in this
+                         process.
+        chunksize (int) -- Number of games in each batch
+        master_seed (int) -- Seed from which every game's seeds are derived
+
+    Yields:
+        SimulationStats with the totals so far
+    """
+    totals = SimulationStats(strategies)
+    batches = [(start, min(chunksize, games - start))
+               for start in range(0, games, chunksize)]
+
+    if workers <= 1:
+        for (start, count) in batches:
+            totals.merge(play_games(strategies, master_seed, start, count))
+            yield totals
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Only keep a few batches per worker in flight,
+        # so that millions of games do not all get queued up front
+        pending = set()
+        batches = iter(batches)
+        for (start, count) in batches:
+            pending.add(executor.submit(play_games, strategies,
+                                        master_seed, start, count))
+            if len(pending) >= workers * 2:
+                break
+
+        while pending:
+            (done, pending) = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                totals.merge(future.result())
+                yield totals
+
+            for (start, count) in batches:
+                pending.add(executor.submit(play_games, strategies,
+                                            master_seed, start, count))
+                if len(pending) >= workers * 2:
+                    break
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(
+        prog="python -m quince.sim",
+        description="Play complete games of quince between NPC strategies.")
+    parser.add_argument("--games", type=int, default=1000,
+                        help="number of games to play")
+    parser.add_argument("--players", nargs="+", default=["random"] * 4,
+                        choices=sorted(STRATEGIES),
+                        help="strategy for each seat (2 to 4 players)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes")
+    parser.add_argument("--chunksize", type=int, default=100,
+                        help="number of games sent to a worker at once")
+    parser.add_argument("--report-every", type=float, default=5.0,
+                        help="seconds between progress reports")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="master seed (random if not given)")
+    args = parser.parse_args(argv)
+
+    if not 2 <= len(args.players) <= 4:
+        parser.error("between 2 and 4 players are required")
+
+    seed = args.seed
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(63)
+    print(f"Master seed: {seed}")
+
+    started = time.time()
+    last_report = started
+    totals = SimulationStats(args.players)
+
+    for totals in run_simulation(args.players, args.games, args.workers,
+                                 args.chunksize, seed):
+        now = time.time()
+        if now - last_report >= args.report_every:
+            last_report = now
+            rate = totals.games / (now - started)
+            print(f"{totals.games}/{args.games} games "
+                  f"({rate:.0f} games/s)", file=sys.stderr)
+
+    elapsed = time.time() - started
+    print(totals.report())
+    print(f"Elapsed: {elapsed:.1f}s "
+          f"({totals.games / max(elapsed, 1e-9):.0f} games/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+A game frame drawn on a single canvas.
+
+Instead of a tree of frames, labels and buttons, every card, hand,
+avatar and name on the board is an item of one tk.Canvas. Items are
+created once and then moved, retagged and given new images as the game
+goes on: a redraw only touches the items whose card or position changed.
+Clicks are matched to the card under the pointer by hit-testing the
+canvas, rather than by a button per card.
+"""
+import math as math
+import tkinter as tk
+from PIL import Image, ImageTk
+from quince.ui.common.image_cache import IMAGES, FADED, OVERLAID
+from quince.ui.game_frame import GameFrame
+from quince.ui.opponents.hand import card_backs_path
+from quince.ui.player.hand import CARD_SIZE
+
+
+# Smallest board the layout is worked out for (see GameApp's minsize)
+MIN_SIZE = (800, 600)
+
+AVATAR_SIZE = (65, 65)
+OPPONENT_HAND_SIZE = (100, 100)
+TABLE_CARD_SIZE = (140, 140)
+
+# Distance between the centres of neighbouring cards
+TABLE_SPACING = (96, 146)
+HAND_SPACING = CARD_SIZE[0] + 10
+
+# Seats of the opponents around the board, in the order of the npcs
+SIDES = ["left", "top", "right"]
+
+
+class CanvasGameFrame(GameFrame):
+    """GameFrame that draws the whole board on one canvas."""
+
+    def _build_board(self):
+        """Creates the canvas and the items that are always on it."""
+        self.canvas = tk.Canvas(self, highlightthickness=0,
+                                width=MIN_SIZE[0], height=MIN_SIZE[1])
+        self.canvas.grid(row=0, column=0, rowspan=3, columnspan=3,
+                         sticky="nsew")
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<Configure>", self._layout)
+
+        # (kind, card) of every item that reacts to clicks, by item id
+        self._targets = {}
+
+        # PhotoImage shown by every image item, by item id (see _show_image)
+        self._photos = {}
+
+        # avatar, name and turn marker of every player
+        self._avatars = {}
+        self._seats = {}
+        for player in [self.player] + self.npcs:
+            self._build_seat(player)
+
+        # backs of each opponent's hand, and a card they have just played
+        self._backs = {}
+        self._backs_count = {}
+        self._flash = {}
+        for npc in self.npcs:
+            self._backs[npc] = self.canvas.create_image(0, 0, tags="backs")
+            self._backs_count[npc] = None
+            self._flash[npc] = self.canvas.create_image(
+                0, 0, anchor="nw", state="hidden", tags="flash")
+
+        # the player's hand, in three slots
+        self._hand_cards = ()
+        self._hand_slots = []
+        for _ in range(0, 3):
+            item = self.canvas.create_image(0, 0, state="hidden",
+                                            tags="hand")
+            self._hand_slots.append(item)
+        self._selected_slot = 0
+
+        # the cards on the table, by card
+        self._table_items = {}
+        self._table_order = []
+
+        self.play_hand_btn = tk.Button(self.canvas,
+                                       text="Play Hand",
+                                       command=self._play_selected)
+        self._play_hand_item = self.canvas.create_window(
+            0, 0, window=self.play_hand_btn)
+
+        self.draw()
+
+    def _build_seat(self, player):
+        """Creates the avatar, name and turn marker of a player."""
+        image = player.image
+        image.thumbnail(AVATAR_SIZE, Image.LANCZOS)
+        self._avatars[player] = ImageTk.PhotoImage(image)
+
+        marker = self.canvas.create_rectangle(0, 0, 0, 0, state="hidden")
+        avatar = self.canvas.create_image(0, 0,
+                                          image=self._avatars[player])
+        name = self.canvas.create_text(0, 0, text=player.name)
+        self._seats[player] = (avatar, name, marker)
+
+    def draw(self):
+        """Brings every item on the canvas up to date with the ronda."""
+        self.selected_table_cards = []
+        current_player = self.ronda.current_player
+
+        for (player, (_, _, marker)) in self._seats.items():
+            state = "normal" if current_player is player else "hidden"
+            self.canvas.itemconfig(marker, state=state)
+
+        # OPPONENTS
+        for npc in self.npcs:
+            hand_size = len(self.ronda.player_cards[npc]["hand"])
+            self._show_backs(npc, hand_size)
+            self.canvas.itemconfig(self._flash[npc], state="hidden")
+
+        # PLAYER
+        myhand = self.ronda.player_cards[self.player]["hand"]
+        btn_state = "normal" if current_player is self.player else "disabled"
+        self.play_hand_btn.config(state=btn_state)
+        self._show_hand(myhand)
+
+        # TABLE
+        self._show_table(self.ronda.current_mesa)
+
+        self._layout()
+
+    def _show_backs(self, npc, hand_size):
+        if self._backs_count[npc] == hand_size:
+            return
+
+        self._backs_count[npc] = hand_size
+        photo = IMAGES.photo(card_backs_path(hand_size), OPPONENT_HAND_SIZE,
+                             OVERLAID)
+        self._show_image(self._backs[npc], photo)
+
+    def _show_hand(self, cards):
+        """Shows the player's hand, only changing the slots whose card
+        changed. The first card is selected whenever the hand changes.
+        """
+        cards = tuple(cards)
+        if cards == self._hand_cards:
+            return
+
+        self._hand_cards = cards
+        self._selected_slot = 0
+        for (slot, item) in enumerate(self._hand_slots):
+            self._targets.pop(item, None)
+            if slot < len(cards):
+                self._targets[item] = ("hand", cards[slot])
+                self.canvas.itemconfig(item, state="normal")
+            else:
+                self.canvas.itemconfig(item, state="hidden")
+        self._paint_hand()
+
+    def _paint_hand(self):
+        """Shows the selected card of the hand in full colour."""
+        for (slot, card) in enumerate(self._hand_cards):
+            effect = None if slot == self._selected_slot else FADED
+            photo = IMAGES.photo(card, CARD_SIZE, effect, fit=False)
+            self._show_image(self._hand_slots[slot], photo)
+
+    def _show_table(self, cards):
+        """Shows the cards on the table, creating items only for the
+        cards that were not there already, and clears the selection.
+        """
+        removed = set(self._table_items) - set(cards)
+        for card in removed:
+            item = self._table_items.pop(card)
+            del self._targets[item]
+            self._photos.pop(item, None)
+            self.canvas.delete(item)
+
+        for card in cards:
+            item = self._table_items.get(card)
+            if item is None:
+                item = self.canvas.create_image(0, 0, tags="table")
+                self._table_items[card] = item
+                self._targets[item] = ("table", card)
+            self._paint_table_card(card, False)
+
+        self._table_order = list(cards)
+
+    def _paint_table_card(self, card, selected):
+        effect = None if selected else FADED
+        photo = IMAGES.photo(card, TABLE_CARD_SIZE, effect)
+        self._show_image(self._table_items[card], photo)
+
+    def _show_image(self, item, photo):
+        """Shows a PhotoImage on an image item.
+
+        Canvas items do not keep the PhotoImage they show alive, and the
+        image cache drops the ones it evicts, so the frame keeps a
+        reference to it for as long as the item shows it.
+        """
+        self._photos[item] = photo
+        self.canvas.itemconfig(item, image=photo)
+
+    def _layout(self, event=None):
+        """Moves every item to its place for the current size of the
+        canvas.
+        """
+        width = max(self.canvas.winfo_width(), MIN_SIZE[0])
+        height = max(self.canvas.winfo_height(), MIN_SIZE[1])
+        coords = self.canvas.coords
+
+        # OPPONENTS
+        for (npc, side) in zip(self.npcs, SIDES):
+            if side == "top":
+                avatar = (width / 2 - 110, 50)
+                backs = (width / 2 + 30, 60)
+            else:
+                x = 90 if side == "left" else width - 90
+                avatar = (x, height / 2 - 120)
+                backs = (x, height / 2 + 10)
+            self._place_seat(npc, avatar)
+            coords(self._backs[npc], *backs)
+            coords(self._flash[npc], backs[0] - 30, backs[1] - 42)
+
+        # PLAYER
+        bottom = height - CARD_SIZE[1] / 2 - 15
+        self._place_seat(self.player, (width / 2 - 300, bottom - 20))
+        for (slot, item) in enumerate(self._hand_slots):
+            coords(item, width / 2 + (slot - 1) * HAND_SPACING, bottom)
+        coords(self._play_hand_item, width / 2 + 290, bottom)
+
+        # TABLE
+        count = len(self._table_order)
+        columns = max(math.ceil(count / 2), 1)
+        rows = math.ceil(count / columns)
+        centre = (width / 2, (110 + bottom - CARD_SIZE[1] / 2) / 2)
+        for (position, card) in enumerate(self._table_order):
+            (row, column) = divmod(position, columns)
+            x = centre[0] + (column - (columns - 1) / 2) * TABLE_SPACING[0]
+            y = centre[1] + (row - (rows - 1) / 2) * TABLE_SPACING[1]
+            coords(self._table_items[card], x, y)
+
+    def _place_seat(self, player, position):
+        (avatar, name, marker) = self._seats[player]
+        (x, y) = position
+        (half_width, half_height) = (AVATAR_SIZE[0] / 2 + 2,
+                                     AVATAR_SIZE[1] / 2 + 2)
+        self.canvas.coords(avatar, x, y)
+        self.canvas.coords(name, x, y + half_height + 12)
+        self.canvas.coords(marker, x - half_width, y - half_height,
+                           x + half_width, y + half_height)
+
+    def _on_click(self, event):
+        """Selects the card under the pointer, if any."""
+        under = self.canvas.find_overlapping(event.x, event.y,
+                                             event.x, event.y)
+        for item in reversed(under):
+            target = self._targets.get(item)
+            if target is None:
+                continue
+
+            (kind, card) = target
+            if kind == "hand":
+                self._selected_slot = self._hand_cards.index(card)
+                self._paint_hand()
+            else:
+                self._toggle_table_card(card)
+            return
+
+    def _toggle_table_card(self, card):
+        selected = card not in self.selected_table_cards
+        self._paint_table_card(card, selected)
+        chosen = set(self.selected_table_cards) ^ {card}
+        self.register_table_card_selection(
+            [other for other in self._table_order if other in chosen])
+
+    def selected_hand_card(self):
+        """Returns the card selected in the player's hand."""
+        return self._hand_cards[self._selected_slot]
+
+    def _play_selected(self):
+        if self._hand_cards:
+            self.play_hand(self.selected_hand_card())
+
+    def _flash_card(self, npc, card):
+        """Shows the card that a CPU player has just played, over the
+        backs of their hand.
+        """
+        hand_size = len(self.ronda.player_cards[npc]["hand"])
+        self._show_backs(npc, hand_size)
+
+        size = (OPPONENT_HAND_SIZE[0] * 0.9, OPPONENT_HAND_SIZE[1] * 0.9)
+        flash = self._flash[npc]
+        self._show_image(flash, IMAGES.photo(card, size))
+        self.canvas.itemconfig(flash, state="normal")
+        self.canvas.tag_raise(flash)
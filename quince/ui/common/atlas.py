@@ -0,0 +1,220 @@
+"""
+A prebuilt atlas of the images the interface draws most.
+
+Every card face and back, the backs shown for opponents' hands and the
+score images are decoded from PNG and resized to the sizes the widgets
+draw them at, once, by a build step:
+
+    python -m quince.ui.common.atlas
+
+which writes their raw RGBA pixels to a single file, along with an index
+of where each sprite starts. The app maps that file into memory when it
+starts (see image_cache.IMAGES), and sprites are wrapped as PIL images
+over the mapped pixels without copying or decoding anything. Images
+missing from the atlas, or a missing atlas altogether, are simply loaded
+from their PNGs as before.
+
+File layout: the magic bytes, a header (format version, index length),
+the index as JSON, and then the pixels of every sprite, each starting
+at a multiple of 64 bytes.
+"""
+import json
+import mmap
+import os
+import struct
+from glob import glob
+from os import getcwd, path
+from PIL import Image
+
+
+MAGIC = b"QATL"
+VERSION = 1
+
+ASSETS_ROOT = path.join(getcwd(), "quince/assets")
+ATLAS_PATH = path.join(ASSETS_ROOT, "atlas.bin")
+
+# Sizes the cards are drawn at: on the table, in the player's hand
+# and on the score report. Tuples (size, fit), as taken by
+# ImageCache.image
+CARD_SIZES = [((140, 140), True), ((104, 160), False), ((65, 65), True)]
+
+# Size of the backs of opponents' hands (see OpponentHand)
+OPPONENT_HAND_SIZE = ((100, 100), True)
+
+_HEADER = struct.Struct("=HI")
+_ALIGNMENT = 64
+
+
+def relative_path(image_path):
+    """Names an image file by its path within the assets directory."""
+    return path.relpath(image_path, ASSETS_ROOT).replace(os.sep, "/")
+
+
+def sprites():
+    """Lists the sprites that go into the atlas.
+
+    Returns:
+        List of tuples (path to the image file, size, fit)
+    """
+    listed = []
+    for image_path in sorted(glob(path.join(ASSETS_ROOT, "cards/*.png"))):
+        listed += [(image_path, size, fit) for (size, fit) in CARD_SIZES]
+
+    (size, fit) = OPPONENT_HAND_SIZE
+    for image_path in sorted(glob(path.join(ASSETS_ROOT,
+                                            "opponent_hands/*.png"))):
+        listed.append((image_path, size, fit))
+
+    for image_path in sorted(glob(path.join(ASSETS_ROOT, "scores/*.png"))):
+        listed.append((image_path, None, True))
+
+    return listed
+
+
+def render(image_path, size, fit):
+    """Loads an image and resizes it like ImageCache.image does.
+
+    Returns:
+        PIL.Image object, in RGBA mode
+    """
+    image = Image.open(image_path)
+    if size is not None:
+        if fit:
+            image.thumbnail(size, Image.LANCZOS)
+        else:
+            image = image.resize(size, Image.LANCZOS)
+    return image.convert("RGBA")
+
+
+def build(atlas_path=ATLAS_PATH, listed=None):
+    """Writes an atlas file.
+
+    Args:
+        atlas_path (str) -- Where to write the atlas
+        listed -- List of sprites, as returned by sprites()
+                  (the default)
+
+    Returns:
+        Number of sprites in the atlas
+    """
+    if listed is None:
+        listed = sprites()
+
+    index = []
+    pixels = []
+    offset = 0
+    for (image_path, size, fit) in listed:
+        image = render(image_path, size, fit)
+        data = image.tobytes()
+        index.append({"path": relative_path(image_path),
+                      "size": None if size is None else list(size),
+                      "fit": fit, "offset": offset,
+                      "width": image.size[0], "height": image.size[1]})
+        padding = -len(data) % _ALIGNMENT
+        pixels.append(data + bytes(padding))
+        offset += len(data) + padding
+
+    encoded = json.dumps(index).encode("utf-8")
+    start = len(MAGIC) + _HEADER.size + len(encoded)
+    encoded += b" " * (-start % _ALIGNMENT)
+
+    temporary = atlas_path + ".tmp"
+    with open(temporary, "wb") as output:
+        output.write(MAGIC + _HEADER.pack(VERSION, len(encoded)) + encoded)
+        for data in pixels:
+            output.write(data)
+    os.replace(temporary, atlas_path)
+    return len(index)
+
+
+class AtlasError(Exception):
+    """Error raised when an atlas file cannot be read."""
+    def __init__(self, msg=None):
+        if msg is None:
+            msg = "Not a valid atlas file."
+        super(AtlasError, self).__init__(msg)
+
+
+class Atlas(object):
+    """A memory-mapped atlas file."""
+
+    def __init__(self, atlas_path=ATLAS_PATH):
+        """Maps an atlas file into memory and reads its index.
+
+        Args:
+            atlas_path (str) -- File written by build()
+        """
+        # the map keeps the file open by itself
+        with open(atlas_path, "rb") as atlas_file:
+            try:
+                self._map = mmap.mmap(atlas_file.fileno(), 0,
+                                      access=mmap.ACCESS_READ)
+            except ValueError:
+                raise AtlasError()
+
+        start = len(MAGIC) + _HEADER.size
+        if self._map[:len(MAGIC)] != MAGIC or len(self._map) < start:
+            self.close()
+            raise AtlasError()
+        (version, length) = _HEADER.unpack(self._map[len(MAGIC):start])
+        if version != VERSION:
+            self.close()
+            raise AtlasError("Unsupported atlas version.")
+
+        index = json.loads(self._map[start:start + length].decode("utf-8"))
+        self._pixels = start + length
+        self._sprites = {}
+        for entry in index:
+            size = None if entry["size"] is None else tuple(entry["size"])
+            self._sprites[(entry["path"], size, entry["fit"])] = \
+                (entry["offset"], entry["width"], entry["height"])
+        self._view = memoryview(self._map)
+
+    def __len__(self):
+        return len(self._sprites)
+
+    def sprite(self, image_path, size=None, fit=True):
+        """Slices a sprite out of the atlas, without copying its pixels.
+
+        Args:
+            image_path (str) -- Path to the image file it was built from
+            size, fit -- As taken by ImageCache.image
+
+        Returns:
+            Read-only PIL.Image object in RGBA mode, or None if the atlas
+            does not hold that image at that size
+        """
+        entry = self._sprites.get((relative_path(image_path), size, fit))
+        if entry is None:
+            return None
+
+        (offset, width, height) = entry
+        start = self._pixels + offset
+        pixels = self._view[start:start + width * height * 4]
+        return Image.frombuffer("RGBA", (width, height), pixels,
+                                "raw", "RGBA", 0, 1)
+
+    def close(self):
+        """Unmaps the file. Sprites already sliced must not be used
+        afterwards.
+        """
+        if getattr(self, "_view", None) is not None:
+            self._view.release()
+            self._view = None
+        self._map.close()
+
+
+def open_atlas(atlas_path=ATLAS_PATH):
+    """Maps the atlas into memory, if it has been built.
+
+    Returns:
+        Atlas object, or None if there is no valid atlas file
+    """
+    try:
+        return Atlas(atlas_path)
+    except (OSError, AtlasError):
+        return None
+
+
+if __name__ == "__main__":
+    print(f"Packed {build()} sprites into {ATLAS_PATH}")
@@ -0,0 +1,173 @@
+"""
+A cache of the images drawn by the interface.
+
+Redrawing the game means drawing the same card faces over and over, at
+the same few sizes and with the same few effects. Decoding a PNG and
+resampling it takes far longer than drawing it, so every image is built
+once, kept along with its Tk PhotoImage, and handed out again whenever
+the same card (or asset file), size and effect are asked for.
+
+Images found in the prebuilt atlas (see quince.ui.common.atlas) are
+sliced out of it rather than decoded from their PNGs.
+
+Entries are kept up to a fixed amount of memory, evicting the least
+recently used ones first. Widgets still showing an evicted PhotoImage
+keep it alive through their own reference to it, as Tkinter requires.
+Canvas items hold no such reference, so whoever draws them must keep one
+(see CanvasGameFrame).
+"""
+from collections import OrderedDict, namedtuple
+from PIL import Image, ImageEnhance, ImageTk
+from quince.ui.common.atlas import open_atlas
+
+
+# Images drawn faded out, like cards that are not selected
+FADED = "faded"
+
+# Images drawn over themselves, like the backs of opponents' cards
+OVERLAID = "overlaid"
+
+EFFECTS = {
+    FADED: lambda image: ImageEnhance.Color(image).enhance(0.2),
+    OVERLAID: lambda image: Image.alpha_composite(image.convert("RGBA"),
+                                                  image.convert("RGBA")),
+}
+
+ImageCacheStats = namedtuple("ImageCacheStats", ["hits", "misses",
+                                                 "evictions", "entries",
+                                                 "size"])
+
+
+def _image_bytes(image):
+    """Approximate memory taken by an image, in bytes."""
+    (width, height) = image.size
+    return width * height * len(image.getbands())
+
+
+class ImageCache(object):
+    """Decoded, resized and touched up images, with their PhotoImages,
+    by source, size and effect.
+
+    Sources are Card objects, for their faces, or paths to image files.
+    Images handed out are shared, so they must be copied before being
+    modified.
+    """
+    def __init__(self, max_bytes=64 * 1024 * 1024, atlas=None):
+        """
+        Args:
+            max_bytes (int) -- Most memory taken by the images kept
+            atlas -- Atlas to take images from before loading them
+        """
+        self.max_bytes = max_bytes
+        self.atlas = atlas
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # (source, size, fit, effect, is PhotoImage) -> (image, bytes)
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def image(self, source, size=None, effect=None, fit=True):
+        """Returns a PIL image.
+
+        Args:
+            source -- Card, or path to an image file
+            size -- Tuple (width, height), or None for the original size
+            effect (str) -- One of EFFECTS, or None
+            fit (bool) -- Shrink the image to fit in size, keeping its
+                          proportions, rather than stretching it to size
+
+        Returns:
+            PIL.Image object
+        """
+        if size is not None:
+            size = (int(size[0]), int(size[1]))
+        key = (source, size, fit, effect, False)
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry
+
+        if effect is not None:
+            image = EFFECTS[effect](self.image(source, size, None, fit))
+        else:
+            image = self._sprite(source, size, fit)
+            if image is None:
+                image = self._build(source, size, fit)
+
+        self._store(key, image, _image_bytes(image))
+        return image
+
+    def photo(self, source, size=None, effect=None, fit=True):
+        """Like image(), but returns an ImageTk.PhotoImage."""
+        if size is not None:
+            size = (int(size[0]), int(size[1]))
+        key = (source, size, fit, effect, True)
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry
+
+        image = self.image(source, size, effect, fit)
+        photo = ImageTk.PhotoImage(image)
+        self._store(key, photo, _image_bytes(image))
+        return photo
+
+    def stats(self):
+        """Returns an ImageCacheStats tuple."""
+        return ImageCacheStats(self.hits, self.misses, self.evictions,
+                               len(self._entries), self.size)
+
+    def clear(self):
+        """Drops every image."""
+        self._entries.clear()
+        self.size = 0
+
+    def _sprite(self, source, size, fit):
+        """Slices an image out of the atlas, if it is there."""
+        if self.atlas is None:
+            return None
+        image_path = source if isinstance(source, str) else source.image_path
+        return self.atlas.sprite(image_path, size, fit)
+
+    def _build(self, source, size, fit):
+        """Loads an image and resizes it."""
+        if size is None:
+            return self._load(source)
+        if fit:
+            image = self.image(source).copy()
+            image.thumbnail(size, Image.LANCZOS)
+            return image
+        return self.image(source).resize(size, Image.LANCZOS)
+
+    def _load(self, source):
+        if isinstance(source, str):
+            image = Image.open(source)
+        else:
+            image = source.image()
+        image.load()
+        return image
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def _store(self, key, image, size):
+        self._entries[key] = (image, size)
+        self.size += size
+        while self.size > self.max_bytes and len(self._entries) > 1:
+            (_, (_, evicted)) = self._entries.popitem(last=False)
+            self.size -= evicted
+            self.evictions += 1
+
+
+# The cache shared by every widget, backed by the atlas if it was built
+IMAGES = ImageCache(atlas=open_atlas())
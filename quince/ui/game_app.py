@@ -2,6 +2,7 @@
 Root tkinter window.
 """
 import tkinter as tk
+from quince.ui.game_frame_factory import RENDERERS
 
 
 class GameApp(tk.Tk):
@@ -19,6 +20,9 @@ class GameApp(tk.Tk):
 
         self.frames = {}
 
+        # how the board of the next game is drawn (see RENDERERS)
+        self.renderer = tk.StringVar(self, value="Widgets")
+
         self.how_to_play = HowToPlay
         self.about_factory = AboutFactory
         self.frames["TopMenu"] = TopMenuFactory.generate(self.container,
@@ -43,7 +47,8 @@ class GameApp(tk.Tk):
         previous_game.destroy()
 
         frame = game_frame_factory.generate(self.container,
-                                            self.display_scores)
+                                            self.display_scores,
+                                            RENDERERS[self.renderer.get()])
         self.frames["GameFrame"] = frame
         frame.grid(row=0, column=0, sticky="nsew")
         self.show_frame("GameFrame")
@@ -78,6 +83,11 @@ class GameApp(tk.Tk):
         filemenu = tk.Menu(menubar, tearoff=0)
         filemenu.add_command(label="New Game",
                              command=lambda: self.show_frame("TopMenu"))
+        boardmenu = tk.Menu(filemenu, tearoff=0)
+        for name in RENDERERS:
+            boardmenu.add_radiobutton(label=name, value=name,
+                                      variable=self.renderer)
+        filemenu.add_cascade(label="Board", menu=boardmenu)
         filemenu.add_separator()
         filemenu.add_command(label="Exit", command=self.quit)
         menubar.add_cascade(label="Game", menu=filemenu)
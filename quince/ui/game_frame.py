@@ -53,9 +53,13 @@ class GameFrame(tk.Frame):
         self.ronda = None
         self.start_new_ronda()
 
+        self._build_board()
+
+    def _build_board(self):
+        """Creates the widgets that show the state of the game."""
         # OPPONENTS
         self.opp_frames = {}
-        for npc in npcs:
+        for npc in self.npcs:
             self._instantiate_opponent_frame(npc)
 
         # PLAYER
@@ -120,9 +124,7 @@ class GameFrame(tk.Frame):
         self.hud.refresh(myhand, player_is_active)
 
         # TABLE
-        self.tbl.destroy()
-        self.tbl = Table(self, table_cards, self.register_table_card_selection)
-        self.tbl.grid(row=1, column=1)
+        self.tbl.refresh(table_cards)
 
     def register_table_card_selection(self, cards):
         """Callback function executed by the Table
@@ -172,14 +174,19 @@ class GameFrame(tk.Frame):
         table_cards = self.ronda.current_mesa
         current_player = self.ronda.current_player
         hand = self.ronda.player_cards[current_player]["hand"]
-        (own_card, mesa_cards) = current_player.get_move(hand, table_cards)
+        (own_card, mesa_cards) = current_player.get_move(hand, table_cards,
+                                                         self.ronda)
 
         self.ronda = self.ronda.play_turn(own_card, mesa_cards)
 
-        self.opp_frames[current_player].flash_card(own_card)
+        self._flash_card(current_player, own_card)
 
         self.after(1600, self._finish_turn)
 
+    def _flash_card(self, npc, card):
+        """Shows the card that a CPU player has just played."""
+        self.opp_frames[npc].flash_card(card)
+
     def _finish_turn(self):
         self.draw()
         self.play_next_move()
@@ -2,9 +2,18 @@
     Factory object that gets used to inject dependencies
     into the GameApp constructor.
 """
+from collections import OrderedDict
+from quince.ui.canvas_frame import CanvasGameFrame
 from quince.ui.game_frame import GameFrame
 
 
+# The ways of drawing the game board that can be chosen from the menu
+RENDERERS = OrderedDict([
+    ("Widgets", GameFrame),
+    ("Canvas", CanvasGameFrame),
+])
+
+
 class GameFrameFactory(object):
     """Creates a GameFrame object.
     By passing this factory to the GameApp constructor,
@@ -18,14 +27,15 @@ class GameFrameFactory(object):
         self.npc2 = npc2
         self.npc3 = npc3
 
-    def generate(self, root, callback):
+    def generate(self, root, callback, Frame=GameFrame):
         """Generates a GameFrame object whose parent Tk widget is "root".
 
         Args:
             root (Tk widget)
+            Frame -- GameFrame or a subclass, such as one of RENDERERS
         """
         npcs = [self.npc1, self.npc2, self.npc3]
-        return GameFrame(root,
-                         self.player,
-                         npcs,
-                         callback)
+        return Frame(root,
+                     self.player,
+                     npcs,
+                     callback)
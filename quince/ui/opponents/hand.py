@@ -6,6 +6,13 @@ import tkinter as tk
 from os import getcwd
 from os.path import join
 from PIL import Image, ImageTk
+from quince.ui.common.image_cache import IMAGES, OVERLAID
+
+
+def card_backs_path(card_count):
+    """Path to the image of the backs of a hand of card_count cards."""
+    path = f"quince/assets/opponent_hands/cards_{card_count}.png"
+    return join(getcwd(), path)
 
 
 class OpponentHand(tk.Frame):
@@ -32,11 +39,8 @@ class OpponentHand(tk.Frame):
         self.refresh(number_of_cards)
 
     def _get_card_backs_image(self):
-        path = f"quince/assets/opponent_hands/cards_{self.card_count}.png"
-        image_path = join(getcwd(), path)
-        image = Image.open(image_path)
-        image.thumbnail((self.image_size, self.image_size), Image.ANTIALIAS)
-        return image
+        return IMAGES.image(card_backs_path(self.card_count),
+                            (self.image_size, self.image_size))
 
     def _overlay_images(self, layer1, layer2):
         final = Image.new("RGBA", layer1.size)
@@ -50,10 +54,8 @@ class OpponentHand(tk.Frame):
 
         card_base = Image.new("RGBA", card_backs.size)
 
-        card_face = card.image().copy()
         resize = (card_base.size[0] * 0.9, card_base.size[1] * 0.9)
-        card_face.thumbnail(resize, Image.ANTIALIAS)
-        card_base.paste(card_face, (20, 8))
+        card_base.paste(IMAGES.image(card, resize), (20, 8))
 
         overlayed = self._overlay_images(card_backs, card_base)
         final = ImageTk.PhotoImage(overlayed)
@@ -67,9 +69,9 @@ class OpponentHand(tk.Frame):
             card_count (int) - Number of cards currently in hand
         """
         self.card_count = card_count
-        backs = self._get_card_backs_image()
-        backs = self._overlay_images(backs, backs)
-        card_backs = ImageTk.PhotoImage(backs)
+        card_backs = IMAGES.photo(card_backs_path(self.card_count),
+                                  (self.image_size, self.image_size),
+                                  OVERLAID)
 
         self.label.config(image=card_backs)
         self.image = card_backs  # hold on to the reference
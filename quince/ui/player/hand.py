@@ -3,7 +3,7 @@ Tkinter widget to display the hand that the user
 is currently holding and manage its interactions.
 """
 import tkinter as tk
-from PIL import Image, ImageTk, ImageEnhance
+from quince.ui.common.image_cache import IMAGES, FADED
 
 CARD_SIZE = (104, 160)
 CARD_PADX = 2
@@ -13,6 +13,9 @@ class PlayerHand(tk.Frame):
     """
     Represents a frame on the UI where the user can see
     what cards they currently own, and select one to play.
+
+    The three slots of the hand are built once, and refresh() only
+    swaps the images of the slots whose card changed.
     """
     def __init__(self, parent, cards):
         """
@@ -25,39 +28,47 @@ class PlayerHand(tk.Frame):
         """
         tk.Frame.__init__(self, parent)
 
-        if len(cards) > 3:
-            raise AttributeError("Too many cards in hand.")
-
         self.grid_rowconfigure(0, weight=1)
 
-        self.cards = cards
+        self.cards = ()
         self._selected_index = tk.IntVar()
 
+        # card shown in each slot, or None for empty slots
+        self._slot_cards = [None] * 3
+        self.slots = []
+
         col_width = 2 + CARD_SIZE[0] + CARD_PADX * 2
 
         for column in range(0, 3):
             self.grid_columnconfigure(column, weight=1, minsize=col_width)
+            self.slots.append(self._build_slot(column))
 
-            try:
-                card = self.cards[column]
-                self._display_card(card, column)
-            except IndexError:
-                pass
+        self.refresh(cards)
 
-    def _display_card(self, card, column):
+    def refresh(self, cards):
+        """Shows a new hand. Nothing is redrawn if the hand is the same,
+        and the selection goes back to the first card if it is not.
 
-        resized = card.image().resize(CARD_SIZE, Image.ANTIALIAS)
+        Args:
+            cards (list) - A list of cards held in the player's hand.
+        """
+        cards = tuple(cards)
+        if len(cards) > 3:
+            raise AttributeError("Too many cards in hand.")
+        if cards == self.cards:
+            return
 
-        decolor = ImageEnhance.Color(resized)
-        decolorized = decolor.enhance(0.2)
+        self.cards = cards
+        self._selected_index.set(0)
 
-        unselected_img = ImageTk.PhotoImage(decolorized)
-        selected_img = ImageTk.PhotoImage(resized)
+        for column in range(0, 3):
+            card = cards[column] if column < len(cards) else None
+            if card is not self._slot_cards[column]:
+                self._display_card(card, column)
 
-        btn = tk.Radiobutton(
+    def _build_slot(self, column):
+        return tk.Radiobutton(
             self,
-            image=unselected_img,
-            selectimage=selected_img,
             variable=self._selected_index,
             value=column,
             indicatoron=0,
@@ -66,6 +77,19 @@ class PlayerHand(tk.Frame):
             relief="flat",
             selectcolor="",
             )
+
+    def _display_card(self, card, column):
+        """Shows a card in a slot, or hides the slot if card is None."""
+        self._slot_cards[column] = card
+        btn = self.slots[column]
+        if card is None:
+            btn.grid_remove()
+            return
+
+        unselected_img = IMAGES.photo(card, CARD_SIZE, FADED, fit=False)
+        selected_img = IMAGES.photo(card, CARD_SIZE, fit=False)
+
+        btn.config(image=unselected_img, selectimage=selected_img)
         btn.unselected_image = unselected_img
         btn.selected_image = selected_img
 
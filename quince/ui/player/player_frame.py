@@ -38,6 +38,7 @@ class PlayerFrame(tk.Frame):
         self.avatar.grid(row=0, column=0)
 
         self.p_hand = PlayerHand(self, cards)
+        self.p_hand.grid(row=0, column=1)
 
         self.play_hand_btn = tk.Button(self,
                                        text="Play Hand",
@@ -67,6 +68,4 @@ class PlayerFrame(tk.Frame):
         btn_state = "normal" if is_active else "disabled"
         self.play_hand_btn.config(state=btn_state)
 
-        self.p_hand.destroy()
-        self.p_hand = PlayerHand(self, cards)
-        self.p_hand.grid(row=0, column=1)
+        self.p_hand.refresh(cards)
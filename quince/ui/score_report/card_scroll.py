@@ -6,6 +6,7 @@ a  player has piled up over the course of a ronda.
 import tkinter as tk
 from os import getcwd, path
 from PIL import Image, ImageTk
+from quince.ui.common.image_cache import IMAGES
 
 
 IMAGE_ROOT = path.join(getcwd(), "quince/assets/scores/")
@@ -59,10 +60,7 @@ class CardScroll(tk.Frame):
         line_break_col = 8 if count < 17 else 12
 
         for card in self.cards:
-            resized = card.image()
-            resized.thumbnail((65, 65), Image.ANTIALIAS)
-
-            image = ImageTk.PhotoImage(resized)
+            image = IMAGES.photo(card, (65, 65))
             lbl = tk.Label(self.card_frame, image=image)
             lbl.image = image
             lbl.grid(row=row, column=col, sticky="we")
@@ -77,8 +75,7 @@ class CardScroll(tk.Frame):
     def _draw_score(self, score):
         """Renders an image with the player's score on it."""
         num = min(score, 30)
-        png = Image.open(path.join(IMAGE_ROOT, f"{num}.png"))
-        img = ImageTk.PhotoImage(png)
+        img = IMAGES.photo(path.join(IMAGE_ROOT, f"{num}.png"))
         lbl = tk.Label(self.score_frame, image=img)
         lbl.image = img
         lbl.pack(side="left", anchor="w")
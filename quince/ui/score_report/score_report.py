@@ -5,7 +5,7 @@ Displays the scores earned during the round.
 import tkinter as tk
 from os.path import join
 from os import getcwd
-from PIL import Image, ImageTk
+from quince.ui.common.image_cache import IMAGES
 from quince.ui.score_report.card_scroll import CardScroll
 
 
@@ -14,9 +14,7 @@ IMG_ROOT = join(getcwd(), "quince/assets/scores")
 
 def load_image(file_name):
     """Returns a png image as a PhotoImage object"""
-    path = join(IMG_ROOT, file_name)
-    img = Image.open(path)
-    return ImageTk.PhotoImage(img)
+    return IMAGES.photo(join(IMG_ROOT, file_name))
 
 
 class ScoreSummary(tk.Frame):
@@ -3,13 +3,16 @@ Display logic for the cards that are laid face-up on the table.
 """
 import tkinter as tk
 import math as math
-from PIL import Image, ImageTk, ImageEnhance
+from quince.ui.common.image_cache import IMAGES, FADED
 from quince.utility import GridPosition
 
 
 class Table(tk.Frame):
     """
     A container for a set of cards laid face-up on the table.
+
+    The table is kept up to date with refresh(), which only builds buttons
+    for the cards that were not on the table already.
     """
     def __init__(self, parent, cards, callback):
         """
@@ -23,13 +26,34 @@ class Table(tk.Frame):
 
         self.callback = callback
         self.card_statuses = dict()
+        self.buttons = dict()
+
+        self.refresh(cards)
+
+    def refresh(self, cards):
+        """Shows a new set of cards, keeping the buttons of the cards that
+        are still on the table, and clears the selection.
+
+        Args:
+            cards (List of Card)
+        """
+        cards = list(cards)
+        removed = set(self.buttons) - set(cards)
+        for card in removed:
+            self.buttons.pop(card).destroy()
+            del self.card_statuses[card]
+
+        for status in self.card_statuses.values():
+            status.set(False)
 
         column_count = math.ceil(len(cards)/2)
         grid_position = GridPosition(column_count)
         for card in cards:
-            self.card_statuses[card] = tk.BooleanVar()
-
-            btn = self._generate_card_button(card)
+            btn = self.buttons.get(card)
+            if btn is None:
+                self.card_statuses[card] = tk.BooleanVar()
+                btn = self._generate_card_button(card)
+                self.buttons[card] = btn
 
             row, col = grid_position.get_value()
             btn.grid(row=row, column=col, padx=2)
@@ -47,14 +71,8 @@ class Table(tk.Frame):
         self.callback(self.selected_cards())
 
     def _generate_card_button(self, card):
-        resized = card.image()
-        resized.thumbnail((140, 140), Image.ANTIALIAS)
-
-        decolor = ImageEnhance.Color(resized)
-        decolorized = decolor.enhance(0.2)
-
-        unselected_img = ImageTk.PhotoImage(decolorized)
-        selected_img = ImageTk.PhotoImage(resized)
+        unselected_img = IMAGES.photo(card, (140, 140), FADED)
+        selected_img = IMAGES.photo(card, (140, 140))
 
         btn = tk.Checkbutton(self,
                              image=unselected_img,
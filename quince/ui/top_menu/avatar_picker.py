@@ -5,7 +5,7 @@ to select an avatar image.
 import tkinter as tk
 from os import scandir, getcwd
 from os.path import join
-from PIL import Image, ImageTk
+from quince.ui.common.image_cache import IMAGES
 from quince.utility import GridPosition
 
 
@@ -62,9 +62,7 @@ class AvatarPicker(tk.Toplevel):
         grid_position = GridPosition(5)
         for path in paths:
             try:
-                img = Image.open(path)
-                img.thumbnail((65, 65), Image.ANTIALIAS)
-                image = ImageTk.PhotoImage(img)
+                image = IMAGES.photo(path, (65, 65))
             except Exception:
                 continue
 
@@ -12,8 +12,9 @@ at runtime.
 import tkinter as tk
 from os import getcwd
 from os.path import join
-from PIL import Image, ImageTk
-from quince.components import Player, NPC
+from quince.ai import DIFFICULTIES
+from quince.components import Player
+from quince.ui.common.image_cache import IMAGES
 from quince.ui.top_menu.avatar_picker import AvatarPicker
 from quince.ui.game_frame_factory import GameFrameFactory
 from quince.ui.top_menu.validating_entry import UserNameEntry
@@ -34,7 +35,7 @@ class TopMenu(tk.Frame):
         self.grid_rowconfigure(0, weight=1)  # header pad
         self.grid_rowconfigure(1, weight=0)  # avatar + username label
         self.grid_rowconfigure(2, weight=0)  # avatar + username entry
-        self.grid_rowconfigure(3, weight=0)  # avatar label
+        self.grid_rowconfigure(3, weight=0)  # avatar label + difficulty
         self.grid_rowconfigure(4, weight=0)  # start game btn
         self.grid_rowconfigure(5, weight=1)  # footer pad
         self.grid_columnconfigure(0, weight=1)
@@ -59,13 +60,16 @@ class TopMenu(tk.Frame):
                                         char_limit=12)
         self.name_entry.grid(row=2, column=2)
 
+        self.difficulty = tk.StringVar(self, value="Easy")
+        difficulty_menu = tk.OptionMenu(self, self.difficulty,
+                                        *DIFFICULTIES.keys())
+        difficulty_menu.grid(row=3, column=2)
+
         btn = tk.Button(self, text="New Game", command=self._start_game)
         btn.grid(row=4, column=1, columnspan=2, pady=64)
 
     def _display_avatar(self):
-        image = Image.open(self.avatar_path)
-        image.thumbnail((65, 65), Image.ANTIALIAS)
-        img = ImageTk.PhotoImage(image)
+        img = IMAGES.photo(self.avatar_path, (65, 65))
         self.avatar.destroy()
         self.avatar = tk.Label(self,
                                image=img,
@@ -100,9 +104,10 @@ class TopMenu(tk.Frame):
         user.set_image(self.avatar_path)
 
         path = join(getcwd(), "quince/assets/avatars")
-        npc1 = NPC("Roberto", f"{path}/avatar06.png")
-        npc2 = NPC("Gus", f"{path}/avatar08.png")
-        npc3 = NPC("Diana", f"{path}/avatar07.png")
+        npc_class = DIFFICULTIES[self.difficulty.get()]
+        npc1 = npc_class("Roberto", f"{path}/avatar06.png")
+        npc2 = npc_class("Gus", f"{path}/avatar08.png")
+        npc3 = npc_class("Diana", f"{path}/avatar07.png")
         game_frame_factory = GameFrameFactory(user, npc1, npc2, npc3)
 
         self.start_game(game_frame_factory)
@@ -1,5 +1,49 @@
 """Contains utility functions and classes used throughout project.
 """
+import hashlib
+import random as random
+
+
+def get_rng(seed=None):
+    """Returns a source of randomness.
+
+    Args:
+        seed - A random.Random instance, which is returned unchanged,
+        an int, str or bytes, which seeds a new random.Random,
+        or None (or the random module itself), to use the global state
+        of the random module.
+
+    Other seeds are rejected with TypeError: random.Random seeds them
+    from their hash, which changes from one process to the next.
+    """
+    if seed is None or seed is random:
+        return random
+    if isinstance(seed, random.Random):
+        return seed
+    if not isinstance(seed, (int, str, bytes, bytearray)):
+        raise TypeError(f"Cannot seed from {type(seed).__name__}; "
+                        "use an int, str or bytes")
+    return random.Random(seed)
+
+
+def spawn_seed(master_seed, *path):
+    """Derives an independent seed from a master seed.
+
+    Every different path (for example a game number, followed by the
+    name of a stream within that game) produces an unrelated 64 bit seed,
+    so streams can be created in any order, in any process, and always
+    be reproduced from the master seed and the path alone.
+
+    Args:
+        master_seed (int)
+        path - Any number of ints or strings identifying the stream
+
+    Returns:
+        int
+    """
+    key = "/".join(str(part) for part in (master_seed,) + path)
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
 
 
 def is_valid_pickup(player_card, mesa_cards):
@@ -15,6 +15,7 @@ DATA_FILES = [("quince", ["quince/assets"]),
               ]
 OPTIONS = {"iconfile": "quince/assets/favicon.icns"}
 PACKAGES = ["quince",
+            "quince.ai",
             "quince.components",
             "quince.ui",
             "quince.ui.common",
@@ -0,0 +1,152 @@
+import unittest
+import os
+import random
+import tempfile
+from quince.components import Card, Pila, Player, Ronda
+from quince.components.cardset import MOVE_SHIFT, encode_move
+from quince.components.symmetry import PERMUTATIONS, permute_mask
+from quince.ai.cache import (CachedISMCTSNPC, CachedRolloutNPC,
+                             DecisionCache, situation_key)
+from test.ai.test_rollout import known_ronda
+from test.components.test_symmetry import permuted_ronda
+
+
+class TestDecisionCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = DecisionCache(max_entries=2)
+        cache.store(1, 10)
+        cache.store(2, 20)
+        self.assertEqual(10, cache.lookup(1))
+        cache.store(3, 30)
+
+        # 2 was the least recently used
+        self.assertIsNone(cache.lookup(2))
+        self.assertEqual(10, cache.lookup(1))
+        self.assertEqual(30, cache.lookup(3))
+        self.assertEqual((3, 1, 1, 2, 0), tuple(cache.stats()))
+
+    def test_max_bytes(self):
+        cache = DecisionCache(max_bytes=1000)
+        self.assertLess(cache.max_entries, 10)
+        self.assertGreater(cache.max_entries, 0)
+
+    def test_move_zero(self):
+        """The 1 de oro dropped on its own packs to 0"""
+        cache = DecisionCache()
+        cache.store(5, 0)
+        self.assertEqual(0, cache.lookup(5))
+
+    def test_persistence(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "moves.cache")
+        rng = random.Random(0)
+        entries = {rng.getrandbits(64): rng.getrandbits(46)
+                   for _ in range(200)}
+
+        cache = DecisionCache()
+        for (key, move) in entries.items():
+            cache.store(key, move)
+        cache.save(path)
+        self.assertEqual(200 * 16, os.path.getsize(path))
+
+        loaded = DecisionCache(max_entries=10, path=path)
+        self.assertEqual(200, loaded.stats().saved_entries)
+        for (key, move) in entries.items():
+            self.assertEqual(move, loaded.lookup(key))
+        self.assertIsNone(loaded.lookup(12345))
+        self.assertEqual(10, len(loaded))
+
+        # saving again keeps the entries of the file
+        loaded.store(12345, 7)
+        loaded.save(path)
+        loaded.close()
+        merged = DecisionCache(path=path)
+        self.assertEqual(201, merged.stats().saved_entries)
+        self.assertEqual(7, merged.lookup(12345))
+        merged.close()
+
+    def test_empty_file(self):
+        path = os.path.join(tempfile.mkdtemp(), "moves.cache")
+        DecisionCache().save(path)
+        cache = DecisionCache(path=path)
+        self.assertIsNone(cache.lookup(1))
+        cache.close()
+
+
+class TestCachingNPC(unittest.TestCase):
+    def setUp(self):
+        self.npc = CachedRolloutNPC("npc", rng=0, rollouts=2)
+        players = [self.npc, Player("Bob"), Player("Carol")]
+        self.ronda = Ronda.start(players, players[2], rng=random.Random(4))
+
+    def test_permuted_situations_share_key(self):
+        (key, _) = situation_key(self.ronda, self.npc)
+        for permutation in PERMUTATIONS:
+            ronda = permuted_ronda(self.ronda, permutation)
+            self.assertEqual(key, situation_key(ronda, self.npc)[0])
+
+    def test_seats_matter(self):
+        """The same cards with a different player to move differ"""
+        other = self.ronda.players[1]
+        self.assertNotEqual(situation_key(self.ronda, self.npc)[0],
+                            situation_key(self.ronda, other)[0])
+
+    def test_replays_move(self):
+        hand = self.ronda.player_cards[self.npc]["hand"]
+        mesa = self.ronda.current_mesa
+        move = self.npc.get_move(hand, mesa, self.ronda)
+        self.assertEqual((0, 1), self.npc.cache.stats()[:2])
+
+        self.assertEqual(move, self.npc.get_move(hand, mesa, self.ronda))
+        self.assertEqual((1, 1), self.npc.cache.stats()[:2])
+
+    def test_permuted_hit_is_legal(self):
+        """A move found in another order of the suits is mapped back
+        to the cards of the situation at hand
+        """
+        npc = CachedRolloutNPC("npc", rng=1, rollouts=20)
+        other = Player("other")
+        # the 7 de copa sweeps the mesa, 7 de velo included
+        hands = [[Card(7, "copa"), Card(2, "basto"), Card(3, "espada")],
+                 [Card(4, "copa"), Card(9, "oro"), Card(6, "copa")]]
+        pilas = [Pila(), Pila().add([Card(1, "copa"), Card(4, "oro")])]
+        mesa = [Card(7, "oro"), Card(1, "basto")]
+        base = known_ronda([npc, other], hands, pilas, mesa)
+
+        for permutation in PERMUTATIONS:
+            ronda = permuted_ronda(base, permutation)
+            hand = ronda.player_cards[npc]["hand"]
+            (card, captured) = npc.get_move(hand, ronda.current_mesa,
+                                            ronda)
+            self.assertIn(card, hand)
+            self.assertTrue(captured)
+            for picked in captured:
+                self.assertIn(picked, ronda.current_mesa)
+            self.assertEqual(15, card.value + sum(picked.value
+                                                  for picked in captured))
+        self.assertEqual(len(PERMUTATIONS) - 1, npc.cache.stats().hits)
+
+    def test_shared_cache(self):
+        cache = DecisionCache()
+        npc = CachedISMCTSNPC("npc", rng=0, iterations=5, time_budget=None,
+                              cache=cache)
+        self.assertIs(cache, npc.cache)
+
+    def test_without_ronda(self):
+        hand = [Card(7, "copa"), Card(2, "basto")]
+        mesa = [Card(8, "oro")]
+        (card, captured) = self.npc.get_move(hand, mesa)
+        self.assertEqual(Card(7, "copa"), card)
+        self.assertEqual(0, len(self.npc.cache))
+
+    def test_stored_in_canonical_order(self):
+        (key, permutation) = situation_key(self.ronda, self.npc)
+        hand = self.ronda.player_cards[self.npc]["hand"]
+        (card, captured) = self.npc.get_move(hand, self.ronda.current_mesa,
+                                             self.ronda)
+        stored = self.npc.cache.lookup(key)
+        self.assertEqual(permute_mask(encode_move(card, captured)
+                                      >> MOVE_SHIFT, permutation),
+                         stored >> MOVE_SHIFT)
+        self.assertEqual(permute_mask(1 << card.index, permutation),
+                         1 << (stored & (1 << MOVE_SHIFT) - 1))
@@ -0,0 +1,272 @@
+import unittest
+import random
+from quince.components import Card, Deck, NPC, Pila, Player, Ronda
+from quince.components.cardset import FULL, cards_in, mask_of
+from quince.ai.endgame import (best_move, endgames, is_endgame,
+                               is_solvable, points, summarize,
+                               SearchLimitReached, SOLVABLE_CARDS)
+from quince.ai.rollout import RolloutNPC
+from quince.ai.ismcts import ISMCTSNPC
+from quince.cpu import random_possibility
+
+
+def random_turn(ronda, rng):
+    """Plays a random move for the player whose turn it is."""
+    hand = ronda.player_cards[ronda.current_player]["hand"]
+    move = random_possibility(ronda.current_mesa, hand, rng)
+    if move:
+        return ronda.play_turn(move[0], move[1:])
+    return ronda.play_turn(rng.choice(hand))
+
+
+def final_deal(players, seed, remaining=None):
+    """A ronda played at random until its deck is empty and, if given,
+    until only a number of cards are left in the players' hands.
+    """
+    rng = random.Random(seed)
+    ronda = Ronda.start(players, players[-1], rng=rng)
+    while not is_endgame(ronda):
+        ronda = random_turn(ronda, rng)
+
+    if remaining is not None:
+        while sum(len(ronda.player_cards[player]["hand"])
+                  for player in players) > remaining:
+            ronda = random_turn(ronda, rng)
+    return ronda
+
+
+def play(ronda, move):
+    """Plays a move of an Endgame in a Ronda."""
+    (index, picked) = move
+    [card] = cards_in(1 << index, Card)
+    return ronda.play_turn(card, cards_in(picked, Card))
+
+
+def minimax(endgame):
+    """Value of an endgame found without any pruning."""
+    if endgame.is_over():
+        return endgame.value()
+
+    values = []
+    for move in endgame.moves():
+        endgame.play(move)
+        values.append(minimax(endgame))
+        endgame.undo(move)
+
+    if endgame.current == endgame.root:
+        return max(values)
+    return min(values)
+
+
+class TestPoints(unittest.TestCase):
+    def test_matches_ronda(self):
+        """Points from summaries agree with Ronda.points"""
+        for (size, seed) in [(2, 0), (2, 1), (3, 2), (4, 3), (4, 4)]:
+            players = [Player(str(seat)) for seat in range(size)]
+            ronda = final_deal(players, seed, remaining=0)
+            self.assertTrue(ronda.is_finished)
+
+            summaries = [summarize(ronda.player_cards[player]["pila"])
+                         for player in players]
+            expected = ronda.points()
+            self.assertEqual([expected[player] for player in players],
+                             points(summaries))
+
+    def test_ties(self):
+        """Ties for most cards, most oros and setenta all earn the point"""
+        summary = (20, 5, False, 21, 21, 21, 21, 0)
+        self.assertEqual([3, 3], points([summary, summary]))
+
+
+class TestEndgame(unittest.TestCase):
+    def setUp(self):
+        self.players = [Player("Alice"), Player("Bob")]
+        self.ronda = final_deal(self.players, 5)
+        self.current = self.ronda.current_player
+        [self.endgame] = endgames(self.ronda, self.current)
+
+    def test_is_endgame(self):
+        start = Ronda.start(self.players, self.players[1],
+                            rng=random.Random(0))
+        self.assertFalse(is_endgame(start))
+        self.assertTrue(is_endgame(self.ronda))
+        self.assertFalse(is_endgame(final_deal(self.players, 5,
+                                               remaining=0)))
+
+    def test_is_solvable(self):
+        """The whole last deal of two players is solved, but only the
+        end of that of four
+        """
+        self.assertTrue(is_solvable(self.ronda))
+
+        players = [Player(str(seat)) for seat in range(4)]
+        self.assertFalse(is_solvable(final_deal(players, 0)))
+        self.assertTrue(is_solvable(final_deal(players, 0,
+                                               remaining=SOLVABLE_CARDS)))
+
+    def test_shared_tables(self):
+        """Splits sharing a transposition table find the same values
+        as splits searched on their own
+        """
+        players = [Player(str(seat)) for seat in range(4)]
+        ronda = final_deal(players, 3, remaining=SOLVABLE_CARDS)
+        alone = endgames(ronda, ronda.current_player, random.Random(1))
+        shared = endgames(ronda, ronda.current_player, random.Random(1))
+        for endgame in shared[1:]:
+            endgame.share_tables(shared[0])
+
+        for (first, second) in zip(alone, shared):
+            self.assertEqual(first.root_values(), second.root_values())
+
+    def test_exact_hands(self):
+        """With a single opponent, its hand is the unseen cards"""
+        seat = self.players.index(self.current)
+        for (other, hand) in zip(self.players, self.endgame.hands):
+            self.assertEqual(mask_of(self.ronda.player_cards[other]["hand"]),
+                             hand)
+        self.assertEqual(seat, self.endgame.root)
+
+    def test_undo(self):
+        """Undoing moves restores the position and its key"""
+        key = self.endgame.key
+        rng = random.Random(0)
+        played = []
+        for _ in range(3):
+            move = rng.choice(self.endgame.moves())
+            self.endgame.play(move)
+            played.append(move)
+        self.assertNotEqual(key, self.endgame.key)
+
+        for move in reversed(played):
+            self.endgame.undo(move)
+        self.assertEqual(key, self.endgame.key)
+        self.assertEqual(self.ronda.mesa_mask, self.endgame.mesa)
+
+    def test_key_after_moves(self):
+        """Keys kept up to date as moves are played match those of
+        endgames built from scratch, and those of the ronda
+        """
+        rng = random.Random(1)
+        ronda = self.ronda
+        for _ in range(3):
+            move = rng.choice(self.endgame.moves())
+            self.endgame.play(move)
+            ronda = play(ronda, move)
+
+            [fresh] = endgames(ronda, ronda.current_player)
+            self.assertEqual(fresh.key, self.endgame.key)
+            self.assertEqual(ronda.key, self.endgame.key)
+
+    def test_value_matches_ronda(self):
+        """Playing to the end gives the margin Ronda.points reports"""
+        rng = random.Random(2)
+        ronda = self.ronda
+        while not self.endgame.is_over():
+            move = rng.choice(self.endgame.moves())
+            self.endgame.play(move)
+            ronda = play(ronda, move)
+
+        earned = ronda.points()
+        others = [earned[player] for player in self.players
+                  if player is not self.current]
+        self.assertEqual(earned[self.current] - max(others),
+                         self.endgame.value())
+
+    def test_search_matches_minimax(self):
+        """Pruning and transpositions do not change the value found"""
+        cases = [(2, 6, None), (2, 7, None), (3, 8, 6), (4, 9, 7),
+                 (4, 10, 8)]
+        for (size, seed, remaining) in cases:
+            players = [Player(str(seat)) for seat in range(size)]
+            ronda = final_deal(players, seed, remaining)
+            for endgame in endgames(ronda, ronda.current_player,
+                                    random.Random(seed), samples=2):
+                values = endgame.root_values()
+                for (move, value) in values.items():
+                    endgame.play(move)
+                    self.assertEqual(minimax(endgame), value)
+                    endgame.undo(move)
+
+    def test_node_limit(self):
+        """Searches stop once they have used up their nodes"""
+        players = [Player(str(seat)) for seat in range(4)]
+        ronda = final_deal(players, 0)
+        [endgame] = endgames(ronda, ronda.current_player,
+                             random.Random(0), samples=1)
+        endgame.set_limits(node_limit=100)
+        with self.assertRaises(SearchLimitReached):
+            endgame.root_values()
+        self.assertEqual(100, endgame.nodes)
+
+
+class TestBestMove(unittest.TestCase):
+    def setUp(self):
+        self.other = NPC("other")
+        self.hand = [Card(7, "copa"), Card(2, "basto")]
+        self.mesa = [Card(7, "oro"), Card(1, "basto")]
+        self.other_hand = [Card(4, "copa"), Card(9, "oro")]
+
+    def last_deal(self, player):
+        """A ronda on its last deal, where player can sweep the mesa."""
+        seen = mask_of(self.hand + self.mesa + self.other_hand)
+        rest = cards_in(FULL & ~seen, Card)
+        player_cards = {
+            player: {"hand": tuple(self.hand), "pila": Pila().add(rest[:18])},
+            self.other: {"hand": tuple(self.other_hand),
+                         "pila": Pila().add(rest[18:])}}
+        return Ronda(current_player=player,
+                     dealer=self.other,
+                     deck=Deck.from_order(Card, []),
+                     last_pickup=self.other,
+                     mesa=self.mesa,
+                     players=[player, self.other],
+                     player_cards=player_cards)
+
+    def test_moves(self):
+        """The escoba is tried first, before dropping either card"""
+        npc = NPC("npc")
+        [endgame] = endgames(self.last_deal(npc), npc)
+        moves = endgame.moves()
+        self.assertEqual(3, len(moves))
+        self.assertEqual(mask_of(self.mesa), moves[0][1])
+
+    def test_takes_escoba(self):
+        """Sweeping the mesa, 7 de velo included, beats dropping a card"""
+        npc = NPC("npc")
+        ronda = self.last_deal(npc)
+        self.assertTrue(is_endgame(ronda))
+
+        (card, captured) = best_move(ronda, npc)
+        self.assertEqual(Card(7, "copa"), card)
+        self.assertEqual(set(self.mesa), set(captured))
+
+    def test_npcs_switch_to_search(self):
+        """Computer players use the exact search on the last deal, even
+        with budgets too small to find the escoba by sampling
+        """
+        for npc in [RolloutNPC("npc", rng=0, rollouts=1),
+                    ISMCTSNPC("npc", rng=0, iterations=1,
+                              time_budget=None)]:
+            ronda = self.last_deal(npc)
+            (card, captured) = npc.get_move(self.hand, self.mesa, ronda)
+            self.assertEqual(Card(7, "copa"), card)
+            self.assertEqual(set(self.mesa), set(captured))
+
+    def test_gives_up(self):
+        """Without a split solved in time there is no best move.
+        Computer players estimate one instead, without searching deals
+        that large at all.
+        """
+        for npc in [RolloutNPC("npc", rng=0, rollouts=2),
+                    ISMCTSNPC("npc", rng=0, iterations=2,
+                              time_budget=None)]:
+            players = [npc, NPC("a"), NPC("b"), NPC("c")]
+            ronda = final_deal(players, 1)
+            self.assertIs(npc, ronda.current_player)
+            self.assertIsNone(best_move(ronda, npc, random.Random(0)))
+            self.assertFalse(is_solvable(ronda))
+
+            hand = ronda.player_cards[npc]["hand"]
+            (card, captured) = npc.get_move(hand, ronda.current_mesa, ronda)
+            self.assertTrue(card in hand)
+            self.assertTrue(set(captured) <= set(ronda.current_mesa))
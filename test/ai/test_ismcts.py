@@ -0,0 +1,79 @@
+import unittest
+import random
+from quince.components import Card, Pila, Player, NPC, Ronda
+from quince.components.cardset import decode_move, encode_move
+from quince.ai.ismcts import ISMCTSNPC, Tree, ROOT, NO_NODE, search
+from quince.ai.rollout import observe
+from test.ai.test_rollout import known_ronda
+
+
+class TestTree(unittest.TestCase):
+    def test_add(self):
+        tree = Tree()
+        first = tree.add(ROOT, 11, 0)
+        second = tree.add(ROOT, 22, 0)
+        grandchild = tree.add(first, 33, 1)
+
+        self.assertEqual(4, len(tree))
+        self.assertEqual([second, first], list(tree.children(ROOT)))
+        self.assertEqual([grandchild], list(tree.children(first)))
+        self.assertEqual(first, tree.parent[grandchild])
+        self.assertEqual(NO_NODE, tree.parent[ROOT])
+        self.assertEqual(33, tree.move[grandchild])
+
+    def test_most_visited(self):
+        tree = Tree()
+        first = tree.add(ROOT, 11, 0)
+        second = tree.add(ROOT, 22, 0)
+        tree.visits[first] = 3
+        tree.visits[second] = 5
+        self.assertEqual(second, tree.most_visited(ROOT))
+
+
+class TestSearch(unittest.TestCase):
+    def setUp(self):
+        self.players = [Player("Alice"), Player("Bob")]
+        self.ronda = Ronda.start(self.players, self.players[1],
+                                 rng=random.Random(8))
+        self.situation = observe(self.ronda, self.players[0])
+
+    def test_iterations(self):
+        """Every iteration visits exactly one of the root's children"""
+        tree = search(self.situation, random.Random(1), iterations=50)
+        visits = sum(tree.visits[child] for child in tree.children(ROOT))
+        self.assertEqual(50, visits)
+
+    def test_root_moves(self):
+        """The root's children are moves of the player who searched"""
+        tree = search(self.situation, random.Random(1), iterations=50)
+        hand = self.ronda.player_cards[self.players[0]]["hand"]
+        for child in tree.children(ROOT):
+            self.assertEqual(0, tree.seat[child])
+            (card, _) = decode_move(tree.move[child], Card)
+            self.assertIn(card, hand)
+
+    def test_seeded(self):
+        first = search(self.situation, random.Random(2), iterations=30)
+        second = search(self.situation, random.Random(2), iterations=30)
+        self.assertEqual(list(first.move), list(second.move))
+        self.assertEqual(list(first.reward), list(second.reward))
+
+    def test_budget_required(self):
+        with self.assertRaises(ValueError):
+            search(self.situation, random.Random(1))
+
+
+class TestISMCTSNPC(unittest.TestCase):
+    def test_takes_escoba(self):
+        """Sweeping the mesa, 7 de velo included, beats dropping a card"""
+        npc = ISMCTSNPC("npc", rng=1, iterations=300, time_budget=None)
+        other = NPC("other")
+        hand = [Card(7, "copa"), Card(2, "basto"), Card(3, "espada")]
+        mesa = [Card(7, "oro"), Card(1, "basto")]
+        hands = [hand, [Card(4, "copa"), Card(9, "oro"), Card(6, "copa")]]
+        pilas = [Pila(), Pila().add([Card(1, "copa"), Card(4, "oro")])]
+        ronda = known_ronda([npc, other], hands, pilas, mesa)
+
+        move = npc.get_move(hand, mesa, ronda)
+        self.assertEqual(encode_move(Card(7, "copa"), mesa),
+                         encode_move(move[0], move[1]))
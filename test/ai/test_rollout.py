@@ -0,0 +1,144 @@
+import unittest
+import random
+from quince.components import Card, Deck, Pila, Player, NPC, Ronda
+from quince.components.cardset import FULL, cards_in, mask_of
+from quince.ai.rollout import (RolloutNPC, observe, determinize,
+                               candidate_moves, evaluate,
+                               interchangeable_cards)
+
+
+def known_ronda(players, hands, pilas, mesa):
+    """A ronda in progress, with the rest of the cards
+    in the deck in canonical order.
+    """
+    used = mask_of(mesa)
+    for (hand, pila) in zip(hands, pilas):
+        used |= mask_of(hand) | pila.mask
+
+    rest = cards_in(FULL & ~used, Card)
+    player_cards = {player: {"hand": tuple(hand), "pila": pila}
+                    for (player, hand, pila) in zip(players, hands, pilas)}
+    return Ronda(current_player=players[0],
+                 dealer=players[-1],
+                 deck=Deck.from_order(Card, rest),
+                 last_pickup=players[-1],
+                 mesa=mesa,
+                 players=players,
+                 player_cards=player_cards)
+
+
+class TestRollout(unittest.TestCase):
+    def setUp(self):
+        self.players = [Player("Alice"), Player("Bob"), Player("Carol")]
+        self.ronda = Ronda.start(self.players, self.players[2],
+                                 rng=random.Random(4))
+        self.ronda = self.ronda.play_turn(
+            self.ronda.player_cards[self.players[0]]["hand"][0])
+
+    def test_observe(self):
+        situation = observe(self.ronda, self.players[1])
+        self.assertEqual(1, situation.seat)
+        self.assertEqual(2, situation.dealer)
+        self.assertEqual((2, 3, 3), situation.hand_sizes)
+        self.assertEqual(self.ronda.mesa_mask, situation.mesa)
+
+    def test_determinize(self):
+        """Unseen cards are dealt to the other players and the deck"""
+        situation = observe(self.ronda, self.players[1])
+        ronda = determinize(situation, random.Random(0))
+
+        self.assertEqual(1, ronda.current_player)
+        self.assertEqual(situation.hand, ronda.player_cards[1]["hand"])
+        self.assertEqual(situation.mesa, ronda.mesa_mask)
+
+        masks = [ronda.deck.mask(), ronda.mesa_mask]
+        for seat in range(3):
+            self.assertEqual(situation.hand_sizes[seat],
+                             len(ronda.player_cards[seat]["hand"]))
+            masks.append(ronda.hand_mask(seat))
+            masks.append(ronda.player_cards[seat]["pila"].mask)
+
+        union = 0
+        for mask in masks:
+            self.assertFalse(union & mask)
+            union |= mask
+        self.assertEqual(FULL, union)
+
+    def test_candidate_moves(self):
+        hand = [Card(5, "oro"), Card(2, "copa")]
+        mesa = [Card(10, "oro")]
+        self.assertEqual([(Card(5, "oro"), (Card(10, "oro"),)),
+                          (Card(5, "oro"), ()),
+                          (Card(2, "copa"), ())],
+                         candidate_moves(hand, mesa))
+
+    def test_interchangeable_cards(self):
+        """Cards that cannot beat any pila's best card of their suit"""
+        pilas = [Pila().add([Card(7, "copa"), Card(1, "basto")]),
+                 Pila().add([Card(6, "copa"), Card(1, "espada")])]
+        interchangeable = interchangeable_cards(pilas)
+
+        # the 6 ties the worst of the best copas, and oros never count
+        self.assertTrue(mask_of([Card(6, "copa"), Card(3, "copa")])
+                        & interchangeable == mask_of([Card(6, "copa"),
+                                                      Card(3, "copa")]))
+        self.assertFalse(mask_of([Card(7, "copa"), Card(2, "oro"),
+                                  Card(2, "basto"), Card(2, "espada")])
+                         & interchangeable)
+
+        # the pilas only have one card of basto and espada between them
+        self.assertEqual(0, interchangeable_cards(pilas[:1] + [Pila()]))
+
+    def test_grouped_candidate_moves(self):
+        hand = [Card(10, "copa"), Card(3, "basto")]
+        mesa = [Card(5, "copa"), Card(5, "espada")]
+        interchangeable = mask_of(mesa)
+        self.assertEqual(4, len(candidate_moves(hand, mesa)))
+        self.assertEqual([(Card(10, "copa"), (Card(5, "espada"),)),
+                          (Card(10, "copa"), ()),
+                          (Card(3, "basto"), ())],
+                         candidate_moves(hand, mesa, interchangeable))
+
+    def test_evaluate_is_seeded(self):
+        situation = observe(self.ronda, self.players[1])
+        moves = candidate_moves(situation.hand, self.ronda.current_mesa)
+        self.assertEqual(evaluate(situation, moves, 3, 7),
+                         evaluate(situation, moves, 3, 7))
+
+
+class TestRolloutNPC(unittest.TestCase):
+    def test_takes_escoba(self):
+        """Sweeping the mesa, 7 de velo included, beats dropping a card"""
+        npc = RolloutNPC("npc", rng=1, rollouts=20, time_budget=60)
+        other = NPC("other")
+        hand = [Card(7, "copa"), Card(2, "basto"), Card(3, "espada")]
+        mesa = [Card(7, "oro"), Card(1, "basto")]
+        hands = [hand, [Card(4, "copa"), Card(9, "oro"), Card(6, "copa")]]
+        pilas = [Pila(), Pila().add([Card(1, "copa"), Card(4, "oro")])]
+        ronda = known_ronda([npc, other], hands, pilas, mesa)
+
+        (card, captured) = npc.get_move(hand, mesa, ronda)
+        self.assertEqual(Card(7, "copa"), card)
+        self.assertEqual(mesa, captured)
+
+    def test_without_time_budget(self):
+        """Without a time budget, every deal is played out and the
+        moves chosen only depend on the seed
+        """
+        chosen = []
+        for _ in range(2):
+            npc = RolloutNPC("npc", rng=3, rollouts=30, batch=7,
+                             time_budget=None)
+            players = [npc, NPC("b"), NPC("c")]
+            ronda = Ronda.start(players, players[2], rng=random.Random(4))
+            move = npc.get_move(ronda.player_cards[npc]["hand"],
+                                ronda.current_mesa, ronda)
+            chosen.append((move, npc.rng.random()))
+        self.assertEqual(chosen[0], chosen[1])
+
+    def test_without_ronda(self):
+        """Falls back to playing at random"""
+        npc = RolloutNPC("npc", rng=1)
+        hand = [Card(5, "oro")]
+        mesa = [Card(10, "oro")]
+        self.assertEqual((hand[0], mesa), npc.get_move(hand, mesa))
@@ -1,4 +1,6 @@
 import unittest
+import copy
+import pickle
 from quince.components import Card
 
 
@@ -14,14 +16,27 @@ class TestCard(unittest.TestCase):
             c = Card(13, "espada")
 
     def test_clone(self):
-        """Clones a card"""
+        """Cards are immutable, so a clone is the card itself"""
         c = Card(1, "oro")
         d = c.clone()
-
-        c.value = 3
+        self.assertIs(c, d)
         self.assertEqual(1, d.value)
         self.assertEqual("oro", d.suit)
 
+        with self.assertRaises(AttributeError):
+            c.value = 3
+
+    def test_interned(self):
+        """There is exactly one instance of each card"""
+        self.assertIs(Card(3, "copa"), Card(3, "copa"))
+        self.assertNotEqual(Card(3, "copa"), Card(3, "oro"))
+        self.assertEqual(Card(3, "copa").index, hash(Card(3, "copa")))
+
+        card = Card(6, "basto")
+        self.assertIs(card, copy.copy(card))
+        self.assertIs(card, copy.deepcopy(card))
+        self.assertIs(card, pickle.loads(pickle.dumps(card)))
+
     def test_image(self):
         """Returns an image for the card"""
         card = Card(10, "oro")
@@ -0,0 +1,53 @@
+import unittest
+from quince.components import Card, Deck
+from quince.components import cardset
+
+
+class TestCardSet(unittest.TestCase):
+    def test_card_index(self):
+        """Every card in the deck is assigned a different bit"""
+        indices = set(card.index for card in Deck(Card).cards())
+        self.assertEqual(set(range(40)), indices)
+
+        with self.assertRaises(ValueError):
+            cardset.card_index(1, "diamantes")
+
+    def test_index_roundtrip(self):
+        """Bit positions map back to the value and suit of the card"""
+        card = Card(9, "espada")
+        self.assertEqual(9, cardset.index_value(card.index))
+        self.assertEqual("espada", cardset.index_suit(card.index))
+
+    def test_mask_of(self):
+        cards = [Card(1, "oro"), Card(10, "copa"), Card(5, "basto")]
+        mask = cardset.mask_of(cards)
+        self.assertEqual(3, cardset.count(mask))
+        for card in cards:
+            self.assertTrue(mask & card.mask)
+        self.assertFalse(mask & Card(5, "espada").mask)
+
+    def test_count(self):
+        self.assertEqual(0, cardset.count(cardset.EMPTY))
+        self.assertEqual(40, cardset.count(cardset.FULL))
+        self.assertEqual(10, cardset.count(cardset.SUIT_MASKS["copa"]))
+        self.assertEqual(4, cardset.count(cardset.VALUE_MASKS[7]))
+
+    def test_value_sum(self):
+        mask = cardset.mask_of([Card(7, "oro"), Card(8, "copa")])
+        self.assertEqual(15, cardset.value_sum(mask))
+
+    def test_cards_in(self):
+        """Rebuilds the cards in a mask, sorted by suit and value"""
+        cards = [Card(4, "copa"), Card(2, "oro"), Card(1, "copa")]
+        rebuilt = cardset.cards_in(cardset.mask_of(cards), Card)
+        self.assertEqual([Card(2, "oro"), Card(1, "copa"), Card(4, "copa")],
+                         rebuilt)
+
+    def test_move_roundtrip(self):
+        card = Card(8, "copa")
+        captured = (Card(3, "oro"), Card(4, "espada"))
+        move = cardset.encode_move(card, captured)
+        self.assertEqual((card, captured), cardset.decode_move(move, Card))
+
+        drop = cardset.encode_move(Card(1, "oro"), ())
+        self.assertEqual((Card(1, "oro"), ()), cardset.decode_move(drop, Card))
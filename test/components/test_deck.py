@@ -28,8 +28,8 @@ class TestDeck(unittest.TestCase):
         """Returns a copy of the deck"""
         deck = Deck(Card)
         cards = deck.cards()
-        cards[0].value = 20
-        self.assertNotEqual(20, deck._cards[0].value)
+        cards.pop()
+        self.assertEqual(40, len(deck.cards()))
 
     def test_deal(self):
         """Returns a new deck object and a hand List
@@ -40,7 +40,7 @@ class TestDeck(unittest.TestCase):
         self.assertEqual(4, len(hand))
 
         for c in hand:
-            self.assertTrue(c not in deck2._cards)
+            self.assertTrue(c not in deck2.cards())
 
     def test_str(self):
         """String representation"""
@@ -58,7 +58,7 @@ class TestDeck(unittest.TestCase):
     def test_generate_clone(self):
         """Builds a clone of an existing deck, if one is passed."""
         d1 = Deck(Card)
-        d1._cards = d1._cards[20:]
+        d1.deal(20)
 
         # instantiate a clone
         d2 = Deck(Card, clone=d1)
@@ -69,5 +69,58 @@ class TestDeck(unittest.TestCase):
         self.assertEqual(cards_in_d1, cards_in_d2)
 
         # check that it really is a clone
-        d1._cards[0].value = 14
-        self.assertNotEqual(14, d2._cards[0].value)
+        d1.deal(5)
+        self.assertEqual(20, len(d2.cards()))
+
+    def test_split(self):
+        """Deals without modifying the original deck"""
+        deck = Deck(Card)
+        (deck2, hand) = deck.split(3)
+        self.assertEqual(40, len(deck.cards()))
+        self.assertEqual(37, len(deck2.cards()))
+        self.assertEqual(deck.cards()[:3], hand)
+        self.assertEqual(deck.cards()[3:], deck2.cards())
+
+    def test_remaining(self):
+        """Counts the cards left to deal"""
+        deck = Deck(Card)
+        self.assertEqual(40, deck.remaining())
+        self.assertFalse(deck.is_empty())
+
+        (deck2, _) = deck.split(37)
+        self.assertEqual(3, deck2.remaining())
+        self.assertFalse(deck2.is_empty())
+
+        (deck3, hand) = deck2.split(5)
+        self.assertEqual(3, len(hand))
+        self.assertEqual(0, deck3.remaining())
+        self.assertTrue(deck3.is_empty())
+        self.assertEqual([], deck3.cards())
+
+    def test_seeded(self):
+        """Decks shuffled with the same seed are identical"""
+        self.assertEqual(Deck(Card, rng=12).cards(),
+                         Deck(Card, rng=12).cards())
+        self.assertNotEqual(Deck(Card, rng=12).cards(),
+                            Deck(Card, rng=13).cards())
+
+    def test_from_order(self):
+        """Decks can be built to deal a known order of cards"""
+        cards = [Card(3, "oro"), Card(7, "copa"), Card(1, "basto")]
+        deck = Deck.from_order(Card, cards)
+        self.assertEqual(cards, deck.cards())
+        (deck, hand) = deck.deal(2)
+        self.assertEqual(cards[:2], hand)
+        self.assertEqual(1, deck.remaining())
+
+    def test_from_indices(self):
+        """Decks can deal the cards at a list of indices"""
+        cards = [Card(3, "oro"), Card(7, "copa"), Card(1, "basto")]
+        deck = Deck.from_indices(Card, [card.index for card in cards])
+        self.assertEqual(3, deck.remaining())
+        self.assertEqual(cards, deck.cards())
+        self.assertEqual(cards[0].mask | cards[1].mask | cards[2].mask,
+                         deck.mask())
+        (deck, hand) = deck.deal(2)
+        self.assertEqual(cards[:2], hand)
+        self.assertEqual([cards[2]], deck.cards())
@@ -67,7 +67,7 @@ class TestPila(unittest.TestCase):
         card3 = Card(5, "espada")
         card4 = Card(1, "oro")
         card5 = Card(3, "copa")
-        card6 = Card(5, "espada")
+        card6 = Card(6, "espada")
         pila2 = pila.add([card1, card2])
         self.assertEqual(2, pila2.total_cards())
 
@@ -154,3 +154,36 @@ class TestPila(unittest.TestCase):
         setenta = [f"{x.value}-{x.suit}" for x in pila2.best_setenta()]
         self.assertTrue("1-copa" in setenta)
         self.assertTrue("7-oro" in setenta)
+
+    def test_summary(self):
+        """Running totals match the cards in the pila"""
+        pila = Pila()
+        self.assertEqual((0, 0, 0, False, 0), pila.summary())
+
+        pila2 = pila.add([Card(7, "oro"), Card(8, "copa")], True)
+        pila3 = pila2.add([Card(1, "basto"), Card(6, "espada"),
+                           Card(1, "copa"), Card(2, "oro")])
+        summary = pila3.summary()
+        self.assertEqual(6, summary.total_cards)
+        self.assertEqual(2, summary.total_oros)
+        self.assertEqual(17.5 + 11 + 14 + 11, summary.setenta)
+        self.assertTrue(summary.siete_de_velo)
+        self.assertEqual(1, summary.escobas)
+
+        # the earlier pila is unchanged
+        self.assertEqual((2, 1, 0, True, 1), pila2.summary())
+
+    def test_add_existing_card(self):
+        """Cards already in the pila are not counted twice"""
+        pila = Pila().add([Card(3, "oro")]).add([Card(3, "oro")])
+        self.assertEqual(1, pila.total_cards())
+        self.assertEqual(1, pila.total_oros())
+
+    def test_constructor_tallies_cards(self):
+        """Pilas built from a dictionary of cards have the same totals"""
+        cards = [Card(9, "basto"), Card(7, "oro"), Card(1, "espada"),
+                 Card(5, "copa"), Card(4, "oro")]
+        pila = Pila().add(cards, True)
+        rebuilt = Pila(pila.get_cards(), escobas=1)
+        self.assertEqual(pila.summary(), rebuilt.summary())
+        self.assertEqual(pila.best_setenta(), rebuilt.best_setenta())
@@ -52,3 +52,14 @@ class TestNPC(unittest.TestCase):
         (from_hand, from_mesa) = npc.get_move(hand, mesa)
         self.assertEqual(a, from_hand)
         self.assertFalse(from_mesa)
+
+    def test_get_move_seeded(self):
+        """NPCs seeded alike make the same choices."""
+        hand = [Card(5, "oro"), Card(2, "copa"), Card(8, "basto")]
+        mesa = [Card(10, "copa"), Card(3, "oro"), Card(7, "espada"),
+                Card(5, "basto"), Card(10, "espada")]
+        first = NPC("first", rng=5)
+        second = NPC("second", rng=5)
+        for _ in range(10):
+            self.assertEqual(first.get_move(hand, mesa),
+                             second.get_move(hand, mesa))
@@ -1,7 +1,8 @@
 import unittest
 import random
 from quince.components import Deck, Player, Card, Pila
-from quince.components.ronda import Ronda
+from quince.components.ronda import Ronda, NothingToUndoError
+from quince.cpu import enumerate_possibilities
 
 
 class TestRonda(unittest.TestCase):
@@ -276,3 +277,200 @@ class TestRonda(unittest.TestCase):
         newronda = ronda.play_turn(Card(5, "oro"), [rey])
         escobas = newronda._player_cards[bob]["pila"].escobas
         self.assertEqual(1, escobas)
+
+
+def ronda_state(ronda):
+    """Summarizes the state of a ronda, for comparisons"""
+    cards = {player.id: (ronda.hand_mask(player),
+                         val["pila"].mask,
+                         val["pila"].escobas)
+             for (player, val) in ronda.player_cards.items()}
+    return (ronda.current_player.id, ronda.last_picked_up.id,
+            ronda.mesa_mask, ronda.deck.remaining(), cards)
+
+
+def first_move(ronda):
+    """Picks the first capture available, or drops the first card"""
+    hand = ronda.player_cards[ronda.current_player]["hand"]
+    mesa = ronda.current_mesa
+    options = enumerate_possibilities(mesa, hand)
+    if options:
+        return (options[0][0], list(options[0][1:]))
+    return (hand[0], [])
+
+
+class TestMutableRonda(unittest.TestCase):
+    def test_play_turn_in_place(self):
+        """Mutable rondas apply turns to themselves"""
+        random.seed(0)
+        alice = Player("Alice")
+        bob = Player("Bob")
+        ronda = Ronda.start([alice, bob], alice, mutable=True)
+        self.assertTrue(ronda.is_mutable)
+
+        same = ronda.play_turn(Card(6, "basto"), [Card(9, "espada")])
+        self.assertIs(ronda, same)
+        self.assertTrue(Card(9, "espada") not in ronda.current_mesa)
+        self.assertEqual(alice, ronda.current_player)
+        self.assertEqual(bob, ronda.last_picked_up)
+
+    def test_matches_immutable(self):
+        """Playing in place gives the same states as creating new rondas"""
+        players = [Player("Alice"), Player("Bob"), Player("Charlie")]
+
+        random.seed(5)
+        ronda = Ronda.start(players, players[0])
+        random.seed(5)
+        mutable = Ronda.start(players, players[0], mutable=True)
+
+        while not ronda.is_finished:
+            self.assertEqual(ronda_state(ronda), ronda_state(mutable))
+            (own_card, mesa_cards) = first_move(ronda)
+            ronda = ronda.play_turn(own_card, mesa_cards)
+            mutable.play_turn(own_card, mesa_cards)
+
+        self.assertTrue(mutable.is_finished)
+        self.assertEqual(ronda_state(ronda), ronda_state(mutable))
+
+    def test_undo(self):
+        """Undo reverts every turn, including deals and the final sweep"""
+        random.seed(11)
+        players = [Player("Alice"), Player("Bob")]
+        ronda = Ronda.start(players, players[1], mutable=True)
+
+        history = []
+        while not ronda.is_finished:
+            history.append(ronda_state(ronda))
+            ronda.play_turn(*first_move(ronda))
+
+        while history:
+            ronda.undo()
+            self.assertEqual(history.pop(), ronda_state(ronda))
+
+        with self.assertRaises(NothingToUndoError):
+            ronda.undo()
+
+    def test_mutable_copy(self):
+        """Copies can be played without affecting the original"""
+        random.seed(3)
+        players = [Player("Alice"), Player("Bob")]
+        ronda = Ronda.start(players, players[0])
+        before = ronda_state(ronda)
+
+        copy = ronda.mutable_copy()
+        self.assertTrue(copy.is_mutable)
+        for _ in range(8):
+            copy.play_turn(*first_move(copy))
+
+        self.assertEqual(before, ronda_state(ronda))
+        self.assertNotEqual(before, ronda_state(copy))
+
+
+class TestRondaSnapshots(unittest.TestCase):
+    def test_history_is_preserved(self):
+        """Earlier snapshots are unchanged after playing the whole ronda"""
+        random.seed(8)
+        players = [Player("Alice"), Player("Bob"), Player("Charlie")]
+        ronda = Ronda.start(players, players[2])
+
+        history = []
+        while not ronda.is_finished:
+            history.append((ronda, ronda_state(ronda)))
+            ronda = ronda.play_turn(*first_move(ronda))
+
+        for (snapshot, state) in history:
+            self.assertEqual(state, ronda_state(snapshot))
+
+    def test_unchanged_players_are_shared(self):
+        """Only the entry of the player who moved is rebuilt"""
+        random.seed(0)
+        alice = Player("Alice")
+        bob = Player("Bob")
+        ronda = Ronda.start([alice, bob], alice)
+
+        ronda2 = ronda.play_turn(Card(8, "basto"))
+        self.assertIs(ronda.player_cards[alice], ronda2.player_cards[alice])
+        self.assertIsNot(ronda.player_cards[bob], ronda2.player_cards[bob])
+        self.assertIs(ronda.deck, ronda2.deck)
+
+    def test_standings(self):
+        """Pila totals can be queried mid-ronda"""
+        random.seed(0)
+        alice = Player("Alice")
+        bob = Player("Bob")
+        ronda = Ronda.start([alice, bob], alice)
+        ronda = ronda.play_turn(Card(6, "basto"), [Card(9, "espada")])
+
+        standings = ronda.standings()
+        self.assertEqual(2, standings[bob].total_cards)
+        self.assertEqual(0, standings[alice].total_cards)
+
+    def test_points(self):
+        """Totals the points earned by each player in the ronda"""
+        alice = Player("Alice")
+        bob = Player("Bob")
+        ronda = Ronda.start([alice, bob], alice)
+        ronda._player_cards[alice]["pila"] = Pila().add(
+            [Card(7, "oro"), Card(1, "basto"), Card(1, "espada"),
+             Card(1, "copa")], True)
+        ronda._player_cards[bob]["pila"] = Pila().add(
+            [Card(2, "basto"), Card(3, "basto")])
+
+        points = ronda.points()
+        # most cards, most oros, 7 de velo, setenta and one escoba
+        self.assertEqual(5, points[alice])
+        self.assertEqual(0, points[bob])
+
+    def test_start_seeded(self):
+        """Rondas started with the same seed deal the same cards"""
+        alice = Player("Alice")
+        bob = Player("Bob")
+        first = Ronda.start([alice, bob], alice, rng=random.Random(6))
+        second = Ronda.start([alice, bob], alice, rng=random.Random(6))
+        self.assertEqual(ronda_state(first), ronda_state(second))
+
+
+class TestRondaKey(unittest.TestCase):
+    def test_incremental(self):
+        """Keys updated turn by turn match keys built from scratch,
+        through deals and the final sweep
+        """
+        players = [Player("Alice"), Player("Bob"), Player("Charlie")]
+        for mutable in (False, True):
+            ronda = Ronda.start(players, players[0], mutable=mutable,
+                                rng=random.Random(2))
+            while not ronda.is_finished:
+                self.assertEqual(ronda._build_key(), ronda.key)
+                ronda = ronda.play_turn(*first_move(ronda))
+            self.assertEqual(ronda._build_key(), ronda.key)
+
+    def test_undo(self):
+        """Undoing turns restores the key they started from"""
+        players = [Player("Alice"), Player("Bob")]
+        ronda = Ronda.start(players, players[1], mutable=True,
+                            rng=random.Random(4))
+        keys = []
+        while not ronda.is_finished:
+            keys.append(ronda.key)
+            ronda.play_turn(*first_move(ronda))
+
+        while keys:
+            ronda.undo()
+            self.assertEqual(keys.pop(), ronda.key)
+
+    def test_transpositions(self):
+        """The same state has the same key, whichever way it was reached"""
+        alice = Player("Alice")
+        bob = Player("Bob")
+        start = Ronda.start([alice, bob], bob, rng=random.Random(1))
+        (first, second, _) = start.player_cards[alice]["hand"]
+        (third, fourth, _) = start.player_cards[bob]["hand"]
+
+        one_way = start.play_turn(first).play_turn(third) \
+            .play_turn(second).play_turn(fourth)
+        other_way = start.play_turn(second).play_turn(fourth) \
+            .play_turn(first).play_turn(third)
+
+        self.assertEqual(one_way.key, other_way.key)
+        self.assertNotEqual(start.key, one_way.key)
+        self.assertEqual(start.key, start.mutable_copy().key)
@@ -0,0 +1,108 @@
+import unittest
+import random
+from quince.components import Card, Deck, Pila, Player, Ronda
+from quince.components import symmetry
+from quince.components.cardset import (FULL, SUIT_MASKS, cards_in, count,
+                                       decode_move, encode_move, mask_of)
+from quince.cpu import random_possibility
+
+
+def permuted_ronda(ronda, permutation):
+    """A copy of a ronda with every card moved to its permuted suit."""
+    def move(cards):
+        return cards_in(symmetry.permute_mask(mask_of(cards), permutation),
+                        Card)
+
+    player_cards = {}
+    for (player, cards) in ronda.player_cards.items():
+        pila = cards["pila"]
+        player_cards[player] = {
+            "hand": tuple(move(cards["hand"])),
+            "pila": Pila(mask=symmetry.permute_mask(pila.mask, permutation),
+                         escobas=pila.escobas)}
+
+    return Ronda(current_player=ronda.current_player,
+                 dealer=ronda.dealer,
+                 deck=Deck.from_order(Card, move(ronda.deck.cards())),
+                 last_pickup=ronda.last_picked_up,
+                 mesa=move(ronda.current_mesa),
+                 players=ronda.players,
+                 player_cards=player_cards)
+
+
+class TestPermutations(unittest.TestCase):
+    def test_oros_stay(self):
+        for permutation in symmetry.PERMUTATIONS:
+            self.assertEqual(SUIT_MASKS["oro"],
+                             symmetry.permute_mask(SUIT_MASKS["oro"],
+                                                   permutation))
+        self.assertEqual(6, len(set(symmetry.PERMUTATIONS)))
+
+    def test_inverse(self):
+        """Permuting and then applying the inverse gives back the cards"""
+        mask = random.Random(0).getrandbits(40) & FULL
+        for permutation in symmetry.PERMUTATIONS:
+            permuted = symmetry.permute_mask(mask, permutation)
+            self.assertEqual(count(mask), count(permuted))
+            self.assertEqual(mask, symmetry.permute_mask(
+                permuted, symmetry.inverse(permutation)))
+
+    def test_permute_move(self):
+        permutation = (0, 2, 3, 1)
+        move = encode_move(Card(5, "basto"), [Card(3, "copa"),
+                                              Card(7, "oro")])
+        (card, captured) = decode_move(symmetry.permute_move(move,
+                                                             permutation),
+                                       Card)
+        self.assertEqual(Card(5, "espada"), card)
+        self.assertEqual({Card(3, "basto"), Card(7, "oro")}, set(captured))
+        self.assertEqual(move, symmetry.permute_move(
+            symmetry.permute_move(move, permutation),
+            symmetry.inverse(permutation)))
+
+
+class TestCanonical(unittest.TestCase):
+    def setUp(self):
+        players = [Player("Alice"), Player("Bob"), Player("Carol")]
+        self.ronda = Ronda.start(players, players[2], rng=random.Random(3))
+        for _ in range(4):
+            hand = self.ronda.player_cards[self.ronda.current_player]["hand"]
+            self.ronda = self.ronda.play_turn(hand[0])
+
+    def test_same_canonical_state(self):
+        """Every reordering of the plain suits has the same canonical form"""
+        masks = [self.ronda.mesa_mask] + [
+            mask_of(cards["hand"]) for cards in
+            self.ronda.player_cards.values()]
+        expected = None
+        for permutation in symmetry.PERMUTATIONS:
+            permuted = [symmetry.permute_mask(mask, permutation)
+                        for mask in masks]
+            order = symmetry.canonical(permuted)
+            result = [symmetry.permute_mask(mask, order)
+                      for mask in permuted]
+            if expected is None:
+                expected = result
+            self.assertEqual(expected, result)
+
+    def test_canonical_key(self):
+        (key, _) = symmetry.canonical_key(self.ronda)
+        for permutation in symmetry.PERMUTATIONS:
+            ronda = permuted_ronda(self.ronda, permutation)
+            self.assertEqual(key, symmetry.canonical_key(ronda)[0])
+
+    def test_scores_unchanged(self):
+        """Permuting the plain suits changes nobody's points"""
+        rng = random.Random(5)
+        ronda = self.ronda
+        while not ronda.is_finished:
+            hand = ronda.player_cards[ronda.current_player]["hand"]
+            move = random_possibility(ronda.current_mesa, hand, rng)
+            if move:
+                ronda = ronda.play_turn(move[0], move[1:])
+            else:
+                ronda = ronda.play_turn(hand[0])
+
+        for permutation in symmetry.PERMUTATIONS:
+            self.assertEqual(ronda.points(),
+                             permuted_ronda(ronda, permutation).points())
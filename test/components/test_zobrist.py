@@ -0,0 +1,26 @@
+import unittest
+from quince.components import Card
+from quince.components import zobrist
+from quince.components.cardset import EMPTY, mask_of
+
+
+class TestZobrist(unittest.TestCase):
+    def test_distinct(self):
+        """Every feature of a state has its own key"""
+        keys = list(zobrist.MESA) + list(zobrist.TURN) \
+            + list(zobrist.LAST_PICKUP) + list(zobrist.DECK)
+        for seat in range(zobrist.MAX_PLAYERS):
+            keys += zobrist.HAND[seat] + zobrist.PILA[seat] \
+                + zobrist.ESCOBAS[seat]
+        self.assertEqual(len(keys), len(set(keys)))
+
+    def test_mask_key(self):
+        """The key of a set of cards combines the keys of its parts"""
+        first = mask_of([Card(1, "oro"), Card(7, "copa")])
+        second = mask_of([Card(10, "basto")])
+        self.assertEqual(0, zobrist.mask_key(zobrist.MESA, EMPTY))
+        self.assertEqual(zobrist.MESA[Card(10, "basto").index],
+                         zobrist.mask_key(zobrist.MESA, second))
+        self.assertEqual(zobrist.mask_key(zobrist.MESA, first)
+                         ^ zobrist.mask_key(zobrist.MESA, second),
+                         zobrist.mask_key(zobrist.MESA, first | second))
@@ -0,0 +1,162 @@
+import unittest
+import numpy as np
+from quince import batch as batch_module
+from quince.batch import (BatchRonda, BatchFinishedError, DeckFactory,
+                          IllegalMoveError, deck_orders)
+from quince.components import Card, Deck, Player, Ronda
+from quince.components.cardset import DECK_SIZE, FULL, cards_in, mask_of
+from quince.cpu import enumerate_possibilities
+
+
+class TestBatchRonda(unittest.TestCase):
+    def test_matches_ronda(self):
+        """Rondas played in a batch end with the same pilas and points as
+        the same moves played with Ronda
+        """
+        for size in [2, 3, 4]:
+            decks = [Deck(Card, rng=seed) for seed in range(20)]
+            dealers = np.arange(20) % size
+            batch = BatchRonda(deck_orders(decks), size, dealers)
+
+            rng = np.random.default_rng(size)
+            moves = []
+            while not batch.is_finished:
+                (cards, captures) = batch.random_moves(rng)
+                moves.append((cards, captures))
+                batch.play(cards, captures)
+            points = batch.points()
+
+            for game in range(20):
+                players = [Player(str(seat)) for seat in range(size)]
+                ronda = Ronda.start(players, players[dealers[game]],
+                                    rng=game)
+                for (cards, captures) in moves:
+                    [card] = cards_in(1 << int(cards[game]), Card)
+                    ronda = ronda.play_turn(card, cards_in(
+                        int(captures[game]), Card))
+
+                self.assertTrue(ronda.is_finished)
+                earned = ronda.points()
+                self.assertEqual([earned[player] for player in players],
+                                 list(points[game]))
+                for (seat, player) in enumerate(players):
+                    pila = ronda.player_cards[player]["pila"]
+                    self.assertEqual(pila.mask, int(batch.pilas[game, seat]))
+                    self.assertEqual(pila.escobas,
+                                     batch.escobas[game, seat])
+
+    def test_straight_escoba(self):
+        """A mesa dealt adding up to 15 goes to the dealer"""
+        table = [Card(1, "oro"), Card(2, "oro"), Card(3, "oro"),
+                 Card(9, "copa")]
+        hands = [Card(value, "basto") for value in range(1, 7)]
+        rest = cards_in(FULL & ~mask_of(table + hands), Card)
+        order = [card.index for card in hands + table + rest]
+
+        batch = BatchRonda([order, order], 2, [0, 1])
+        self.assertEqual([0, 0], list(batch.mesa))
+        self.assertEqual(mask_of(table), int(batch.pilas[0, 0]))
+        self.assertEqual(mask_of(table), int(batch.pilas[1, 1]))
+        self.assertEqual([1, 0], list(batch.current))
+
+    def test_random_moves_cover_every_capture(self):
+        mesa = [Card(5, "copa"), Card(5, "basto"), Card(5, "oro"),
+                Card(4, "oro"), Card(1, "espada"), Card(3, "copa"),
+                Card(2, "oro"), Card(6, "espada"), Card(8, "basto")]
+        hand = [Card(5, "espada"), Card(7, "copa"), Card(3, "basto")]
+        rest = cards_in(FULL & ~mask_of(mesa + hand), Card)
+        order = [card.index for card in hand + rest]
+
+        batch = BatchRonda([order] * 3000, 1)
+        batch.mesa[:] = mask_of(mesa)
+        (cards, captures) = batch.random_moves(np.random.default_rng(0))
+        self.assertTrue(batch.is_legal(cards, captures).all())
+
+        expected = {(move[0].index, mask_of(move[1:]))
+                    for move in enumerate_possibilities(mesa, hand)}
+        self.assertEqual(expected, set(zip(cards.tolist(),
+                                           captures.tolist())))
+
+    def test_drops_without_captures(self):
+        hand = [Card(1, "oro"), Card(2, "oro"), Card(3, "oro")]
+        rest = cards_in(FULL & ~mask_of(hand), Card)
+        batch = BatchRonda([[card.index for card in hand + rest]], 1)
+        batch.mesa[:] = mask_of([Card(1, "copa")])
+
+        (cards, captures) = batch.random_moves(np.random.default_rng(0))
+        self.assertIn(int(cards[0]), [card.index for card in hand])
+        self.assertEqual(0, captures[0])
+
+    def test_illegal_moves(self):
+        hands = [Card(value, "basto") for value in range(1, 7)]
+        table = [Card(10, "oro"), Card(1, "copa"), Card(2, "copa"),
+                 Card(7, "espada")]
+        rest = cards_in(FULL & ~mask_of(hands + table), Card)
+        batch = BatchRonda([[card.index for card in hands + table + rest]],
+                           2)
+
+        cuatro = Card(4, "basto").index
+        self.assertTrue(batch.is_legal(
+            [cuatro], [mask_of([Card(10, "oro"), Card(1, "copa")])]).all())
+        self.assertTrue(batch.is_legal([cuatro], [0]).all())
+
+        # adding up to 14, from the other player's hand, or off the mesa
+        self.assertFalse(batch.is_legal(
+            [cuatro], [mask_of([Card(10, "oro")])]).any())
+        self.assertFalse(batch.is_legal([Card(1, "basto").index], [0]).any())
+        self.assertFalse(batch.is_legal(
+            [cuatro], [mask_of([Card(10, "copa"), Card(1, "copa")])]).any())
+        self.assertFalse(batch.is_legal([-1], [0]).any())
+
+        with self.assertRaises(IllegalMoveError):
+            batch.play([cuatro], [mask_of([Card(10, "oro")])])
+
+    def test_finished(self):
+        batch = BatchRonda(deck_orders([Deck(Card, rng=1)]), 4)
+        batch.playout(np.random.default_rng(0))
+        self.assertTrue(batch.is_finished)
+        self.assertEqual(0, batch.mesa[0])
+        self.assertEqual(FULL, int(np.bitwise_or.reduce(batch.pilas[0])))
+        with self.assertRaises(BatchFinishedError):
+            batch.play([0], [0])
+
+
+class TestCompatibility(unittest.TestCase):
+    def test_popcount(self):
+        """The popcount used without NumPy 2 counts every bit"""
+        rng = np.random.default_rng(0)
+        masks = rng.integers(0, 1 << 63, 200, dtype=np.uint64) << 1
+        masks[:2] = [0, (1 << 64) - 1]
+        expected = [bin(int(mask)).count("1") for mask in masks]
+        self.assertEqual(expected, batch_module._popcount(masks).tolist())
+
+    def test_comb(self):
+        self.assertEqual(6, batch_module._comb(4, 2))
+        self.assertEqual(1, batch_module._comb(4, 0))
+        self.assertEqual(0, batch_module._comb(2, 3))
+
+
+class TestDeckFactory(unittest.TestCase):
+    def test_orders(self):
+        """Every row is a shuffled deck, reproducible from the seed"""
+        orders = DeckFactory(7).orders(50)
+        self.assertEqual((50, DECK_SIZE), orders.shape)
+        self.assertEqual(np.uint8, orders.dtype)
+        self.assertTrue((np.sort(orders, axis=1)
+                         == np.arange(DECK_SIZE)).all())
+        self.assertTrue((orders == DeckFactory(7).orders(50)).all())
+        self.assertEqual(50, len({row.tobytes() for row in orders}))
+
+    def test_decks(self):
+        """Decks deal the cards of their rows, and can start rondas"""
+        decks = DeckFactory(3).decks(Card, 4)
+        orders = DeckFactory(3).orders(4)
+        self.assertEqual(orders.tolist(), deck_orders(decks).tolist())
+
+        players = [Player("Alice"), Player("Bob")]
+        ronda = Ronda.start(players, players[0], deck=decks[0])
+        dealt = ronda.player_cards[players[0]]["hand"]
+        self.assertEqual([int(index) for index in orders[0, :3]],
+                         [card.index for card in dealt])
+        self.assertEqual(DECK_SIZE - 10, ronda.deck.remaining())
+        self.assertEqual(DECK_SIZE, decks[0].remaining())
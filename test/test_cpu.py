@@ -1,6 +1,22 @@
 import unittest
-from quince.cpu import enumerate_possibilities
-from quince.components import Card
+import random
+from itertools import combinations
+from quince.cpu import (enumerate_possibilities, value_multisets,
+                        iter_possibilities, can_capture, count_possibilities,
+                        can_escoba, random_possibility, group_moves)
+from quince.components import Card, Deck
+from quince.components.cardset import mask_of
+
+
+def brute_force_possibilities(mesa, hand):
+    """Reference implementation, checking every subset of the mesa."""
+    possibilities = []
+    for card in hand:
+        for size in range(1, len(mesa) + 1):
+            for combo in combinations(mesa, size):
+                if card.value + sum(c.value for c in combo) == 15:
+                    possibilities.append((card,) + combo)
+    return possibilities
 
 
 class TestCPU(unittest.TestCase):
@@ -54,3 +70,139 @@ class TestCPU(unittest.TestCase):
         mesa = [Card(2, "espada"), Card(8, "espada")]
         must_drop = enumerate_possibilities(mesa, hand)
         self.assertFalse(must_drop)
+
+    def test_matches_every_subset(self):
+        """Finds exactly the same captures as checking every subset"""
+        rng = random.Random(4)
+        for _ in range(200):
+            cards = Deck(Card).cards()
+            rng.shuffle(cards)
+            size = rng.randint(0, 12)
+            mesa = cards[:size]
+            hand = cards[size:size + 3]
+
+            expected = brute_force_possibilities(mesa, hand)
+            found = enumerate_possibilities(mesa, hand)
+            self.assertEqual(sorted(map(str, expected)),
+                             sorted(map(str, found)))
+
+    def test_value_multisets(self):
+        """Lists every way of adding card values up to a target"""
+        self.assertEqual([((4, 1),), ((3, 1), (1, 1)), ((2, 1), (1, 2)),
+                          ((2, 2),), ((1, 4),)],
+                         value_multisets(4))
+
+        for multiset in value_multisets(14):
+            self.assertEqual(14, sum(v * n for (v, n) in multiset))
+
+
+class TestLazyPossibilities(unittest.TestCase):
+    def setUp(self):
+        self.ace = Card(1, "oro")
+        self.tres = Card(3, "oro")
+        self.cinco = Card(5, "oro")
+        self.seis = Card(6, "espada")
+        self.siete_velo = Card(7, "oro")
+        self.sota_oro = Card(8, "oro")
+        self.caballo = Card(9, "basto")
+        self.mesa = [self.sota_oro, self.tres, self.cinco,
+                     self.caballo, self.ace]
+        self.hand = [self.siete_velo, self.seis]
+
+    def test_iter_possibilities(self):
+        """Yields the same captures as enumerate_possibilities"""
+        lazy = iter_possibilities(self.mesa, self.hand)
+        self.assertTrue(next(lazy))
+
+        self.assertEqual(
+            sorted(map(str, enumerate_possibilities(self.mesa, self.hand))),
+            sorted(map(str, iter_possibilities(self.mesa, self.hand))))
+
+    def test_can_capture(self):
+        self.assertTrue(can_capture(self.mesa, self.seis))
+        self.assertFalse(can_capture([self.ace, self.tres], self.seis))
+        self.assertFalse(can_capture([], self.seis))
+
+    def test_count_possibilities(self):
+        """Counts captures without building them"""
+        rng = random.Random(7)
+        for _ in range(100):
+            cards = Deck(Card).cards()
+            rng.shuffle(cards)
+            size = rng.randint(0, 12)
+            mesa = cards[:size]
+            hand = cards[size:size + 3]
+            self.assertEqual(len(enumerate_possibilities(mesa, hand)),
+                             count_possibilities(mesa, hand))
+
+    def test_can_escoba(self):
+        """A capture that clears the mesa"""
+        self.assertTrue(can_escoba([self.sota_oro], [self.ace,
+                                                     self.siete_velo]))
+        self.assertFalse(can_escoba([self.sota_oro, self.ace],
+                                    [self.siete_velo]))
+        self.assertFalse(can_escoba([], [self.siete_velo]))
+
+    def test_random_possibility(self):
+        """Picks one of the available captures"""
+        options = set(map(str, enumerate_possibilities(self.mesa, self.hand)))
+        rng = random.Random(3)
+        seen = set()
+        for _ in range(300):
+            move = random_possibility(self.mesa, self.hand, rng)
+            self.assertTrue(str(move) in options)
+            seen.add(str(move))
+        self.assertEqual(options, seen)
+
+        self.assertIsNone(random_possibility([self.ace], [self.tres]))
+
+
+class TestMoveClasses(unittest.TestCase):
+    def setUp(self):
+        self.fives = [Card(5, "copa"), Card(5, "basto"), Card(5, "espada")]
+        self.mesa = self.fives + [Card(5, "oro")]
+        self.hand = [Card(10, "copa")]
+
+    def test_no_interchangeable_cards(self):
+        """Without interchangeable cards, every capture is its own class"""
+        classes = enumerate_possibilities(self.mesa, self.hand, 0)
+        self.assertEqual(enumerate_possibilities(self.mesa, self.hand),
+                         [move for (move, _) in classes])
+        self.assertEqual({1}, {multiplicity for (_, multiplicity) in classes})
+
+    def test_groups_captures(self):
+        """Captures of interchangeable fives are one class, while the
+        5 de oro always keeps a class of its own
+        """
+        classes = enumerate_possibilities(self.mesa, self.hand,
+                                          mask_of(self.fives))
+        self.assertEqual(2, len(classes))
+        self.assertEqual(4, sum(multiplicity
+                                for (_, multiplicity) in classes))
+
+        by_move = dict(classes)
+        self.assertEqual(3, by_move[(self.hand[0], Card(5, "basto"))])
+        self.assertEqual(1, by_move[(self.hand[0], Card(5, "oro"))])
+
+    def test_representatives(self):
+        """Representatives do not depend on the order of the cards"""
+        interchangeable = mask_of(self.fives)
+        expected = enumerate_possibilities(self.mesa, self.hand,
+                                           interchangeable)
+        rng = random.Random(0)
+        for _ in range(10):
+            rng.shuffle(self.mesa)
+            self.assertEqual(
+                sorted(map(str, expected)),
+                sorted(map(str, enumerate_possibilities(
+                    self.mesa, self.hand, interchangeable))))
+
+    def test_hand_and_mesa_differ(self):
+        """Interchangeable cards only stand in for cards from the same place
+        """
+        hand = [Card(5, "copa"), Card(5, "basto")]
+        moves = [(hand[0], Card(5, "basto")), (hand[1], Card(5, "copa")),
+                 (hand[0],), (hand[1],)]
+        classes = group_moves(moves, mask_of(hand))
+        self.assertEqual([2, 2], [multiplicity
+                                  for (_, multiplicity) in classes])
@@ -0,0 +1,130 @@
+import io
+import random
+import unittest
+from quince.components import Card, NPC, Player, Ronda
+from quince.cpu import random_possibility
+from quince.replay import (ReplayError, ReplayWriter, decode_turn,
+                           encode_turn, rank_order, read_replays,
+                           unrank_order)
+from quince.components.cardset import mask_of
+from quince.sim import play_game
+
+
+def play_random(writer, ronda, rng):
+    """Plays a ronda to the end with random moves, through a writer."""
+    states = [ronda]
+    while not ronda.is_finished:
+        hand = ronda.player_cards[ronda.current_player]["hand"]
+        move = random_possibility(ronda.current_mesa, hand, rng)
+        if move:
+            ronda = writer.play_turn(ronda, move[0], move[1:])
+        else:
+            ronda = writer.play_turn(ronda, hand[0])
+        states.append(ronda)
+    return states
+
+
+class TestReplay(unittest.TestCase):
+    def test_rank_order(self):
+        order = list(range(40))
+        random.Random(4).shuffle(order)
+        self.assertEqual(order, unrank_order(rank_order(order)))
+        self.assertEqual(0, rank_order(list(range(40))))
+        with self.assertRaises(ReplayError):
+            unrank_order(-1)
+
+    def test_turns(self):
+        """Cards picked up are stored relative to the mesa"""
+        mesa = [Card(1, "oro"), Card(4, "basto"), Card(6, "copa")]
+        turn = encode_turn(mask_of(mesa), Card(5, "espada"), mesa[1:])
+        self.assertEqual(Card(5, "espada").index | 0b110 << 6, turn)
+        self.assertEqual((Card(5, "espada"), mesa[1:]),
+                         decode_turn(mask_of(mesa), turn))
+        self.assertEqual((Card(2, "oro"), []),
+                         decode_turn(mask_of(mesa), Card(2, "oro").index))
+
+        with self.assertRaises(ReplayError):
+            decode_turn(mask_of(mesa[:2]), turn)
+
+    def test_replays_states(self):
+        """Every state of every recorded ronda is rebuilt exactly"""
+        stream = io.BytesIO()
+        writer = ReplayWriter(stream)
+        rng = random.Random(2)
+        recorded = []
+        for size in [2, 3, 4]:
+            players = [Player(str(seat)) for seat in range(size)]
+            ronda = Ronda.start(players, players[size - 1], rng=rng)
+            recorded.append(play_random(writer, writer.start(ronda), rng))
+
+        replays = list(read_replays(io.BytesIO(stream.getvalue())))
+        self.assertEqual(3, len(replays))
+        for (replay, states) in zip(replays, recorded):
+            replayed = list(replay.states(states[0].players))
+            self.assertEqual([state.key for state in states],
+                             [state.key for state in replayed])
+            self.assertEqual(states[-1].points(), replayed[-1].points())
+
+        # a few dozen bytes per ronda
+        self.assertLess(len(stream.getvalue()), 3 * 100)
+
+    def test_straight_escoba(self):
+        """A mesa dealt adding up to 15 is replayed to the dealer's pila"""
+        rng = random.Random(0)
+        players = [Player("a"), Player("b")]
+        while True:
+            ronda = Ronda.start(players, players[0], rng=rng)
+            if not ronda.mesa_mask:
+                break
+
+        stream = io.BytesIO()
+        writer = ReplayWriter(stream)
+        writer.start(ronda)
+        writer.flush()
+
+        [replay] = read_replays(io.BytesIO(stream.getvalue()))
+        self.assertEqual(ronda.key, replay.final(players).key)
+
+    def test_unfinished(self):
+        """Rondas cut short are written as far as they went"""
+        stream = io.BytesIO()
+        writer = ReplayWriter(stream)
+        players = [Player("a"), Player("b")]
+        ronda = writer.start(Ronda.start(players, players[0], rng=3))
+        hand = ronda.player_cards[ronda.current_player]["hand"]
+        ronda = writer.play_turn(ronda, hand[0])
+
+        with self.assertRaises(ReplayError):
+            writer.start(ronda)
+        writer.flush()
+
+        [replay] = read_replays(io.BytesIO(stream.getvalue()))
+        self.assertEqual(ronda.key, replay.final(players).key)
+
+    def test_invalid(self):
+        with self.assertRaises(ReplayError):
+            list(read_replays(io.BytesIO(b"nope")))
+
+        stream = io.BytesIO()
+        writer = ReplayWriter(stream)
+        players = [Player("a"), Player("b")]
+        play_random(writer, writer.start(Ronda.start(players, players[0],
+                                                     rng=5)),
+                    random.Random(5))
+        with self.assertRaises(ReplayError):
+            list(read_replays(io.BytesIO(stream.getvalue()[:-1])))
+
+    def test_play_game(self):
+        """Simulated games can be recorded"""
+        stream = io.BytesIO()
+        players = [NPC("a"), NPC("b")]
+        result = play_game(players, rng=6, writer=ReplayWriter(stream))
+
+        replays = list(read_replays(io.BytesIO(stream.getvalue())))
+        self.assertEqual(result.rondas, len(replays))
+        scores = [0, 0]
+        for replay in replays:
+            points = replay.final(players).points()
+            for (seat, player) in enumerate(players):
+                scores[seat] += points[player]
+        self.assertEqual(result.final_scores, scores)
@@ -0,0 +1,115 @@
+import io
+import unittest
+import random
+from quince.components import NPC
+from quince.ai import ISMCTSNPC
+from quince.sim import (build_players, play_game, play_games, run_simulation,
+                        replay_game, seeded_game, SimulationStats,
+                        ITERATIONS, ROLLOUTS, WINNING_SCORE)
+from quince.replay import ReplayWriter, read_replays
+
+
+class TestSim(unittest.TestCase):
+    def test_play_game(self):
+        """Plays until somebody reaches 30 points"""
+        random.seed(1)
+        players = [NPC("a"), NPC("b"), NPC("c")]
+        result = play_game(players)
+
+        self.assertTrue(max(result.final_scores) >= WINNING_SCORE)
+        self.assertTrue(result.rondas > 0)
+        self.assertEqual(sum(result.final_scores),
+                         result.dealer_points + result.others_points)
+
+        for seat in result.winners:
+            self.assertEqual(max(result.final_scores),
+                             result.final_scores[seat])
+
+    def test_category_points_add_up(self):
+        random.seed(2)
+        result = play_game([NPC("a"), NPC("b")])
+        for (seat, score) in enumerate(result.final_scores):
+            self.assertEqual(score, sum(result.category_points[seat].values()))
+
+    def test_seeded_rondas_are_dealt_anew(self):
+        """A seed shuffles every ronda of the game differently"""
+        stream = io.BytesIO()
+        play_game([NPC("a"), NPC("b")], rng=5, writer=ReplayWriter(stream))
+
+        stream.seek(0)
+        orders = [tuple(replay.order) for replay in read_replays(stream)]
+        self.assertTrue(len(orders) > 1)
+        self.assertEqual(len(orders), len(set(orders)))
+
+    def test_merge(self):
+        """Totals from separate batches can be combined"""
+        first = play_games(["random", "random"], 3, 0, 3)
+        second = play_games(["random", "random"], 3, 3, 2)
+
+        merged = SimulationStats(["random", "random"])
+        merged.merge(first)
+        merged.merge(second)
+        self.assertEqual(5, merged.games)
+        self.assertAlmostEqual(5.0, sum(merged.wins))
+        self.assertEqual(first.rondas + second.rondas, merged.rondas)
+        self.assertTrue("Dealer advantage" in merged.report())
+
+    def test_run_simulation(self):
+        """Streams running totals as each batch finishes"""
+        totals = [stats.games for stats in
+                  run_simulation(["random"] * 4, 5, workers=1, chunksize=2)]
+        self.assertEqual([2, 4, 5], totals)
+
+    def test_replay_game(self):
+        """Games can be replayed exactly from the master seed and index"""
+        strategies = ["random", "random", "random"]
+        batch = play_games(strategies, 42, 0, 4)
+
+        totals = SimulationStats(strategies)
+        for game in range(4):
+            totals.add(replay_game(strategies, 42, game))
+
+        self.assertEqual(batch.scores, totals.scores)
+        self.assertEqual(batch.category_points, totals.category_points)
+
+        first = replay_game(strategies, 42, 2)
+        second = replay_game(strategies, 42, 2)
+        self.assertEqual(first.final_scores, second.final_scores)
+        self.assertEqual(first.category_points, second.category_points)
+
+    def test_rollout_players_are_not_timed(self):
+        """Simulated rollout players do a fixed amount of work per move,
+        however fast the machine is
+        """
+        [npc] = build_players(["rollout"])
+        self.assertEqual(ROLLOUTS, npc.rollouts)
+        self.assertIsNone(npc.time_budget)
+
+    def test_ismcts_players_are_not_timed(self):
+        [npc] = build_players(["ismcts"])
+        self.assertEqual(ITERATIONS, npc.iterations)
+        self.assertIsNone(npc.time_budget)
+
+    def test_replay_ismcts_game(self):
+        """Games between ISMCTS players searching for a fixed number of
+        iterations can be replayed exactly
+        """
+        results = []
+        for _ in range(2):
+            players = [ISMCTSNPC(f"ismcts {seat}", iterations=20,
+                                 time_budget=None)
+                       for seat in range(2)]
+            result = seeded_game(players, 42, 1)
+            results.append((result.rondas, result.final_scores,
+                            result.category_points))
+        self.assertEqual(results[0], results[1])
+
+    def test_seeds_are_independent_of_workers(self):
+        """Results do not depend on how games are split into batches"""
+        strategies = ["random", "random"]
+        whole = list(run_simulation(strategies, 6, chunksize=6,
+                                    master_seed=9))[-1]
+        split = list(run_simulation(strategies, 6, chunksize=1,
+                                    master_seed=9))[-1]
+        self.assertEqual(whole.scores, split.scores)
+        self.assertEqual(whole.wins, split.wins)
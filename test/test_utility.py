@@ -0,0 +1,27 @@
+import unittest
+import random
+from quince.utility import get_rng, spawn_seed
+
+
+class TestGetRng(unittest.TestCase):
+    def test_seeds(self):
+        for seed in [7, "seven", b"seven"]:
+            self.assertEqual(random.Random(seed).random(),
+                             get_rng(seed).random())
+
+    def test_passed_through(self):
+        rng = random.Random(1)
+        self.assertIs(rng, get_rng(rng))
+        self.assertIs(random, get_rng(None))
+        self.assertIs(random, get_rng(random))
+
+    def test_unsupported_seed(self):
+        """Seeds that would be hashed differently in every process"""
+        with self.assertRaises(TypeError):
+            get_rng(("game", 1))
+        with self.assertRaises(TypeError):
+            get_rng(1.5)
+
+    def test_spawned_seeds(self):
+        self.assertIsInstance(get_rng(spawn_seed(3, 1, "deck")),
+                              random.Random)
@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+from quince.components import Card
+from quince.ui.common.atlas import (Atlas, AtlasError, build, open_atlas,
+                                    render)
+from quince.ui.common.image_cache import ImageCache
+
+
+class TestAtlas(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "atlas.bin")
+        self.card = Card(7, "oro")
+        build(self.path, [(self.card.image_path, (140, 140), True),
+                          (self.card.image_path, (104, 160), False)])
+        self.atlas = Atlas(self.path)
+
+    def tearDown(self):
+        self.atlas.close()
+        self.directory.cleanup()
+
+    def test_sprites(self):
+        """Sprites hold the same pixels as the resized PNGs"""
+        self.assertEqual(2, len(self.atlas))
+        for (size, fit) in [((140, 140), True), ((104, 160), False)]:
+            sprite = self.atlas.sprite(self.card.image_path, size, fit)
+            expected = render(self.card.image_path, size, fit)
+            self.assertEqual(expected.size, sprite.size)
+            self.assertEqual(expected.tobytes(), sprite.tobytes())
+            del sprite
+
+        self.assertIsNone(self.atlas.sprite(self.card.image_path,
+                                            (65, 65), True))
+        self.assertIsNone(self.atlas.sprite(Card(1, "oro").image_path,
+                                            (140, 140), True))
+
+    def test_image_cache(self):
+        """The image cache takes images from the atlas when it can"""
+        cache = ImageCache(atlas=self.atlas)
+        image = cache.image(self.card, (104, 160), fit=False)
+        self.assertTrue(image.readonly)
+        self.assertNotIn((self.card, None, True, None, False),
+                         cache._entries)
+        self.assertFalse(cache.image(self.card, (65, 65)).readonly)
+        del image
+        cache.clear()
+
+    def test_invalid(self):
+        with open(self.path, "wb") as output:
+            output.write(b"not an atlas")
+        with self.assertRaises(AtlasError):
+            Atlas(self.path)
+        self.assertIsNone(open_atlas(self.path))
+        self.assertIsNone(open_atlas(self.path + ".missing"))
@@ -0,0 +1,66 @@
+import gc
+import random
+import tkinter as tk
+import unittest
+from collections import namedtuple
+from quince.components import NPC, Player
+from quince.ui.canvas_frame import CanvasGameFrame
+from quince.ui.common.image_cache import IMAGES
+
+
+Click = namedtuple("Click", ["x", "y"])
+
+
+class TestCanvasGameFrame(unittest.TestCase):
+    def setUp(self):
+        try:
+            self.root = tk.Tk()
+        except tk.TclError:
+            self.skipTest("no display")
+
+        random.seed(3)
+        self.player = Player("Alice")
+        self.frame = CanvasGameFrame(self.root, self.player,
+                                     [NPC("a"), NPC("b"), NPC("c")],
+                                     lambda ronda, scores: None)
+
+    def tearDown(self):
+        self.root.destroy()
+
+    def click(self, item):
+        (x, y) = self.frame.canvas.coords(item)
+        self.frame._on_click(Click(x, y))
+
+    def test_redraw_keeps_items(self):
+        """Redrawing an unchanged ronda creates no canvas items"""
+        items = self.frame.canvas.find_all()
+        self.frame.draw()
+        self.assertEqual(items, self.frame.canvas.find_all())
+        self.assertEqual(set(self.frame.ronda.current_mesa),
+                         set(self.frame._table_items))
+
+    def test_selection(self):
+        """Cards are selected by clicking on them"""
+        frame = self.frame
+        self.click(frame._hand_slots[2])
+        self.assertIs(frame._hand_cards[2], frame.selected_hand_card())
+
+        card = frame.ronda.current_mesa[0]
+        self.click(frame._table_items[card])
+        self.assertEqual([card], frame.selected_table_cards)
+        self.click(frame._table_items[card])
+        self.assertEqual([], frame.selected_table_cards)
+
+    def test_images_outlive_cache(self):
+        """Items keep their images after the cache has dropped them"""
+        IMAGES.clear()
+        gc.collect()
+
+        canvas = self.frame.canvas
+        names = self.root.image_names()
+        shown = [item for tag in ["hand", "table", "backs"]
+                 for item in canvas.find_withtag(tag)
+                 if canvas.itemcget(item, "state") != "hidden"]
+        self.assertTrue(shown)
+        for item in shown:
+            self.assertIn(canvas.itemcget(item, "image"), names)
@@ -0,0 +1,48 @@
+import tkinter as tk
+import unittest
+from quince.components import Card
+from quince.ui.common.image_cache import FADED, ImageCache
+
+
+class TestImageCache(unittest.TestCase):
+    def test_reuses_images(self):
+        """Each card, size and effect is only drawn once"""
+        cache = ImageCache()
+        image = cache.image(Card(1, "oro"), (140, 140))
+        self.assertLessEqual(max(image.size), 140)
+        self.assertIs(image, cache.image(Card(1, "oro"), (140, 140)))
+        self.assertIsNot(image, cache.image(Card(1, "oro"), (140, 140),
+                                            FADED))
+        self.assertIsNot(image, cache.image(Card(2, "oro"), (140, 140)))
+        self.assertEqual((104, 160),
+                         cache.image(Card(1, "oro"), (104, 160),
+                                     fit=False).size)
+
+        hits = cache.stats().hits
+        cache.image(Card(1, "oro"), (140, 140), FADED)
+        self.assertEqual(hits + 1, cache.stats().hits)
+
+    def test_evicts_least_recently_used(self):
+        first = Card(1, "copa")
+        cache = ImageCache()
+        size = cache.image(first, (50, 50)).size
+        cache.max_bytes = cache.size + size[0] * size[1] * 4
+
+        cache.image(first, (50, 50))
+        cache.image(Card(2, "copa"), (50, 50))
+        stats = cache.stats()
+        self.assertGreater(stats.evictions, 0)
+        self.assertLessEqual(stats.size, cache.max_bytes)
+        self.assertIn((first, (50, 50), True, None, False), cache._entries)
+        self.assertNotIn((first, None, True, None, False), cache._entries)
+
+    def test_photo(self):
+        try:
+            root = tk.Tk()
+        except tk.TclError:
+            self.skipTest("no display")
+
+        cache = ImageCache()
+        photo = cache.photo(Card(3, "basto"), (65, 65), FADED)
+        self.assertIs(photo, cache.photo(Card(3, "basto"), (65, 65), FADED))
+        root.destroy()
@@ -0,0 +1,31 @@
+import tkinter as tk
+import unittest
+from quince.components import Card
+from quince.ui.player.hand import PlayerHand
+
+
+class TestPlayerHand(unittest.TestCase):
+    def setUp(self):
+        try:
+            self.root = tk.Tk()
+        except tk.TclError:
+            self.skipTest("no display")
+
+    def tearDown(self):
+        self.root.destroy()
+
+    def test_refresh(self):
+        """Slots are kept, and only redrawn when their card changes"""
+        cards = [Card(1, "oro"), Card(4, "basto"), Card(6, "copa")]
+        hand = PlayerHand(self.root, cards)
+        slots = list(hand.slots)
+        image = slots[0].unselected_image
+
+        hand.refresh(cards[:1] + cards[2:])
+        self.assertEqual(slots, hand.slots)
+        self.assertIs(image, slots[0].unselected_image)
+        self.assertEqual(2, len(hand.grid_slaves()))
+        self.assertEqual(cards[0], hand.selected_card())
+
+        with self.assertRaises(AttributeError):
+            hand.refresh(cards + [Card(7, "oro")])
@@ -0,0 +1,32 @@
+import tkinter as tk
+import unittest
+from quince.components import Card
+from quince.ui.table.table import Table
+
+
+class TestTable(unittest.TestCase):
+    def setUp(self):
+        try:
+            self.root = tk.Tk()
+        except tk.TclError:
+            self.skipTest("no display")
+
+    def tearDown(self):
+        self.root.destroy()
+
+    def test_refresh(self):
+        """Buttons are only built for cards new to the table"""
+        cards = [Card(1, "oro"), Card(4, "basto"), Card(6, "copa")]
+        table = Table(self.root, cards, lambda selected: None)
+        kept = table.buttons[cards[1]]
+        removed = table.buttons[cards[0]]
+        table.card_statuses[cards[1]].set(True)
+        self.assertEqual([cards[1]], table.selected_cards())
+
+        table.refresh(cards[1:] + [Card(9, "espada")])
+        self.assertIs(kept, table.buttons[cards[1]])
+        self.assertFalse(removed.winfo_exists())
+        self.assertEqual({cards[1], cards[2], Card(9, "espada")},
+                         set(table.buttons))
+        self.assertEqual([], table.selected_cards())
+        self.assertEqual(3, len(table.grid_slaves()))